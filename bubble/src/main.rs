@@ -1,16 +1,37 @@
 use dotenv::dotenv;
 use std::env;
 use std::fs;
+use std::io::{Cursor, ErrorKind};
 use std::sync::{Arc, Mutex};
-use tokio::io::{AsyncReadExt, AsyncWriteExt};
-use tokio::net::UnixListener;
+use tokio::io::{AsyncRead, AsyncReadExt, AsyncWriteExt, BufReader};
+use tokio::net::{UnixListener, UnixStream};
+
+// Protocol v2: the client opens the connection with MAGIC, echoed back by the
+// server. Both sides then exchange frames: a one byte opcode (requests) or
+// status (responses), a big-endian u32 payload length and the payload.
+// Requests may be pipelined, responses are written in order.
+// Connections that do not start with MAGIC use the legacy protocol: a single
+// plain string, "get_token" or the token to store.
+const MAGIC: &[u8] = b"BBL2";
+const MAX_FRAME_SIZE: usize = 1 << 20;
+
+const OP_GET: u8 = 1;
+const OP_SET: u8 = 2;
+const OP_CLEAR: u8 = 3;
+const OP_PING: u8 = 4;
+
+const STATUS_OK: u8 = 0;
+const STATUS_NO_TOKEN: u8 = 1;
+const STATUS_ERROR: u8 = 2;
+
+type Token = Arc<Mutex<Option<String>>>;
 
 #[tokio::main]
 async fn main() -> std::io::Result<()> {
     dotenv().ok();
 
     let socket_path = env::var("SOCKET_PATH").unwrap();
-    let token = Arc::new(Mutex::new(None::<String>));
+    let token: Token = Arc::new(Mutex::new(None));
 
     if fs::metadata(&socket_path).is_ok() {
         fs::remove_file(&socket_path)?;
@@ -21,31 +42,109 @@ async fn main() -> std::io::Result<()> {
     println!("Server started and listening on {}", &socket_path);
 
     loop {
-        let (mut socket, _) = listener.accept().await?;
+        let (socket, _) = listener.accept().await?;
         let token_clone = Arc::clone(&token);
 
         tokio::spawn(async move {
-            let mut buf = vec![0; 1024];
-            match socket.read(&mut buf).await {
-                Ok(_) => {
-                    let message = String::from_utf8(buf).unwrap();
-                    let message = message.trim_matches(char::from(0));
-                    if message == "get_token" {
-                        let response = match &*token_clone.lock().unwrap() {
-                            Some(token) => token.clone(),
-                            None => "No token stored".to_string(),
-                        };
-                        socket.write_all(response.as_bytes()).await.unwrap();
-                    } else {
-                        *token_clone.lock().unwrap() = Some(message.to_string());
-                        let response = "Token stored";
-                        socket.write_all(response.as_bytes()).await.unwrap();
-                    }
-                }
-                Err(e) => {
-                    println!("Error reading from socket: {}", e);
-                }
+            if let Err(e) = handle_connection(socket, token_clone).await {
+                println!("Error reading from socket: {}", e);
             }
         });
     }
 }
+
+async fn handle_connection(mut socket: UnixStream, token: Token) -> std::io::Result<()> {
+    // Read until the first bytes either are the magic or cannot be anymore.
+    let mut received = Vec::with_capacity(1024);
+    loop {
+        if socket.read_buf(&mut received).await? == 0
+            || received.len() >= MAGIC.len()
+            || !MAGIC.starts_with(&received)
+        {
+            break;
+        }
+    }
+
+    if received.starts_with(MAGIC) {
+        socket.write_all(MAGIC).await?;
+        let (reader, mut writer) = socket.split();
+        let pending = Cursor::new(received.split_off(MAGIC.len()));
+        let mut reader = BufReader::new(pending.chain(reader));
+        while let Some((opcode, payload)) = read_frame(&mut reader).await? {
+            let (status, body) = match payload {
+                Some(payload) => handle_request(opcode, payload, &token),
+                None => (STATUS_ERROR, b"Frame too large".to_vec()),
+            };
+            let mut response = Vec::with_capacity(5 + body.len());
+            response.push(status);
+            response.extend_from_slice(&(body.len() as u32).to_be_bytes());
+            response.extend_from_slice(&body);
+            writer.write_all(&response).await?;
+        }
+        return Ok(());
+    }
+
+    if received.is_empty() {
+        // Connection probe, nothing to answer.
+        return Ok(());
+    }
+
+    let message = String::from_utf8_lossy(&received);
+    let message = message.trim_matches(char::from(0));
+    let response = if message == "get_token" {
+        match &*token.lock().unwrap() {
+            Some(token) => token.clone(),
+            None => "No token stored".to_string(),
+        }
+    } else {
+        *token.lock().unwrap() = Some(message.to_string());
+        "Token stored".to_string()
+    };
+    socket.write_all(response.as_bytes()).await
+}
+
+// Reads one request frame. Returns None at the end of the connection, and no
+// payload when it is larger than MAX_FRAME_SIZE (it is skipped).
+async fn read_frame<R: AsyncRead + Unpin>(
+    reader: &mut R,
+) -> std::io::Result<Option<(u8, Option<Vec<u8>>)>> {
+    let opcode = match reader.read_u8().await {
+        Ok(opcode) => opcode,
+        Err(e) if e.kind() == ErrorKind::UnexpectedEof => return Ok(None),
+        Err(e) => return Err(e),
+    };
+    let length = reader.read_u32().await? as usize;
+    if length > MAX_FRAME_SIZE {
+        let skipped =
+            tokio::io::copy(&mut reader.take(length as u64), &mut tokio::io::sink()).await?;
+        if skipped < length as u64 {
+            return Ok(None);
+        }
+        return Ok(Some((opcode, None)));
+    }
+    let mut payload = vec![0; length];
+    reader.read_exact(&mut payload).await?;
+    Ok(Some((opcode, Some(payload))))
+}
+
+fn handle_request(opcode: u8, payload: Vec<u8>, token: &Token) -> (u8, Vec<u8>) {
+    match opcode {
+        OP_GET => match &*token.lock().unwrap() {
+            Some(token) => (STATUS_OK, token.clone().into_bytes()),
+            None => (STATUS_NO_TOKEN, Vec::new()),
+        },
+        OP_SET => match String::from_utf8(payload) {
+            Ok(value) => {
+                *token.lock().unwrap() = Some(value);
+                (STATUS_OK, Vec::new())
+            }
+            Err(_) => (STATUS_ERROR, b"Token is not valid UTF-8".to_vec()),
+        },
+        OP_CLEAR => {
+            *token.lock().unwrap() = None;
+            (STATUS_OK, Vec::new())
+        }
+        OP_PING => (STATUS_OK, Vec::new()),
+        _ => (STATUS_ERROR, b"Unknown opcode".to_vec()),
+    }
+}
@@ -0,0 +1,123 @@
+from datetime import datetime
+
+import typer
+from rich import print
+
+from epic_events.auth.claims import get_current_claims, reset_current_user
+from epic_events.auth.storage import storage
+from epic_events.settings import get_settings
+
+# The models are imported by the commands reading users only, so that `whoami`
+# and `logout` start without SQLAlchemy and passlib.
+
+
+def login() -> None:
+    """
+    Prompts the user for a username and password, checks if the user exists and the password is correct,
+    generates a JWT token, and sends it to the storage.
+
+    Raises:
+        socket.error: If there is a socket connection failure.
+
+    Returns:
+        None
+    """
+    from sqlalchemy.orm import joinedload
+
+    from epic_events.auth.utils import generate_jwt
+    from epic_events.models import session
+    from epic_events.models.users import User
+
+    username = typer.prompt("Username")
+    password = typer.prompt("Password", hide_input=True)
+    user = (
+        session.query(User)
+        .options(joinedload("*"))
+        .filter_by(username=username)
+        .first()
+    )
+    if user is None or not user.check_password(password):
+        typer.echo("Invalid username or password")
+        return
+
+    jwt = generate_jwt(user)
+    try:
+        storage.send_token(jwt)
+        reset_current_user()
+        typer.echo("Login successful")
+    except OSError as e:
+        typer.echo(f"Socket connection failed: {e}")
+
+
+def logout() -> None:
+    """
+    Logs out the user by terminating the storage connection.
+
+    Raises:
+        socket.error: If the socket connection fails.
+    """
+    try:
+        storage.terminate()
+        reset_current_user()
+        typer.echo("Logout successful")
+    except OSError as e:
+        typer.echo(f"Socket connection failed: {e}")
+
+
+def renew(
+    force: bool = typer.Option(
+        False, "--force", help="Renew even if the token is not about to expire."
+    ),
+) -> None:
+    """
+    Replace the session token with a new one before it expires.
+
+    The token is only replaced within the `jwt_refresh_window` setting of its
+    expiry, unless forced. The user is read again, so that the new token carries
+    their current role, and revoked tokens cannot be renewed.
+
+    Args:
+        force (bool): Renew even if the token is not about to expire.
+
+    Raises:
+        typer.Exit: If there is no valid token, or it was revoked.
+    """
+    from epic_events.auth.utils import generate_jwt, get_current_user
+
+    try:
+        claims = get_current_claims()
+        if not force and claims.expires_in() > get_settings().jwt_refresh_window:
+            expiry = datetime.fromtimestamp(claims.expires_at)
+            typer.echo(f"Token valid until {expiry:%Y-%m-%d %H:%M}, not renewed.")
+            return
+
+        user = get_current_user()
+        storage.send_token(generate_jwt(user))
+        reset_current_user()
+        typer.echo("Token renewed")
+    except OSError as e:
+        typer.echo(f"Socket connection failed: {e}")
+        raise typer.Exit(code=1)
+
+
+def get_auth_user():
+    """
+    Retrieves the authenticated user based on the decoded token.
+
+    Only the token claims are read, not the user row.
+
+    Returns:
+        Claims: The claims of the authenticated user.
+    """
+    try:
+        claims = get_current_claims()
+    except OSError as e:
+        typer.echo(f"Socket connection failed: {e}")
+        raise typer.Exit(code=1)
+
+    print(claims.username)
+    return claims
+
+
+def trigger_error():
+    print(1 / 0)
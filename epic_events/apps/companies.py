@@ -1,37 +1,66 @@
 import typer
-from rich import print
-from rich.table import Table
 from sqlalchemy.exc import IntegrityError
 
-from epic_events.auth.utils import ALL_AUTHENTICATED_USERS, allow_users
+from epic_events.apps.listing import (
+    AFTER_OPTION,
+    FORMAT_OPTION,
+    LIMIT_OPTION,
+    PAGE_SIZE_OPTION,
+    OutputFormat,
+    print_pages,
+    write_rows,
+)
+from epic_events.auth.utils import (
+    ALL_AUTHENTICATED_USERS,
+    MANAGERS,
+    SALES_TEAM,
+    allow_users,
+)
 from epic_events.models import session
 from epic_events.models.companies import Company
-from epic_events.models.users import UserType
+from epic_events.models.queries import companies_query, companies_rows
 
 app = typer.Typer()
 
 
 @app.command("list")
-def list_companies():
+def list_companies(
+    limit: int | None = LIMIT_OPTION,
+    after: int | None = AFTER_OPTION,
+    page_size: int = PAGE_SIZE_OPTION,
+    output_format: OutputFormat = FORMAT_OPTION,
+):
     """
     Retrieve a list of companies and display them in a table format.
+
+    Companies are fetched and printed page by page, ordered by id.
     """
     allow_users(ALL_AUTHENTICATED_USERS)
-    companies = session.query(Company).all()
-    companies_table = Table(title="Companies")
-    columns = ("Id", "Name", "Customers")
-
-    for column in columns:
-        companies_table.add_column(column)
-
-    for company in companies:
-        companies_table.add_row(
+    if output_format is not OutputFormat.TABLE:
+        write_rows(
+            output_format,
+            companies_rows(session),
+            Company.id,
+            after=after,
+            limit=limit,
+            page_size=page_size,
+        )
+        return
+
+    print_pages(
+        "Companies",
+        ("Id", "Name", "Customers"),
+        companies_query(session),
+        Company.id,
+        lambda company: (
             str(company.id),
             company.name,
             ", ".join([customer.name for customer in company.customers]),
-        )
-
-    print(companies_table)
+        ),
+        after=after,
+        limit=limit,
+        page_size=page_size,
+    )
 
 
 @app.command("create")
@@ -47,7 +76,7 @@ def create_company():
     Raises:
         IntegrityError: If a company with the same name already exists in the database.
     """
-    allow_users([UserType.ADMIN, UserType.MANAGER, UserType.SALES_REP])
+    allow_users(SALES_TEAM, check_revoked=True)
     name = typer.prompt("Name")
     company = Company(name=name)
 
@@ -74,7 +103,7 @@ def update_company():
         typer.Exit: If the company is not found.
 
     """
-    allow_users([UserType.ADMIN, UserType.MANAGER])
+    allow_users(MANAGERS, check_revoked=True)
     company_id = typer.prompt("Company ID")
     company = session.query(Company).get(company_id)
 
@@ -98,7 +127,7 @@ def delete_company(company_id: int):
     Raises:
         typer.Exit: If the company with the given company_id is not found.
     """
-    allow_users([UserType.ADMIN, UserType.MANAGER])
+    allow_users(MANAGERS, check_revoked=True)
     company = session.query(Company).get(company_id)
 
     if company is None:
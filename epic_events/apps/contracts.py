@@ -1,25 +1,64 @@
+import decimal
+
 import typer
 from rich import print
-from rich.table import Table
-import decimal
-from epic_events.auth.utils import ALL_AUTHENTICATED_USERS, allow_users
+
+from epic_events import telemetry
+from epic_events.apps.listing import (
+    AFTER_OPTION,
+    FORMAT_OPTION,
+    LIMIT_OPTION,
+    MINE_OPTION,
+    PAGE_SIZE_OPTION,
+    OutputFormat,
+    print_pages,
+    write_rows,
+)
+from epic_events.auth.utils import ALL_AUTHENTICATED_USERS, SALES_TEAM, allow_users
 from epic_events.models import session
 from epic_events.models.contracts import Contract
-import sentry_sdk
-
-from epic_events.models.users import UserType
+from epic_events.models.queries import contract_filters, contracts_query, contracts_rows
 
 app = typer.Typer()
 
 
 @app.command("list")
-def list_contracts():
+def list_contracts(
+    limit: int | None = LIMIT_OPTION,
+    after: int | None = AFTER_OPTION,
+    page_size: int = PAGE_SIZE_OPTION,
+    output_format: OutputFormat = FORMAT_OPTION,
+    mine: bool = MINE_OPTION,
+    unsigned: bool = typer.Option(
+        False, "--unsigned", help="Only list the contracts not signed yet."
+    ),
+    unpaid: bool = typer.Option(
+        False, "--unpaid", help="Only list the contracts with an amount due."
+    ),
+):
     """
     List all contracts in the database and display them in a table format.
+
+    Contracts are fetched and printed page by page, ordered by id. The filters
+    are applied by the database.
     """
-    allow_users(ALL_AUTHENTICATED_USERS)
-    contracts = session.query(Contract).all()
-    table = Table(title="Contracts")
+    claims = allow_users(ALL_AUTHENTICATED_USERS)
+    filters = contract_filters(
+        sales_rep_id=claims.user_id if mine else None,
+        unsigned=unsigned,
+        unpaid=unpaid,
+    )
+    if output_format is not OutputFormat.TABLE:
+        write_rows(
+            output_format,
+            contracts_rows(session).filter(*filters),
+            Contract.id,
+            after=after,
+            limit=limit,
+            page_size=page_size,
+        )
+        return
+
     columns = (
         "Id",
         "Company",
@@ -32,25 +71,27 @@ def list_contracts():
         "Time Created",
         "Time Updated",
     )
-
-    for column in columns:
-        table.add_column(column)
-
-    for contract in contracts:
-        table.add_row(
+    print_pages(
+        "Contracts",
+        columns,
+        contracts_query(session).filter(*filters),
+        Contract.id,
+        lambda contract: (
             str(contract.id),
             contract.customer.company.name,
             contract.customer.name,
             str(contract.value),
             str(contract.amount_due),
-            contract.sales_rep.username,
+            contract.sales_rep.username if contract.sales_rep else "",
             contract.event.name if contract.event else "",
             "Yes" if contract.signed else "No",
             str(contract.time_created),
             str(contract.time_updated),
-        )
-
-    print(table)
+        ),
+        after=after,
+        limit=limit,
+        page_size=page_size,
+    )
 
 
 @app.command("create")
@@ -63,7 +104,7 @@ def create_contract():
     Raises:
         typer.Exit: Raised when the input values are invalid or the contract cannot be created.
     """
-    allow_users([UserType.SALES_REP, UserType.MANAGER])
+    allow_users(SALES_TEAM, check_revoked=True)
     customer_id = typer.prompt("Customer ID")
     value = typer.prompt("Value")
     amount_due = typer.prompt("Amount Due")
@@ -101,7 +142,7 @@ def create_contract():
     session.commit()
 
     if is_signed:
-        sentry_sdk.capture_message(f"The Contract {contract.id} has been signed.")
+        telemetry.capture_message(f"The Contract {contract.id} has been signed.")
 
     typer.echo(f"Contract {contract.id} created.")
 
@@ -119,7 +160,7 @@ def update_contract():
         typer.Exit: If the contract with the specified ID is not found, or if the entered values are invalid or do not meet the required conditions.
 
     """
-    allow_users([UserType.SALES_REP, UserType.MANAGER])
+    allow_users(SALES_TEAM, check_revoked=True)
 
     contract_id = typer.prompt("Contract ID")
     contract = session.query(Contract).get(contract_id)
@@ -158,7 +199,7 @@ def update_contract():
     session.commit()
 
     if is_signed:
-        sentry_sdk.capture_message(f"The Contract {contract.id} has been signed.")
+        telemetry.capture_message(f"The Contract {contract.id} has been signed.")
     typer.echo(f"Contract {contract.id} updated.")
 
 
@@ -173,7 +214,7 @@ def delete_contract(contract_id: int):
     Raises:
         typer.Exit: If the contract with the given contract_id is not found.
     """
-    allow_users([UserType.SALES_REP, UserType.MANAGER])
+    allow_users(SALES_TEAM, check_revoked=True)
 
     contract = session.query(Contract).get(contract_id)
 
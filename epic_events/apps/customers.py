@@ -1,21 +1,73 @@
+import time
+from itertools import islice
+from pathlib import Path
+
 import typer
-from rich import print
-from rich.table import Table
+from sqlalchemy import insert
 
-from epic_events.auth.utils import ALL_AUTHENTICATED_USERS, allow_users
+from epic_events.apps.importing import batched, echo_throughput, read_records
+from epic_events.apps.listing import (
+    AFTER_OPTION,
+    FORMAT_OPTION,
+    LIMIT_OPTION,
+    MINE_OPTION,
+    PAGE_SIZE_OPTION,
+    UNASSIGNED_OPTION,
+    OutputFormat,
+    check_assignment_filters,
+    print_pages,
+    write_rows,
+)
+from epic_events.auth.utils import (
+    ALL_AUTHENTICATED_USERS,
+    MANAGERS,
+    SALES_TEAM,
+    allow_users,
+)
 from epic_events.models import session
-from epic_events.models.companies import get_or_create_company
+from epic_events.models.companies import (
+    Company,
+    get_or_create_companies,
+    get_or_create_company,
+)
 from epic_events.models.customers import Customer
-from epic_events.models.users import User, UserType
+from epic_events.models.imports import (
+    clear_progress,
+    file_fingerprint,
+    load_progress,
+    save_progress,
+)
+from epic_events.models.queries import customer_filters, customers_query, customers_rows
+from epic_events.models.users import SalesRep, User
 
 app = typer.Typer()
 
 
 @app.command("list")
-def list_customers():
-    allow_users(ALL_AUTHENTICATED_USERS)
-    customers = session.query(Customer).all()
-    table = Table(title="Customers")
+def list_customers(
+    limit: int | None = LIMIT_OPTION,
+    after: int | None = AFTER_OPTION,
+    page_size: int = PAGE_SIZE_OPTION,
+    output_format: OutputFormat = FORMAT_OPTION,
+    mine: bool = MINE_OPTION,
+    unassigned: bool = UNASSIGNED_OPTION,
+):
+    claims = allow_users(ALL_AUTHENTICATED_USERS)
+    check_assignment_filters(mine, unassigned)
+    filters = customer_filters(
+        sales_rep_id=claims.user_id if mine else None, unassigned=unassigned
+    )
+    if output_format is not OutputFormat.TABLE:
+        write_rows(
+            output_format,
+            customers_rows(session).filter(*filters),
+            Customer.id,
+            after=after,
+            limit=limit,
+            page_size=page_size,
+        )
+        return
+
     columns = (
         "Id",
         "Name",
@@ -24,26 +76,28 @@ def list_customers():
         "Time created",
         "Time updated",
     )
-
-    for column in columns:
-        table.add_column(column)
-
-    for customer in customers:
-        table.add_row(
+    print_pages(
+        "Customers",
+        columns,
+        customers_query(session).filter(*filters),
+        Customer.id,
+        lambda customer: (
             str(customer.id),
             customer.name,
             customer.company.name,
-            str(customer.sales_rep.username) if customer.sales_rep.username else "",
+            customer.sales_rep.username if customer.sales_rep else "",
             str(customer.time_created),
             str(customer.time_updated),
-        )
-
-    print(table)
+        ),
+        after=after,
+        limit=limit,
+        page_size=page_size,
+    )
 
 
 @app.command("create")
 def create_customer():
-    allow_users([UserType.MANAGER, UserType.SALES_REP])
+    allow_users(SALES_TEAM, check_revoked=True)
     name = typer.prompt("Name")
     company_name = typer.prompt("Company name")
     sales_rep_id = typer.prompt("Sales Rep ID")
@@ -64,9 +118,99 @@ def create_customer():
     typer.echo(f"{customer} created.")
 
 
+@app.command("import")
+def import_customers(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False),
+    batch_size: int = typer.Option(
+        5000, min=1, help="Customers inserted per transaction."
+    ),
+    restart: bool = typer.Option(
+        False, "--restart", help="Ignore the saved progress and start from the top."
+    ),
+):
+    """
+    Import customers from a CSV or JSONL file.
+
+    Each record needs a name, a company name and a sales_rep_id. The file is streamed
+    in batches: company names are resolved against an in-memory name to id map, new
+    companies are inserted in bulk, sales rep ids are checked against a cached id set
+    and customers are inserted with one statement per batch. The number of records
+    imported is saved in the transaction of each batch, so a failed import resumes
+    where it stopped when run again on the same, unchanged file.
+
+    Args:
+        path (Path): The CSV (with a header row) or JSONL file to import.
+        batch_size (int): The number of customers inserted per transaction.
+        restart (bool): Ignore the progress of an interrupted import.
+
+    Raises:
+        typer.Exit: If the file changed since its import was interrupted.
+    """
+    allow_users(SALES_TEAM, check_revoked=True)
+    fingerprint = file_fingerprint(path)
+    progress = load_progress(session, path)
+    done = 0
+    if progress is not None and not restart:
+        if (progress["size"], progress["mtime_ns"]) != (
+            fingerprint["size"],
+            fingerprint["mtime_ns"],
+        ):
+            typer.echo(
+                f"{path} changed since its import stopped: "
+                "pass --restart to import it from the top."
+            )
+            raise typer.Exit(code=1)
+        done = progress["records"]
+        typer.echo(f"Resuming after {done} records.")
+
+    company_ids = dict(session.query(Company.name, Company.id))
+    sales_rep_ids = {sales_rep_id for (sales_rep_id,) in session.query(SalesRep.id)}
+    imported = invalid = 0
+    start = time.perf_counter()
+
+    for batch in batched(islice(read_records(path), done, None), batch_size):
+        rows = []
+        for record in batch:
+            try:
+                name = record["name"].strip()
+                company_name = record["company"].strip()
+                sales_rep_id = int(record["sales_rep_id"])
+            except (KeyError, ValueError, AttributeError):
+                invalid += 1
+                continue
+            if not name or not company_name or sales_rep_id not in sales_rep_ids:
+                invalid += 1
+                continue
+            rows.append((name, company_name, sales_rep_id))
+
+        new_companies = {company for _, company, _ in rows} - company_ids.keys()
+        company_ids.update(get_or_create_companies(session, new_companies))
+        if rows:
+            session.execute(
+                insert(Customer),
+                [
+                    {
+                        "name": name,
+                        "company_id": company_ids[company_name],
+                        "sales_rep_id": sales_rep_id,
+                    }
+                    for name, company_name, sales_rep_id in rows
+                ],
+            )
+        done += len(batch)
+        save_progress(session, path, fingerprint, done)
+        session.commit()
+        imported += len(rows)
+
+    clear_progress(session, path)
+    session.commit()
+    echo_throughput("customers imported", imported, time.perf_counter() - start)
+    typer.echo(f"{invalid} invalid records skipped.")
+
+
 @app.command("update")
 def update_customer():
-    allow_users([UserType.MANAGER, UserType.SALES_REP])
+    allow_users(SALES_TEAM, check_revoked=True)
     customer_id = typer.prompt("Customer ID")
     customer = session.query(Customer).get(customer_id)
 
@@ -94,7 +238,7 @@ def update_customer():
 
 @app.command("delete")
 def delete_customer(customer_id: int):
-    allow_users([UserType.MANAGER])
+    allow_users(MANAGERS, check_revoked=True)
     customer = session.query(Customer).get(customer_id)
 
     if customer is None:
@@ -0,0 +1,99 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import typer
+
+from epic_events.client import daemon_socket_path, is_running
+
+STARTUP_TIMEOUT = 10.0
+
+app = typer.Typer()
+
+
+def _socket_path() -> str:
+    path = daemon_socket_path()
+    if not path:
+        typer.echo("The daemon is disabled: DAEMON_SOCKET is empty.")
+        raise typer.Exit(code=1)
+    return path
+
+
+@app.command("start")
+def start_daemon(
+    detach: bool = typer.Option(False, "--detach", help="Run in the background."),
+):
+    """
+    Start the command daemon.
+
+    It listens on DAEMON_SOCKET (~/.epic_events.sock by default). While it runs,
+    `python -m epic_events` forwards commands to it instead of importing the
+    application and connecting to the database on every invocation.
+
+    Args:
+        detach (bool): Start the daemon in the background and return once it listens.
+
+    Raises:
+        typer.Exit: If a daemon is already running or does not start in time.
+    """
+    path = _socket_path()
+    if is_running(path):
+        typer.echo(f"The daemon is already running on {path}.")
+        raise typer.Exit(code=1)
+
+    if detach:
+        subprocess.Popen(
+            [sys.executable, "-m", "epic_events", "daemon", "start"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while not is_running(path):
+            if time.monotonic() >= deadline:
+                typer.echo(f"The daemon did not start in {STARTUP_TIMEOUT}s.")
+                raise typer.Exit(code=1)
+            time.sleep(0.05)
+        typer.echo(f"Daemon listening on {path}.")
+        return
+
+    from epic_events.daemon import serve
+
+    typer.echo(f"Daemon listening on {path}.")
+    serve(path)
+
+
+@app.command("stop")
+def stop_daemon():
+    """
+    Stop the command daemon.
+
+    Raises:
+        typer.Exit: If the daemon is not running.
+    """
+    pid_path = f"{_socket_path()}.pid"
+    try:
+        with open(pid_path) as pid_file:
+            os.kill(int(pid_file.read()), signal.SIGTERM)
+    except (FileNotFoundError, ProcessLookupError, ValueError):
+        typer.echo("The daemon is not running.")
+        raise typer.Exit(code=1)
+    typer.echo("Daemon stopped.")
+
+
+@app.command("status")
+def daemon_status():
+    """
+    Tell whether the command daemon is running.
+
+    Raises:
+        typer.Exit: If the daemon is not running.
+    """
+    path = _socket_path()
+    if not is_running(path):
+        typer.echo("The daemon is not running.")
+        raise typer.Exit(code=1)
+    typer.echo(f"The daemon is running on {path}.")
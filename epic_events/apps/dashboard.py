@@ -0,0 +1,115 @@
+import typer
+
+from epic_events import telemetry
+from epic_events.apps.listing import FORMAT_OPTION, OutputFormat
+from epic_events.apps.reports import TOP_OPTION, show_report
+from epic_events.auth.utils import ADMINS, MANAGERS, allow_users
+from epic_events.models import session
+from epic_events.models.summaries import (
+    check,
+    customer_balances,
+    maintained_by_triggers,
+    open_events,
+    rebuild,
+    sales_rep_balances,
+)
+
+app = typer.Typer()
+
+
+def warn_if_not_maintained() -> None:
+    """
+    Warn, on stderr, that the summary tables may be stale on a database
+    without the triggers maintaining them.
+    """
+    if not maintained_by_triggers(session):
+        dialect = session.get_bind().dialect.name
+        typer.echo(
+            f"Warning: the summary tables are not maintained on {dialect}, "
+            "they show the state of the last `dashboard rebuild`.",
+            err=True,
+        )
+
+
+@app.command("sales-reps")
+def sales_reps_dashboard(
+    top: int | None = TOP_OPTION,
+    output_format: OutputFormat = FORMAT_OPTION,
+):
+    """
+    Show the outstanding amount of each sales rep's signed contracts.
+    """
+    allow_users(MANAGERS)
+    warn_if_not_maintained()
+    show_report(
+        "Outstanding by sales rep", sales_rep_balances(session), output_format, top
+    )
+
+
+@app.command("customers")
+def customers_dashboard(
+    top: int | None = TOP_OPTION,
+    output_format: OutputFormat = FORMAT_OPTION,
+):
+    """
+    Show the customers with an outstanding amount, largest first.
+    """
+    allow_users(MANAGERS)
+    warn_if_not_maintained()
+    show_report(
+        "Outstanding by customer", customer_balances(session), output_format, top
+    )
+
+
+@app.command("support-reps")
+def support_reps_dashboard(
+    top: int | None = TOP_OPTION,
+    output_format: OutputFormat = FORMAT_OPTION,
+):
+    """
+    Show the number of events not ended yet of each support rep.
+    """
+    allow_users(MANAGERS)
+    warn_if_not_maintained()
+    show_report("Open events by support rep", open_events(session), output_format, top)
+
+
+@app.command("rebuild")
+def rebuild_dashboard():
+    """
+    Recompute the dashboard summary tables from the contracts and events.
+
+    On SQLite the tables are kept up to date on every change: rebuilding is only
+    needed to recover from a failed `dashboard check`. Other databases have no
+    triggers maintaining them, and need a rebuild to show recent changes.
+    """
+    allow_users(ADMINS, check_revoked=True)
+    counts = rebuild(session)
+    session.commit()
+    for table, count in counts.items():
+        typer.echo(f"{table}: {count} rows")
+    telemetry.capture_message("REBUILT dashboard summary tables.")
+
+
+@app.command("check")
+def check_dashboard():
+    """
+    Compare the dashboard summary tables with the contracts and events.
+
+    Raises:
+        typer.Exit: With code 1 if a summary table is out of date.
+    """
+    allow_users(ADMINS)
+    consistent = True
+    for table, differences in check(session).items():
+        if not differences:
+            typer.echo(f"{table}: OK")
+            continue
+        consistent = False
+        typer.echo(f"{table}: {len(differences)} rows differ")
+        for key, stored, expected in differences[:10]:
+            typer.echo(f"    {key}: stored {stored}, expected {expected}")
+
+    if not consistent:
+        typer.echo("Run `dashboard rebuild` to fix the summary tables.")
+        raise typer.Exit(code=1)
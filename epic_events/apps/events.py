@@ -1,28 +1,124 @@
+from datetime import datetime, timedelta
+
 import typer
 from rich import print
 from rich.table import Table
 
-from epic_events.auth.utils import ALL_AUTHENTICATED_USERS, allow_users
+from epic_events.apps.listing import (
+    AFTER_OPTION,
+    FORMAT_OPTION,
+    LIMIT_OPTION,
+    MINE_OPTION,
+    PAGE_SIZE_OPTION,
+    UNASSIGNED_OPTION,
+    OutputFormat,
+    check_assignment_filters,
+    print_pages,
+    write_rows,
+)
+from epic_events.auth.utils import (
+    ALL_AUTHENTICATED_USERS,
+    MANAGERS,
+    SALES_TEAM,
+    allow_users,
+)
 from epic_events.models import session
 from epic_events.models.events import Event
-from epic_events.models.users import UserType
-from datetime import datetime
+from epic_events.models.queries import event_filters, events_query, events_rows
+from epic_events.models.schedule import (
+    conflicting_events,
+    find_conflicts,
+    schedule_query,
+)
 
 app = typer.Typer()
 
+SCHEDULE_DAYS = 7
+
+
+def day_of(value: datetime | None) -> str | None:
+    """
+    Format a date as the prompts expect it, YYYY-MM-DD.
+    """
+    return f"{value:%Y-%m-%d}" if value is not None else None
+
+
+def confirm_no_conflict(event: Event) -> None:
+    """
+    Warn when an event double-books its support rep, and let the user cancel.
+
+    Args:
+        event (Event): The event about to be saved.
+
+    Raises:
+        typer.Exit: If the user does not confirm the double booking.
+    """
+    conflicts = conflicting_events(session, event)
+    if not conflicts:
+        return
+    typer.echo(f"Support rep {event.support_rep_id} is already booked:")
+    for other in conflicts:
+        typer.echo(
+            f"    Event {other.id} {other.name}: "
+            f"{day_of(other.start_date)} to {day_of(other.end_date or other.start_date)}"
+        )
+    if not typer.confirm("Save the event anyway?", default=False):
+        session.rollback()
+        typer.echo("Event not saved.")
+        raise typer.Exit(code=1)
+
 
 @app.command("list")
-def list_events():
+def list_events(
+    limit: int | None = LIMIT_OPTION,
+    after: int | None = AFTER_OPTION,
+    page_size: int = PAGE_SIZE_OPTION,
+    output_format: OutputFormat = FORMAT_OPTION,
+    mine: bool = MINE_OPTION,
+    unassigned: bool = UNASSIGNED_OPTION,
+    start: datetime | None = typer.Option(
+        None,
+        "--from",
+        formats=["%Y-%m-%d"],
+        help="Only list the events starting this day or later.",
+    ),
+    end: datetime | None = typer.Option(
+        None,
+        "--to",
+        formats=["%Y-%m-%d"],
+        help="Only list the events starting this day or earlier.",
+    ),
+):
     """
     Retrieve and display a list of events.
 
-    This function queries the database for all events and displays them in a table format.
+    This function queries the database for events and displays them page by page in a table format.
     The table includes columns for the event's ID, name, start date, end date, attendees,
     location, notes, contract ID, support representative name, time created, and time updated.
+    The filters are applied by the database.
     """
-    allow_users(ALL_AUTHENTICATED_USERS)
-    events = session.query(Event).all()
-    events_table = Table(title="Events")
+    claims = allow_users(ALL_AUTHENTICATED_USERS)
+    check_assignment_filters(mine, unassigned)
+    if start is not None and end is not None and start > end:
+        typer.echo("--from must not be after --to.")
+        raise typer.Exit(code=1)
+    filters = event_filters(
+        support_rep_id=claims.user_id if mine else None,
+        unassigned=unassigned,
+        start=start,
+        end=end,
+    )
+    if output_format is not OutputFormat.TABLE:
+        write_rows(
+            output_format,
+            events_rows(session).filter(*filters),
+            Event.id,
+            after=after,
+            limit=limit,
+            page_size=page_size,
+        )
+        return
+
     columns = (
         "Id",
         "Name",
@@ -36,11 +132,12 @@ def list_events():
         "Time created",
         "Time updated",
     )
-    for column in columns:
-        events_table.add_column(column)
-
-    for event in events:
-        events_table.add_row(
+    print_pages(
+        "Events",
+        columns,
+        events_query(session).filter(*filters),
+        Event.id,
+        lambda event: (
             str(event.id),
             event.name,
             str(event.start_date),
@@ -52,9 +149,11 @@ def list_events():
             event.support_rep.username if event.support_rep else "",
             str(event.time_created),
             str(event.time_updated),
-        )
-
-    print(events_table)
+        ),
+        after=after,
+        limit=limit,
+        page_size=page_size,
+    )
 
 
 @app.command("create")
@@ -67,7 +166,7 @@ def create_event():
     saves it to the database.
     """
 
-    allow_users([UserType.SALES_REP, UserType.MANAGER])
+    allow_users(SALES_TEAM, check_revoked=True)
 
     name = typer.prompt("Name")
     start_date = datetime.strptime(typer.prompt("Start date (YYYY-MM-DD)"), "%Y-%m-%d")
@@ -88,6 +187,7 @@ def create_event():
         contract_id=contract_id,
         support_rep_id=support_rep_id,
     )
+    confirm_no_conflict(event)
     session.add(event)
     session.commit()
     typer.echo(f"Event {event.id} created")
@@ -106,7 +206,7 @@ def update_event():
         typer.Exit: If the event with the specified ID is not found in the database.
     """
 
-    allow_users([UserType.MANAGER])
+    allow_users(MANAGERS, check_revoked=True)
 
     event_id = typer.prompt("Event ID")
     event = session.query(Event).get(event_id)
@@ -117,10 +217,12 @@ def update_event():
 
     name = typer.prompt("Name", default=event.name)
     start_date = datetime.strptime(
-        typer.prompt("Start date (YYYY-MM-DD)", default=event.start_date), "%Y-%m-%d"
+        typer.prompt("Start date (YYYY-MM-DD)", default=day_of(event.start_date)),
+        "%Y-%m-%d",
     )
     end_date = datetime.strptime(
-        typer.prompt("End date (YYYY-MM-DD)", default=event.end_date), "%Y-%m-%d"
+        typer.prompt("End date (YYYY-MM-DD)", default=day_of(event.end_date)),
+        "%Y-%m-%d",
     )
     attendees = typer.prompt("Attendees", default=event.attendees)
     location = typer.prompt("Location", default=event.location)
@@ -137,6 +239,7 @@ def update_event():
     event.contract_id = contract_id
     event.support_rep_id = support_rep_id
 
+    confirm_no_conflict(event)
     session.commit()
 
 
@@ -152,7 +255,7 @@ def delete_event(event_id: int):
         typer.Exit: If the event with the given event_id is not found.
     """
 
-    allow_users([UserType.MANAGER])
+    allow_users(MANAGERS, check_revoked=True)
 
     event = session.query(Event).get(event_id)
 
@@ -163,3 +266,84 @@ def delete_event(event_id: int):
     session.delete(event)
     session.commit()
     typer.echo(f"Event {event_id} deleted")
+
+
+@app.command("schedule")
+def show_schedule(
+    support_rep_id: int | None = typer.Option(
+        None, "--rep", help="Support rep id, yourself by default."
+    ),
+    start: datetime | None = typer.Option(
+        None, "--from", formats=["%Y-%m-%d"], help="First day, today by default."
+    ),
+    days: int = typer.Option(
+        SCHEDULE_DAYS, "--days", min=1, help="Number of days to show."
+    ),
+):
+    """
+    Show the events of a support rep over the next days.
+
+    Args:
+        support_rep_id (int, optional): The support rep, the logged in user by default.
+        start (datetime, optional): The first day, today by default.
+        days (int): The number of days to show.
+    """
+    claims = allow_users(ALL_AUTHENTICATED_USERS)
+    support_rep_id = support_rep_id if support_rep_id is not None else claims.user_id
+    start = start or datetime.combine(datetime.now(), datetime.min.time())
+    end = start + timedelta(days=days) - timedelta(microseconds=1)
+
+    events = schedule_query(session, support_rep_id, start, end).all()
+    title = f"Support rep {support_rep_id}: {start:%Y-%m-%d} to {end:%Y-%m-%d}"
+    if not events:
+        typer.echo(f"{title}: no event.")
+        return
+
+    table = Table(title=title)
+    for column in ("Id", "Name", "Start date", "End date", "Location", "Attendees"):
+        table.add_column(column)
+    for event in events:
+        table.add_row(
+            str(event.id),
+            event.name,
+            day_of(event.start_date),
+            day_of(event.end_date) or "",
+            event.location,
+            str(event.attendees),
+        )
+    print(table)
+
+
+@app.command("conflicts")
+def list_conflicts(
+    start: datetime | None = typer.Option(
+        None,
+        "--from",
+        formats=["%Y-%m-%d"],
+        help="Ignore the events ended before this day.",
+    ),
+):
+    """
+    List every pair of events double-booking a support rep.
+    """
+    allow_users(MANAGERS)
+    table = Table(title="Conflicting events")
+    for column in ("Support Rep", "Event", "Overlapping event", "From", "To"):
+        table.add_column(column)
+
+    count = 0
+    for conflict in find_conflicts(session, start):
+        count += 1
+        table.add_row(
+            str(conflict.support_rep_id),
+            str(conflict.first),
+            str(conflict.second),
+            day_of(conflict.start),
+            day_of(conflict.end),
+        )
+
+    if not count:
+        typer.echo("No conflict.")
+        return
+    print(table)
+    typer.echo(f"{count} conflicts.")
@@ -0,0 +1,55 @@
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+
+import typer
+
+
+def read_records(path: Path):
+    """
+    Stream the records of a CSV (with a header row) or JSONL file.
+
+    Args:
+        path (Path): The file to read. Files ending in .jsonl or .ndjson are
+            read as JSON lines, anything else as CSV.
+
+    Yields:
+        dict: One record per row.
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.suffix in (".jsonl", ".ndjson"):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(file)
+
+
+def batched(iterable, size: int):
+    """
+    Split an iterable into lists of at most `size` items.
+
+    Args:
+        iterable: The items to split.
+        size (int): The maximum batch size.
+
+    Yields:
+        list: The successive batches.
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def echo_throughput(label: str, count: int, elapsed: float) -> None:
+    """
+    Print how many items were processed and how fast.
+
+    Args:
+        label (str): What was processed, e.g. "users imported".
+        count (int): The number of items processed.
+        elapsed (float): The elapsed time in seconds.
+    """
+    rate = count / elapsed if elapsed else 0
+    typer.echo(f"{count} {label} in {elapsed:.2f}s ({rate:.0f}/s)")
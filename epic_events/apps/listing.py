@@ -0,0 +1,146 @@
+import csv
+import json
+import sys
+from enum import Enum
+
+import typer
+from rich import print
+from rich.table import Table
+
+from epic_events.models.queries import PAGE_SIZE, paginate, stream_rows
+
+
+class OutputFormat(str, Enum):
+    TABLE = "table"
+    NDJSON = "ndjson"
+    CSV = "csv"
+    TSV = "tsv"
+
+
+LIMIT_OPTION = typer.Option(None, "--limit", min=1, help="Maximum rows to list.")
+AFTER_OPTION = typer.Option(None, "--after", help="Only list rows with a greater id.")
+PAGE_SIZE_OPTION = typer.Option(
+    PAGE_SIZE, "--page-size", min=1, help="Rows fetched and printed per page."
+)
+FORMAT_OPTION = typer.Option(
+    OutputFormat.TABLE, "--format", help="Rich table or a machine-readable stream."
+)
+MINE_OPTION = typer.Option(False, "--mine", help="Only list rows assigned to you.")
+UNASSIGNED_OPTION = typer.Option(
+    False, "--unassigned", help="Only list rows assigned to nobody."
+)
+
+
+def check_assignment_filters(mine: bool, unassigned: bool) -> None:
+    """
+    Reject --mine combined with --unassigned, which would never match.
+
+    Raises:
+        typer.Exit: If both filters are set.
+    """
+    if mine and unassigned:
+        typer.echo("--mine and --unassigned cannot be combined.")
+        raise typer.Exit(code=1)
+
+
+def print_pages(
+    title: str,
+    columns: tuple[str, ...],
+    query,
+    key,
+    to_row,
+    after: int | None = None,
+    limit: int | None = None,
+    page_size: int = PAGE_SIZE,
+) -> None:
+    """
+    Stream a keyset-paginated query to the terminal, one table per page.
+
+    Each page is printed as soon as it is fetched, so nothing but the current
+    page is held in memory.
+
+    Args:
+        title (str): The title printed above the first page.
+        columns (tuple[str, ...]): The column headers.
+        query: The query to list, ordered by `key`.
+        key: The column to paginate on.
+        to_row: A callable turning one result into a tuple of strings.
+        after (int, optional): Only list rows whose key is greater than this.
+        limit (int, optional): Maximum number of rows to list.
+        page_size (int): Number of rows fetched and printed per page.
+    """
+    pages = paginate(query, key, after=after, limit=limit, page_size=page_size)
+    for number, page in enumerate(pages):
+        table = Table(title=title if number == 0 else None)
+        for column in columns:
+            table.add_column(column)
+
+        for item in page:
+            table.add_row(*to_row(item))
+
+        print(table)
+
+
+def print_rows(title: str, query) -> None:
+    """
+    Print every row of a small column query, e.g. a report, as one table.
+
+    The column headers are taken from the labels of the query columns.
+
+    Args:
+        title (str): The title printed above the table.
+        query: The column query to print.
+    """
+    table = Table(title=title)
+    for column in query.column_descriptions:
+        table.add_column(column["name"].replace("_", " ").capitalize())
+
+    for row in query:
+        table.add_row(*("" if value is None else str(value) for value in row))
+
+    print(table)
+
+
+def _to_json(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def write_rows(
+    output_format: OutputFormat,
+    query,
+    key,
+    after: int | None = None,
+    limit: int | None = None,
+    page_size: int = PAGE_SIZE,
+) -> None:
+    """
+    Write the rows of a column query to stdout in a machine-readable format.
+
+    Rows are written as they come off the cursor, without building any Rich
+    table or ORM object.
+
+    Args:
+        output_format (OutputFormat): One of ndjson, csv or tsv.
+        query: The column query to export, ordered by `key`.
+        key: The column to paginate on.
+        after (int, optional): Only write rows whose key is greater than this.
+        limit (int, optional): Maximum number of rows to write.
+        page_size (int): Number of rows fetched from the cursor at once.
+    """
+    fields = [column["name"] for column in query.column_descriptions]
+    rows = stream_rows(query, key, after=after, limit=limit, page_size=page_size)
+    out = sys.stdout
+
+    if output_format is OutputFormat.NDJSON:
+        encoder = json.JSONEncoder(default=_to_json)
+        for row in rows:
+            out.write(encoder.encode(dict(zip(fields, row))))
+            out.write("\n")
+        return
+
+    delimiter = "\t" if output_format is OutputFormat.TSV else ","
+    writer = csv.writer(out, delimiter=delimiter, lineterminator="\n")
+    writer.writerow(fields)
+    writer.writerows(rows)
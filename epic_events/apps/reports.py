@@ -0,0 +1,94 @@
+import typer
+
+from epic_events.apps.listing import FORMAT_OPTION, OutputFormat, print_rows, write_rows
+from epic_events.auth.utils import MANAGERS, allow_users
+from epic_events.models import session
+from epic_events.models.reports import (
+    events_by_support_rep,
+    outstanding_by_company,
+    pipeline,
+    revenue_by_sales_rep,
+)
+
+app = typer.Typer()
+
+TOP_OPTION = typer.Option(None, "--top", min=1, help="Only show the first rows.")
+
+
+def show_report(title: str, query, output_format: OutputFormat, top=None) -> None:
+    """
+    Print a report as a table, or write it in a machine-readable format.
+
+    Args:
+        title (str): The title of the table.
+        query: The aggregate query of the report.
+        output_format (OutputFormat): The output format.
+        top (int, optional): Only show the first rows.
+    """
+    if top is not None:
+        query = query.limit(top)
+    if output_format is OutputFormat.TABLE:
+        print_rows(title, query)
+    else:
+        write_rows(output_format, query, None)
+
+
+@app.command("revenue")
+def revenue_report(
+    top: int | None = TOP_OPTION,
+    output_format: OutputFormat = FORMAT_OPTION,
+):
+    """
+    Show the revenue of each sales rep, from their signed contracts.
+    """
+    allow_users(MANAGERS)
+    show_report(
+        "Revenue by sales rep", revenue_by_sales_rep(session), output_format, top
+    )
+
+
+@app.command("outstanding")
+def outstanding_report(
+    top: int | None = TOP_OPTION,
+    output_format: OutputFormat = FORMAT_OPTION,
+):
+    """
+    Show the balance left to pay on signed contracts, by company.
+    """
+    allow_users(MANAGERS)
+    show_report(
+        "Outstanding balance by company",
+        outstanding_by_company(session),
+        output_format,
+        top,
+    )
+
+
+@app.command("pipeline")
+def pipeline_report(output_format: OutputFormat = FORMAT_OPTION):
+    """
+    Show the number and value of signed and unsigned contracts.
+    """
+    allow_users(MANAGERS)
+    show_report("Contract pipeline", pipeline(session), output_format)
+
+
+@app.command("events")
+def events_report(
+    year: int | None = typer.Option(
+        None, "--year", min=1, max=9998, help="Only count the events of a year."
+    ),
+    output_format: OutputFormat = FORMAT_OPTION,
+):
+    """
+    Show the events handled by each support rep, month by month.
+
+    Args:
+        year (int, optional): Only count the events starting that year.
+    """
+    allow_users(MANAGERS)
+    show_report(
+        "Events by support rep and month",
+        events_by_support_rep(session, year),
+        output_format,
+    )
@@ -0,0 +1,96 @@
+from enum import Enum
+
+import typer
+from rich import print
+from rich.table import Table
+from rich.text import Text
+
+from epic_events import telemetry
+from epic_events.auth.utils import ADMINS, ALL_AUTHENTICATED_USERS, allow_users
+from epic_events.models import session
+from epic_events.models.search import (
+    MATCH_END,
+    MATCH_START,
+    has_search_index,
+    reindex,
+    search,
+)
+
+
+class SearchKind(str, Enum):
+    COMPANY = "company"
+    CUSTOMER = "customer"
+    EVENT = "event"
+
+
+def require_search_index() -> None:
+    """
+    Raises:
+        typer.Exit: If the database has no full-text index.
+    """
+    if not has_search_index(session):
+        typer.echo(
+            "This database has no search index: it needs SQLite with FTS5 and "
+            "`just migrate`."
+        )
+        raise typer.Exit(code=1)
+
+
+def highlight(excerpt: str) -> Text:
+    """
+    Render the matches of a search excerpt in bold.
+    """
+    start, *parts = excerpt.split(MATCH_START)
+    rendered = Text(start)
+    for part in parts:
+        match, _, rest = part.partition(MATCH_END)
+        rendered.append(match, style="bold")
+        rendered.append(rest)
+    return rendered
+
+
+def search_all(
+    terms: list[str] = typer.Argument(..., help="The words to look for."),
+    kind: SearchKind | None = typer.Option(
+        None, "--kind", help="Only search companies, customers or events."
+    ),
+    limit: int = typer.Option(20, "--limit", min=1, help="Maximum hits to show."),
+):
+    """
+    Search companies, customers and events by name, and events by location
+    and notes.
+
+    Every word must match, as a prefix: `search lyon cater` finds the event in
+    Lyon with a catering note. Hits are ranked by relevance, names first.
+    """
+    allow_users(ALL_AUTHENTICATED_USERS)
+    require_search_index()
+    hits = search(session, " ".join(terms), kind.value if kind else None, limit=limit)
+    if not hits:
+        typer.echo("No match.")
+        return
+
+    table = Table(title=f"Search: {' '.join(terms)}")
+    for column in ("Kind", "Id", "Name", "Match"):
+        table.add_column(column)
+    for hit in hits:
+        table.add_row(
+            hit.kind, str(hit.id), Text(hit.name or ""), highlight(hit.excerpt)
+        )
+    print(table)
+
+
+def reindex_search():
+    """
+    Rebuild the search index from the companies, customers and events.
+
+    The index is kept up to date on every change: reindexing is only needed
+    to recover from a corrupted or missing index content.
+    """
+    allow_users(ADMINS, check_revoked=True)
+    require_search_index()
+    counts = reindex(session)
+    session.commit()
+    for kind, count in counts.items():
+        typer.echo(f"{kind}: {count} rows indexed")
+    telemetry.capture_message("REINDEXED search index.")
@@ -0,0 +1,134 @@
+import shlex
+import time
+
+import typer
+import typer.main
+
+from epic_events.auth.utils import forget_current_user, reset_current_user
+from epic_events.cli import app
+from epic_events.models import session
+
+try:
+    # Line editing and history for input(), where available.
+    import readline  # noqa: F401
+except ImportError:
+    pass
+
+PROMPT = "epic_events> "
+
+SHELL_HELP = """Shell commands:
+  help       List the CRM commands, e.g. `customers list --help`.
+  refresh    Reload the logged in user and every object read so far.
+  exit/quit  Leave the shell (or Ctrl-D).
+"""
+
+
+def refresh() -> None:
+    """
+    Drop everything the shell keeps between commands: the objects of the
+    session identity map are reloaded on next access and the logged in user is
+    resolved again from the token storage.
+    """
+    session.expire_all()
+    reset_current_user()
+
+
+def run_command(root, args: list[str]) -> int:
+    """
+    Run one CLI command in the current process, reporting its errors instead of
+    exiting.
+
+    The database transaction is ended after the command, so that the next one
+    sees the changes made by other clients. Objects already loaded are kept, see
+    `refresh`, but the current user is resolved again: a session revoked or
+    expired meanwhile stops authorizing commands.
+
+    Args:
+        root (click.Group): The root command group of the CLI.
+        args (list[str]): The command line, without the program name.
+
+    Returns:
+        int: The exit code of the command.
+    """
+    forget_current_user()
+    try:
+        result = root.main(args, prog_name="epic_events", standalone_mode=False)
+        session.commit()
+        # Without standalone mode, click returns the code of a typer.Exit or
+        # whatever the command returned.
+        return result if isinstance(result, int) else 0
+    except typer.exceptions.TyperException as e:
+        typer.echo(f"Error: {e.format_message()}", err=True)
+        exit_code = e.exit_code
+    except (typer.Abort, KeyboardInterrupt):
+        typer.echo("Aborted.", err=True)
+        exit_code = 1
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else 1
+    # Any error ends the command, never the shell.
+    except Exception as e:  # noqa: BLE001
+        typer.echo(f"Error: {e}", err=True)
+        exit_code = 1
+    session.rollback()
+    return exit_code
+
+
+def shell(
+    timing: bool = typer.Option(
+        False, "--timing", help="Print the time taken by each command."
+    ),
+) -> None:
+    """
+    Run CRM commands in a single long lived process.
+
+    Commands are typed as on the command line, without the `epic_events` prefix,
+    e.g. `customers list --limit 10`. The interpreter, imports, database engine,
+    session identity map and logged in user are kept warm between commands, so
+    each command only pays for its own queries. Use `refresh` to reload objects
+    changed by other clients.
+
+    Args:
+        timing (bool): Print the time taken by each command.
+    """
+    root = typer.main.get_command(app)
+    # Objects stay loaded when a command commits, until `refresh`.
+    session().expire_on_commit = False
+    typer.echo("Epic Events shell. Type `help` for the commands, `exit` to leave.")
+
+    while True:
+        try:
+            line = input(PROMPT)
+        except EOFError:
+            typer.echo()
+            break
+        except KeyboardInterrupt:
+            typer.echo()
+            continue
+
+        try:
+            args = shlex.split(line)
+        except ValueError as e:
+            typer.echo(f"Error: {e}", err=True)
+            continue
+        if not args:
+            continue
+
+        match args[0]:
+            case "exit" | "quit":
+                break
+            case "refresh":
+                refresh()
+                typer.echo("Session refreshed.")
+                continue
+            case "shell":
+                typer.echo("Already in the shell.")
+                continue
+            case "help":
+                typer.echo(SHELL_HELP)
+                args = ["--help"]
+
+        start = time.perf_counter()
+        run_command(root, args)
+        if timing:
+            elapsed = (time.perf_counter() - start) * 1000
+            typer.echo(f"({elapsed:.1f} ms)", err=True)
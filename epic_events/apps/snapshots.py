@@ -0,0 +1,99 @@
+import os
+import time
+from pathlib import Path
+
+import typer
+
+from epic_events import telemetry
+from epic_events.apps.importing import echo_throughput
+from epic_events.auth.utils import ADMINS, allow_users
+from epic_events.models import get_engine
+from epic_events.models.snapshots import (
+    BATCH_SIZE,
+    CHUNK_SIZE,
+    TRANSACTION_SIZE,
+    export_snapshot,
+    restore_snapshot,
+)
+
+
+def export_database(
+    path: Path = typer.Argument(..., help="The snapshot directory to create."),
+    workers: int = typer.Option(
+        os.cpu_count(), min=1, help="Processes exporting tables, on SQLite."
+    ),
+    chunk_size: int = typer.Option(
+        CHUNK_SIZE, min=1, help="Rows read per primary key chunk."
+    ),
+):
+    """
+    Export every table to a snapshot directory: one gzipped JSON lines file per
+    table and a manifest.
+
+    All the tables are read from the same state of the database, while other
+    clients keep writing to it.
+
+    Raises:
+        typer.Exit: If the directory already exists.
+    """
+    allow_users(ADMINS, check_revoked=True)
+    if path.exists():
+        typer.echo(f"{path} already exists.")
+        raise typer.Exit(code=1)
+
+    start = time.perf_counter()
+    manifest = export_snapshot(
+        get_engine(), str(path), workers=workers, chunk_size=chunk_size
+    )
+    for entry in manifest["tables"]:
+        typer.echo(f"{entry['name']}: {entry['rows']} rows")
+    rows = sum(entry["rows"] for entry in manifest["tables"])
+    echo_throughput("rows exported", rows, time.perf_counter() - start)
+    telemetry.capture_message(f"EXPORTED {rows} rows to {path.name}.")
+
+
+def restore_database(
+    path: Path = typer.Argument(
+        ..., exists=True, file_okay=False, help="The snapshot directory."
+    ),
+    replace: bool = typer.Option(
+        False,
+        "--replace",
+        help="Delete the rows of the database first, and restore in one transaction.",
+    ),
+    batch_size: int = typer.Option(BATCH_SIZE, min=1, help="Rows per INSERT."),
+    transaction_size: int = typer.Option(
+        TRANSACTION_SIZE, min=1, help="Rows per transaction, without --replace."
+    ),
+):
+    """
+    Restore a snapshot made by `export`.
+
+    The database must be empty, e.g. created with `just setup-db`, unless
+    --replace is passed, and at the same migrations as the exported one. With
+    --replace, the database is only changed if the whole snapshot is restored.
+
+    Raises:
+        typer.Exit: If the snapshot is damaged or does not fit the database.
+    """
+    # From the token claims only: the database being restored may not hold
+    # the user yet.
+    allow_users(ADMINS)
+    start = time.perf_counter()
+    try:
+        counts = restore_snapshot(
+            get_engine(),
+            str(path),
+            replace=replace,
+            batch_size=batch_size,
+            transaction_size=transaction_size,
+        )
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+
+    for table, count in counts.items():
+        typer.echo(f"{table}: {count} rows")
+    rows = sum(counts.values())
+    echo_throughput("rows restored", rows, time.perf_counter() - start)
+    telemetry.capture_message(f"RESTORED {rows} rows from {path.name}.")
@@ -1,46 +1,81 @@
-import sentry_sdk
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 import typer
 from rich import print
-from rich.table import Table
-
+from sqlalchemy.exc import IntegrityError
+
+from epic_events import telemetry
+from epic_events.apps.importing import batched, echo_throughput, read_records
+from epic_events.apps.listing import (
+    AFTER_OPTION,
+    FORMAT_OPTION,
+    LIMIT_OPTION,
+    PAGE_SIZE_OPTION,
+    OutputFormat,
+    print_pages,
+    write_rows,
+)
 from epic_events.auth.utils import (
+    ADMINS,
     ALL_AUTHENTICATED_USERS,
+    MANAGERS,
     allow_users,
-    get_current_user,
 )
 from epic_events.models import session
+from epic_events.models.queries import users_query, users_rows
 from epic_events.models.users import (
+    USER_CLASSES,
     Admin,
     Manager,
     SalesRep,
     SupportRep,
     User,
     UserType,
+    hash_password,
 )
 
 app = typer.Typer()
 
 
 @app.command("list")
-def list_users():
+def list_users(
+    limit: int | None = LIMIT_OPTION,
+    after: int | None = AFTER_OPTION,
+    page_size: int = PAGE_SIZE_OPTION,
+    output_format: OutputFormat = FORMAT_OPTION,
+):
     """
     List all users in the system.
 
-    This function retrieves all users from the database and displays them in a table format.
+    This function retrieves users from the database and displays them page by page in a table format.
     The table includes columns for the user's ID, username, email, and user type.
     """
 
-    allow_users([UserType.MANAGER])
-    users = session.query(User).all()
-    users_table = Table(title="Users")
-
-    for column in ("Id", "Username", "Email", "User type"):
-        users_table.add_column(column)
-
-    for user in users:
-        users_table.add_row(str(user.id), user.username, user.email, user.user_type)
-
-    print(users_table)
+    allow_users(MANAGERS)
+    if output_format is not OutputFormat.TABLE:
+        write_rows(
+            output_format,
+            users_rows(session),
+            User.id,
+            after=after,
+            limit=limit,
+            page_size=page_size,
+        )
+        return
+
+    print_pages(
+        "Users",
+        ("Id", "Username", "Email", "User type"),
+        users_query(session),
+        User.id,
+        lambda user: (str(user.id), user.username, user.email, user.user_type),
+        after=after,
+        limit=limit,
+        page_size=page_size,
+    )
 
 
 @app.command("create")
@@ -55,7 +90,7 @@ def create_user():
         ValueError: If an invalid user type is selected.
     """
 
-    allow_users([UserType.MANAGER])
+    allow_users(MANAGERS, check_revoked=True)
     username = typer.prompt("Username")
     password = typer.prompt("Password", hide_input=True)
     email = typer.prompt("Email")
@@ -86,10 +121,93 @@ def create_user():
     session.add(user)
     session.commit()
     message = f"CREATED {user_type.value} {user.id}: {user.username}."
-    sentry_sdk.capture_message(message)
+    telemetry.capture_message(message)
     typer.echo(message)
 
 
+@app.command("import")
+def import_users(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False),
+    batch_size: int = typer.Option(500, min=1, help="Users inserted per transaction."),
+    workers: int = typer.Option(
+        os.cpu_count(), min=1, help="Processes hashing passwords in parallel."
+    ),
+):
+    """
+    Import users from a CSV or JSONL file.
+
+    Each record needs a username, password, email and user_type. Passwords are hashed
+    across a process pool and users are inserted in batched transactions. Records whose
+    username or email already exists, in the database or earlier in the file, are skipped
+    instead of aborting the import.
+
+    Args:
+        path (Path): The CSV (with a header row) or JSONL file to import.
+        batch_size (int): The number of users inserted per transaction.
+        workers (int): The number of processes hashing passwords.
+    """
+    allow_users(MANAGERS, check_revoked=True)
+    usernames = {username for (username,) in session.query(User.username)}
+    emails = {email for (email,) in session.query(User.email)}
+    imported = skipped = invalid = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch in batched(read_records(path), batch_size):
+            records = []
+            for record in batch:
+                try:
+                    user_type = UserType(record["user_type"])
+                    username, email = record["username"], record["email"]
+                    password = record["password"]
+                except (KeyError, ValueError):
+                    invalid += 1
+                    continue
+                if username in usernames or email in emails:
+                    skipped += 1
+                    continue
+                usernames.add(username)
+                emails.add(email)
+                records.append((user_type, username, email, password))
+
+            chunksize = max(1, len(records) // (workers * 4))
+            hashes = pool.map(
+                hash_password, [record[3] for record in records], chunksize=chunksize
+            )
+            users = [
+                USER_CLASSES[user_type](
+                    username=username,
+                    email=email,
+                    user_type=user_type.value,
+                    password_hash=password_hash,
+                )
+                for (user_type, username, email, _), password_hash in zip(
+                    records, hashes
+                )
+            ]
+
+            try:
+                session.add_all(users)
+                session.commit()
+                imported += len(users)
+            except IntegrityError:
+                # Another client created one of these users meanwhile: retry
+                # them one by one so that only the conflicting ones are lost.
+                session.rollback()
+                for user in users:
+                    try:
+                        with session.begin_nested():
+                            session.add(user)
+                        imported += 1
+                    except IntegrityError:
+                        skipped += 1
+                session.commit()
+
+    echo_throughput("users imported", imported, time.perf_counter() - start)
+    typer.echo(f"{skipped} duplicates skipped, {invalid} invalid records.")
+    telemetry.capture_message(f"IMPORTED {imported} users from {path.name}.")
+
+
 @app.command("update")
 def update_user():
     """
@@ -101,10 +219,7 @@ def update_user():
         typer.Exit: If the user is not authenticated or if the user ID is not found.
 
     """
-    allow_users([ALL_AUTHENTICATED_USERS])
-    request_user = get_current_user()
-    if not request_user:
-        raise typer.Exit(code=1)
+    request_user = allow_users(ALL_AUTHENTICATED_USERS, check_revoked=True)
 
     user_id = typer.prompt("User Id")
     user = session.query(User).get(user_id)
@@ -113,7 +228,7 @@ def update_user():
         typer.echo(f"User {user_id} not found.")
         raise typer.Exit(code=1)
 
-    is_different_user = user.id != request_user.id
+    is_different_user = user.id != request_user.user_id
 
     if is_different_user and request_user.user_type != UserType.ADMIN.value:
         typer.echo("You can only update your own profile.")
@@ -123,11 +238,14 @@ def update_user():
     password = typer.prompt("Password", default=user.password, hide_input=True)
     email = typer.prompt("Email", default=user.email, type=str)
     user.username = username
-    user.set_password(password)
+    if password != user.password:
+        user.set_password(password)
+        # A new password ends the sessions opened with the old one.
+        user.token_version += 1
     user.email = email
     session.commit()
     message = f"UPDATED {user.user_type} {user.id}: {user.username}."
-    sentry_sdk.capture_message(message)
+    telemetry.capture_message(message)
     typer.echo(message)
 
 
@@ -143,7 +261,7 @@ def delete_user(user_id: int):
         typer.Exit: If the user with the given user_id is not found.
 
     """
-    allow_users([UserType.ADMIN])
+    allow_users(ADMINS, check_revoked=True)
     user = session.query(User).get(user_id)
 
     if user is None:
@@ -152,6 +270,32 @@ def delete_user(user_id: int):
 
     session.delete(user)
     session.commit()
-    message = f"DELETED {user.user_type.value} {user.id}: {user.username}."
-    sentry_sdk.capture_message(message)
+    message = f"DELETED {user.user_type} {user.id}: {user.username}."
+    telemetry.capture_message(message)
+    typer.echo(message)
+
+
+@app.command("revoke")
+def revoke_user_tokens(user_id: int):
+    """
+    Revoke every session token issued to a user, who must login again.
+
+    Args:
+        user_id (int): The ID of the user whose tokens are revoked.
+
+    Raises:
+        typer.Exit: If the user with the given user_id is not found.
+
+    """
+    allow_users(ADMINS, check_revoked=True)
+    user = session.get(User, user_id)
+
+    if user is None:
+        typer.echo(f"User {user_id} not found")
+        raise typer.Exit(code=1)
+
+    user.token_version += 1
+    session.commit()
+    message = f"REVOKED tokens of {user.user_type} {user.id}: {user.username}."
+    telemetry.capture_message(message)
     typer.echo(message)
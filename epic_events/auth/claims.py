@@ -0,0 +1,148 @@
+"""
+The claims of the session token, known without querying the database.
+
+Kept apart from epic_events.auth.utils, which needs the models, so that the
+commands reading only the claims, like `whoami`, never import SQLAlchemy or
+passlib.
+"""
+
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+import jwt
+import typer
+from rich import print
+
+from epic_events.auth.storage import NO_TOKEN_MESSAGE, storage
+from epic_events.settings import get_settings
+
+JWT_ALGORITHM = "HS256"
+REQUIRED_CLAIMS = ("user_id", "username", "user_type", "ver", "iat", "exp")
+
+
+@dataclass(frozen=True)
+class Claims:
+    """
+    The verified claims of a session token: who is logged in and with which
+    role, known without querying the database.
+
+    Attributes:
+        user_id (int): The id of the logged in user.
+        username (str): Their username.
+        user_type (str): Their `User.user_type` when the token was issued.
+        token_version (int): Their `User.token_version` when the token was issued.
+        issued_at (int): Issue time, as a UNIX timestamp.
+        expires_at (int): Expiry time, as a UNIX timestamp.
+    """
+
+    user_id: int
+    username: str
+    user_type: str
+    token_version: int
+    issued_at: int
+    expires_at: int
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "Claims":
+        return cls(
+            user_id=payload["user_id"],
+            username=payload["username"],
+            user_type=payload["user_type"],
+            token_version=payload["ver"],
+            issued_at=payload["iat"],
+            expires_at=payload["exp"],
+        )
+
+    def expires_in(self) -> float:
+        """
+        Returns:
+            float: The seconds left before the token expires.
+        """
+        return self.expires_at - time.time()
+
+
+# The claims and user resolved for the command being run, see
+# get_current_claims and get_current_user.
+_current_claims = ContextVar("current_claims", default=None)
+_current_user = ContextVar("current_user", default=None)
+
+
+def decode_jwt(message: str) -> Claims:
+    """
+    Decode and verify a JSON Web Token (JWT).
+
+    Args:
+        message (str): The JWT to decode.
+
+    Returns:
+        Claims: The verified claims.
+
+    Raises:
+        ValueError: If no token is stored, or the token is expired, invalid or
+            was issued before claims-based tokens.
+
+    """
+    if message == NO_TOKEN_MESSAGE:
+        raise ValueError("You are not authenticated. Please login.")
+    try:
+        payload = jwt.decode(
+            message,
+            get_settings().secret_key,
+            algorithms=[JWT_ALGORITHM],
+            options={"require": list(REQUIRED_CLAIMS)},
+        )
+    except jwt.ExpiredSignatureError:
+        raise ValueError("Your session has expired. Please login.")
+    except jwt.PyJWTError:
+        raise ValueError("Your session token is invalid. Please login.")
+    return Claims.from_payload(payload)
+
+
+def get_current_claims() -> Claims:
+    """
+    Retrieves the claims of the token stored in the storage.
+
+    The token fetch and JWT decode happen once per command: the claims are kept
+    for the rest of the invocation, or of the shell session, and their expiry
+    is checked again on each use.
+
+    Returns:
+        Claims: The verified claims of the current user.
+
+    Raises:
+        typer.Exit: If there is no valid token.
+    """
+    claims = _current_claims.get()
+    if claims is not None:
+        if claims.expires_in() > 0:
+            return claims
+        reset_current_user()
+        print("Your session has expired. Please login.")
+        raise typer.Exit(code=1)
+
+    token = storage.request_token()
+    try:
+        claims = decode_jwt(token)
+    except ValueError as e:
+        print(e)
+        raise typer.Exit(code=1)
+    _current_claims.set(claims)
+    return claims
+
+
+def forget_current_user() -> None:
+    """
+    Forget the user resolved by the previous command, e.g. in the shell: the
+    next command reads their row, and checks its token version, again.
+    """
+    _current_user.set(None)
+
+
+def reset_current_user() -> None:
+    """
+    Forget the claims and user resolved for the current command, e.g. after a
+    login.
+    """
+    _current_claims.set(None)
+    _current_user.set(None)
@@ -0,0 +1,306 @@
+"""
+Token storage server in pure Python, a drop-in replacement for bubble.
+
+It speaks the protocol of bubble/src/main.rs (v2 frames and legacy plain
+strings, see epic_events.auth.storage), and keeps one token per OS user, as
+reported by the kernel for each connection, which expires after a TTL.
+
+Run it in the background with `python -m epic_events.auth.server`, which is
+what TokenStorage spawns when BIN_PATH is not set, or inside a long lived
+process with `TokenServer.start_in_thread`.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import struct
+import threading
+import time
+
+from epic_events.auth.storage import (
+    FRAME_HEADER,
+    NO_TOKEN_MESSAGE,
+    OP_CLEAR,
+    OP_GET,
+    OP_PING,
+    OP_SET,
+    PROTOCOL_MAGIC,
+    STATUS_ERROR,
+    STATUS_NO_TOKEN,
+    STATUS_OK,
+)
+from epic_events.settings import get_settings
+
+MAX_FRAME_SIZE = 1 << 20
+LEGACY_MESSAGE_SIZE = 1024
+EVICTION_INTERVAL = 60.0
+
+
+def socket_answers(path: str) -> bool:
+    """
+    Returns:
+        bool: Whether a server accepts connections on a unix socket.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+def peer_uid(sock: socket.socket):
+    """
+    Get the uid of the process at the other end of a Unix socket.
+
+    Args:
+        sock (socket.socket): The connected socket.
+
+    Returns:
+        int | None: The peer uid, or None where the platform does not report it.
+    """
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    credentials = sock.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+    )
+    return struct.unpack("3i", credentials)[1]
+
+
+class TokenServer:
+    """
+    Asyncio Unix socket server storing one token per OS user.
+
+    Args:
+        socket_path (str): The socket to listen on.
+        ttl (float): Seconds after which a stored token is forgotten.
+        shared (bool): Let every local user connect, each with their own token
+            slot. By default only the user running the server can connect.
+    """
+
+    def __init__(self, socket_path: str, ttl: float, shared: bool = False):
+        self.socket_path = socket_path
+        self.ttl = ttl
+        self.shared = shared
+        # uid -> (token, expiry as a time.monotonic() value)
+        self.tokens = {}
+        self._loop = None
+        self._server = None
+
+    def get_token(self, uid):
+        token, expires_at = self.tokens.get(uid, (None, 0.0))
+        if token is not None and expires_at <= time.monotonic():
+            del self.tokens[uid]
+            return None
+        return token
+
+    def set_token(self, uid, token: str) -> None:
+        self.tokens[uid] = (token, time.monotonic() + self.ttl)
+
+    def clear_token(self, uid) -> None:
+        self.tokens.pop(uid, None)
+
+    def evict_expired(self) -> None:
+        now = time.monotonic()
+        for uid in [uid for uid, (_, expiry) in self.tokens.items() if expiry <= now]:
+            del self.tokens[uid]
+
+    def handle_request(self, uid, opcode: int, payload: bytes):
+        """
+        Run one v2 request.
+
+        Returns:
+            tuple[int, bytes]: The response status and payload.
+        """
+        if opcode == OP_GET:
+            token = self.get_token(uid)
+            if token is None:
+                return STATUS_NO_TOKEN, b""
+            return STATUS_OK, token.encode("utf-8")
+        if opcode == OP_SET:
+            try:
+                self.set_token(uid, payload.decode("utf-8"))
+            except UnicodeDecodeError:
+                return STATUS_ERROR, b"Token is not valid UTF-8"
+            return STATUS_OK, b""
+        if opcode == OP_CLEAR:
+            self.clear_token(uid)
+            return STATUS_OK, b""
+        if opcode == OP_PING:
+            return STATUS_OK, b""
+        return STATUS_ERROR, b"Unknown opcode"
+
+    async def handle_connection(self, reader, writer) -> None:
+        uid = peer_uid(writer.get_extra_info("socket"))
+        try:
+            # Read until the first bytes either are the magic or cannot be anymore.
+            received = bytearray()
+            while True:
+                chunk = await reader.read(LEGACY_MESSAGE_SIZE - len(received))
+                received += chunk
+                if (
+                    not chunk
+                    or len(received) >= len(PROTOCOL_MAGIC)
+                    or not PROTOCOL_MAGIC.startswith(received)
+                ):
+                    break
+
+            if received.startswith(PROTOCOL_MAGIC):
+                writer.write(PROTOCOL_MAGIC)
+                del received[: len(PROTOCOL_MAGIC)]
+                await self._serve_frames(uid, reader, writer, received)
+            elif received:
+                await self._serve_legacy(uid, writer, bytes(received))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # The server is shutting down with the connection still open.
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_frames(self, uid, reader, writer, pending: bytearray) -> None:
+        async def read_exactly(size: int) -> bytes:
+            if len(pending) < size:
+                pending.extend(await reader.readexactly(size - len(pending)))
+            data = bytes(pending[:size])
+            del pending[:size]
+            return data
+
+        while True:
+            try:
+                opcode, length = FRAME_HEADER.unpack(
+                    await read_exactly(FRAME_HEADER.size)
+                )
+            except asyncio.IncompleteReadError as e:
+                if e.partial:
+                    raise
+                return
+
+            if length > MAX_FRAME_SIZE:
+                while length:
+                    skipped = len(await read_exactly(min(length, LEGACY_MESSAGE_SIZE)))
+                    length -= skipped
+                status, body = STATUS_ERROR, b"Frame too large"
+            else:
+                status, body = self.handle_request(
+                    uid, opcode, await read_exactly(length)
+                )
+            writer.write(FRAME_HEADER.pack(status, len(body)) + body)
+            await writer.drain()
+
+    async def _serve_legacy(self, uid, writer, message: bytes) -> None:
+        message = message.decode("utf-8", errors="replace").strip("\0")
+        if message == "get_token":
+            response = self.get_token(uid) or NO_TOKEN_MESSAGE
+        else:
+            self.set_token(uid, message)
+            response = "Token stored"
+        writer.write(response.encode("utf-8"))
+        await writer.drain()
+
+    async def _evict_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.ttl, EVICTION_INTERVAL))
+            self.evict_expired()
+
+    async def serve(self, ready: threading.Event | None = None) -> None:
+        """
+        Listen until the server is closed.
+
+        Args:
+            ready (threading.Event, optional): Set once the socket accepts connections.
+
+        Raises:
+            RuntimeError: If another server already listens on the socket.
+        """
+        if os.path.exists(self.socket_path):
+            # Only a socket left by a server that died is replaced: removing
+            # a live one would orphan its server and lose its tokens.
+            if socket_answers(self.socket_path):
+                raise RuntimeError(
+                    f"A token server already listens on {self.socket_path}."
+                )
+            os.remove(self.socket_path)
+
+        self._loop = asyncio.get_running_loop()
+        umask = os.umask(0o111 if self.shared else 0o177)
+        try:
+            self._server = await asyncio.start_unix_server(
+                self.handle_connection, self.socket_path
+            )
+        finally:
+            os.umask(umask)
+
+        eviction = asyncio.create_task(self._evict_periodically())
+        if ready is not None:
+            ready.set()
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            eviction.cancel()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def stop(self) -> None:
+        """
+        Close the server, from any thread.
+        """
+        if self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+
+    def start_in_thread(self, timeout: float = 5.0) -> threading.Thread:
+        """
+        Run the server in a daemon thread of the current process.
+
+        Args:
+            timeout (float): Seconds to wait for the socket to accept connections.
+
+        Returns:
+            threading.Thread: The thread running the event loop.
+
+        Raises:
+            TimeoutError: If the server did not start in time.
+        """
+        ready = threading.Event()
+        thread = threading.Thread(
+            target=asyncio.run, args=(self.serve(ready),), daemon=True
+        )
+        thread.start()
+        if not ready.wait(timeout):
+            raise TimeoutError(f"Token server not ready after {timeout}s")
+        return thread
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Epic Events token server.")
+    parser.add_argument("--socket", default=settings.socket_path)
+    parser.add_argument("--ttl", type=float, default=settings.token_ttl)
+    parser.add_argument(
+        "--shared",
+        action="store_true",
+        help="Let every local user connect, each with their own token.",
+    )
+    args = parser.parse_args()
+    if not args.socket:
+        parser.error("SOCKET_PATH is not set")
+
+    server = TokenServer(os.path.expanduser(args.socket), args.ttl, args.shared)
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+    try:
+        asyncio.run(server.serve())
+    except RuntimeError as e:
+        parser.exit(1, f"{e}\n")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,243 @@
+import fcntl
 import os
+import signal
 import socket
+import struct
 import subprocess
+import sys
+import threading
+import time
 
-import psutil
-from dotenv import load_dotenv
+from epic_events.settings import get_settings
 
-load_dotenv()
+STARTUP_TIMEOUT = 2.0
+STARTUP_POLL_INTERVAL = 0.01
 
-STORAGE_PATH = os.getenv("BIN_PATH")
-STORAGE_NAME = os.getenv("STORAGE_NAME")
-SOCKET_PATH = os.getenv("SOCKET_PATH")
+# Protocol v2: the client opens a connection with PROTOCOL_MAGIC, which the
+# storage echoes back. Both sides then exchange frames made of a one byte
+# opcode (requests) or status (responses), a big-endian u32 payload length and
+# the payload. Requests may be pipelined: responses come back in order.
+# Connections that do not start with the magic use the legacy protocol, one
+# plain string message ("get_token" or a token) per connection.
+PROTOCOL_MAGIC = b"BBL2"
+FRAME_HEADER = struct.Struct("!BI")
+
+OP_GET = 1
+OP_SET = 2
+OP_CLEAR = 3
+OP_PING = 4
+
+STATUS_OK = 0
+STATUS_NO_TOKEN = 1
+STATUS_ERROR = 2
+
+NO_TOKEN_MESSAGE = "No token stored"
 
 
 class TokenStorage:
+    """
+    Client of the bubble token storage.
+
+    The storage process is only spawned when connecting to its socket fails,
+    and its pid is kept in a pidfile next to the socket so that it can be
+    stopped without scanning the process table. A lock file next to the socket
+    makes commands starting at once spawn a single storage.
+
+    Requests go through one persistent connection per process, using the
+    framed protocol v2. The connection is shared by threads, one request (or
+    pipeline) at a time, and reopened once if the storage restarted.
+    """
+
     def __init__(
         self,
-        bin_path=STORAGE_PATH,
-        socket_path=SOCKET_PATH,
+        bin_path=None,
+        socket_path=None,
+        startup_timeout=STARTUP_TIMEOUT,
     ):
-        self.socket_path = socket_path
-        process = self.get_process()
-        if process is None:
-            print("Starting storage process")
-            bin_path = os.path.expanduser(bin_path)
-            self.process = subprocess.Popen([bin_path])
-
-    @staticmethod
-    def get_process():
-        for proc in psutil.process_iter(["pid", "name"]):
-            if proc.info["name"] == STORAGE_NAME:
-                return proc
-        return None
+        settings = get_settings()
+        self.bin_path = bin_path or settings.bin_path
+        self.socket_path = socket_path or settings.socket_path
+        self.process_name = settings.storage_name
+        self.pid_path = f"{self.socket_path}.pid"
+        self.lock_path = f"{self.socket_path}.lock"
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
 
-    def connect(self):
+    def _open(self):
         sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        sock.connect(self.socket_path)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
         return sock
 
+    def start(self):
+        """
+        Spawn the storage process, detached from the current terminal.
+
+        This is the bubble binary at BIN_PATH or, when it is not set, the bundled
+        Python server of epic_events.auth.server.
+        """
+        print("Starting storage process", file=sys.stderr)
+        if self.bin_path:
+            command = [os.path.expanduser(self.bin_path)]
+        else:
+            command = [sys.executable, "-m", "epic_events.auth.server"]
+        self.process = subprocess.Popen(
+            command,
+            env={**os.environ, "SOCKET_PATH": self.socket_path},
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        with open(self.pid_path, "w") as pid_file:
+            pid_file.write(str(self.process.pid))
+
+    def connect(self):
+        """
+        Connect to the storage socket, spawning the storage if it is not running.
+
+        Returns:
+            socket.socket: The connected socket.
+
+        Raises:
+            socket.error: If the storage is still unreachable after startup_timeout.
+        """
+        try:
+            return self._open()
+        except (FileNotFoundError, ConnectionRefusedError):
+            pass
+
+        # Probe again and spawn under the lock, held until the storage is
+        # ready: the other commands starting at once then connect to it.
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                return self._open()
+            except (FileNotFoundError, ConnectionRefusedError):
+                self.start()
+
+            deadline = time.monotonic() + self.startup_timeout
+            while True:
+                try:
+                    return self._open()
+                except (FileNotFoundError, ConnectionRefusedError):
+                    if time.monotonic() >= deadline:
+                        raise ConnectionError(
+                            f"Token storage not ready after {self.startup_timeout}s"
+                        )
+                    time.sleep(STARTUP_POLL_INTERVAL)
+
+    def _connection(self):
+        if self._sock is None:
+            sock = self.connect()
+            sock.sendall(PROTOCOL_MAGIC)
+            reader = sock.makefile("rb")
+            if reader.read(len(PROTOCOL_MAGIC)) != PROTOCOL_MAGIC:
+                reader.close()
+                sock.close()
+                raise ConnectionError(
+                    "The token storage does not support protocol v2: "
+                    "log out to restart it, then log in again."
+                )
+            self._sock, self._reader = sock, reader
+        return self._sock
+
+    def _read_frame(self):
+        header = self._reader.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            raise ConnectionResetError("Token storage closed the connection")
+        status, length = FRAME_HEADER.unpack(header)
+        payload = self._reader.read(length)
+        if len(payload) < length:
+            raise ConnectionResetError("Token storage closed the connection")
+        return status, payload
+
+    def close(self):
+        """
+        Close the persistent connection, if any.
+        """
+        if self._sock is not None:
+            self._reader.close()
+            self._sock.close()
+            self._sock = self._reader = None
+
+    def pipeline(self, requests):
+        """
+        Send several requests at once and read their responses.
+
+        Args:
+            requests (list[tuple[int, bytes]]): (opcode, payload) pairs.
+
+        Returns:
+            list[tuple[int, bytes]]: The (status, payload) of each request.
+
+        Raises:
+            ConnectionError: If the storage is unreachable or speaks the legacy
+                protocol only.
+        """
+        frames = b"".join(
+            FRAME_HEADER.pack(opcode, len(payload)) + payload
+            for opcode, payload in requests
+        )
+        with self._lock:
+            for attempt in range(2):
+                sock = self._connection()
+                try:
+                    sock.sendall(frames)
+                    return [self._read_frame() for _ in requests]
+                except (BrokenPipeError, ConnectionResetError):
+                    # The storage was restarted since the last request.
+                    self.close()
+                    if attempt:
+                        raise
+
     def send_token(self, token):
-        sock = self.connect()
-        sock.sendall(token.encode("utf-8"))
-        response = sock.recv(1024)
-        print(response.decode("utf-8"))
-        sock.close()
+        ((status, payload),) = self.pipeline([(OP_SET, token.encode("utf-8"))])
+        if status != STATUS_OK:
+            raise ConnectionError(payload.decode("utf-8"))
+        print("Token stored")
 
     def request_token(self):
-        sock = self.connect()
-        sock.sendall("get_token".encode("utf-8"))
-        response = sock.recv(1024)
-        token = response.decode("utf-8")
-        sock.close()
-        return token
+        ((status, payload),) = self.pipeline([(OP_GET, b"")])
+        if status == STATUS_NO_TOKEN:
+            return NO_TOKEN_MESSAGE
+        if status != STATUS_OK:
+            raise ConnectionError(payload.decode("utf-8"))
+        return payload.decode("utf-8")
 
     def terminate(self):
-        proc = self.get_process()
-        if proc is not None:
-            proc.terminate()
+        """
+        Stop the storage process.
+
+        The pidfile written at startup is used when present. Storages started
+        outside of the CLI are looked up by name as a fallback.
+        """
+        self.close()
+        try:
+            with open(self.pid_path) as pid_file:
+                pid = int(pid_file.read())
+        except (FileNotFoundError, ValueError):
+            pid = None
+
+        if pid is None:
+            import psutil
+
+            for proc in psutil.process_iter(["pid", "name"]):
+                if proc.info["name"] == self.process_name:
+                    proc.terminate()
+            return
+
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        os.remove(self.pid_path)
+
+
+storage = TokenStorage()
@@ -1,106 +1,148 @@
-import os
+import time
 
 import jwt
 import typer
 from rich import print
 
-from epic_events.auth.storage import TokenStorage
+from epic_events.auth.claims import (  # noqa: F401
+    JWT_ALGORITHM,
+    Claims,
+    _current_claims,
+    _current_user,
+    decode_jwt,
+    forget_current_user,
+    get_current_claims,
+    reset_current_user,
+)
 from epic_events.models import session
 from epic_events.models.users import User, UserType
+from epic_events.settings import get_settings
 
-storage = TokenStorage()
 
-ALL_AUTHENTICATED_USERS = [user_type for user_type in UserType]
+def roles(*user_types: UserType) -> frozenset[str]:
+    """
+    Build a role set for allow_users. Admins are always part of it.
 
+    Args:
+        *user_types (UserType): The user types allowed besides admins.
 
-def generate_jwt(username: str) -> str:
+    Returns:
+        frozenset[str]: The allowed `User.user_type` values.
     """
-    Generates a JSON Web Token (JWT) for the given username.
+    return frozenset(user_type.value for user_type in (UserType.ADMIN, *user_types))
+
+
+ALL_AUTHENTICATED_USERS = roles(*UserType)
+ADMINS = roles()
+MANAGERS = roles(UserType.MANAGER)
+SALES_TEAM = roles(UserType.MANAGER, UserType.SALES_REP)
+
+
+def generate_jwt(user: User) -> str:
+    """
+    Generates a JSON Web Token (JWT) for the given user.
+
+    The token carries the user id, username, role and token version, and
+    expires after the `jwt_ttl` setting.
 
     Args:
-        username (str): The username for which the JWT is generated.
+        user (User): The user for which the JWT is generated.
 
     Returns:
         str: The generated JWT.
 
     """
+    issued_at = int(time.time())
     return jwt.encode(
-        {"username": username},
-        os.getenv("SECRET_KEY"),
-        algorithm="HS256",
+        {
+            "user_id": user.id,
+            "username": user.username,
+            "user_type": user.user_type,
+            "ver": user.token_version or 0,
+            "iat": issued_at,
+            "exp": issued_at + get_settings().jwt_ttl,
+        },
+        get_settings().secret_key,
+        algorithm=JWT_ALGORITHM,
     )
 
 
-def decode_jwt(message: str) -> dict:
+def check_token_version(claims: Claims, token_version) -> None:
     """
-    Decode a JSON Web Token (JWT) and return the user information.
+    Reject a token issued before the sessions of its user were revoked.
 
     Args:
-        message (str): The JWT to decode.
-
-    Returns:
-        dict: The decoded user information.
+        claims (Claims): The claims of the token.
+        token_version (int | None): The current `User.token_version`, None if
+            the user does not exist anymore.
 
     Raises:
-        ValueError: If the message is "No token stored".
-
+        typer.Exit: If the user is not found or the token was revoked.
     """
-    if message == "No token stored":
-        raise ValueError("You are not authenticated. Please login.")
-    user = jwt.decode(
-        message,
-        os.getenv("SECRET_KEY"),
-        algorithms=["HS256"],
-    )
-    return user
+    if token_version is None:
+        typer.echo("User not found")
+        raise typer.Exit(code=1)
+    if token_version != claims.token_version:
+        print("Your session has been revoked. Please login.")
+        raise typer.Exit(code=1)
 
 
 def get_current_user() -> User:
     """
-    Retrieves the current user based on the token stored in the storage.
+    Retrieves the row of the current user, for the commands that need it.
+
+    The user is loaded by the id of the token claims, once per command, and the
+    token is checked against the revocations of the user.
 
     Returns:
         The User object representing the current user.
 
     Raises:
-        ValueError: If there is an error decoding the JWT token.
-        typer.Exit: If the user is not found.
+        typer.Exit: If there is no valid token, the user is not found or the
+            token was revoked.
     """
-    token = storage.request_token()
-    try:
-        decoded = decode_jwt(token)
-    except ValueError as e:
-        print(e)
-        raise typer.Exit(code=1)
-
-    user = session.query(User).filter_by(username=decoded["username"]).first()
-    if user is None:
-        typer.echo("User not found")
-        raise typer.Exit(code=1)
+    user = _current_user.get()
+    if user is not None:
+        return user
+
+    claims = get_current_claims()
+    # The row may be in the identity map of a shell session: its token version
+    # is read again, so that a revocation is seen.
+    user = session.get(User, claims.user_id, populate_existing=True)
+    check_token_version(claims, user.token_version if user is not None else None)
+    _current_user.set(user)
     return user
 
 
-def allow_users(authorized_user_types: list[UserType]) -> None:
+def allow_users(
+    authorized_user_types: frozenset[str], check_revoked: bool = False
+) -> Claims:
     """
     Checks if the current user is authorized to access the system.
 
+    The role is read from the verified token claims: the database is not
+    queried, unless `check_revoked` is set.
+
     Args:
-        authorized_users (list[UserType]): A list of authorized user types.
+        authorized_user_types (frozenset[str]): A role set built with roles().
+        check_revoked (bool): Also reject tokens revoked since they were issued,
+            at the cost of one primary key lookup. Used by the commands changing
+            data; the others rely on the token expiry.
 
     Raises:
-        typer.Exit: If the current user is not found or not authorized.
+        typer.Exit: If there is no valid token, or the current user is not
+            authorized.
 
     Returns:
-        None
+        Claims: The claims of the current user.
     """
-    user = get_current_user()
-    if not user:
-        print("User not found")
-        raise typer.Exit(code=1)
-
-    if user.user_type == UserType.ADMIN.value:
-        return
-
-    if user.user_type not in [choice.value for choice in authorized_user_types]:
+    claims = get_current_claims()
+    if claims.user_type not in authorized_user_types:
         print("User not authorized")
         raise typer.Exit(code=1)
+    if check_revoked:
+        token_version = (
+            session.query(User.token_version).filter_by(id=claims.user_id).scalar()
+        )
+        check_token_version(claims, token_version)
+    return claims
@@ -0,0 +1,133 @@
+from importlib import import_module
+
+import typer
+import typer.main
+from typer.core import TyperCommand, TyperGroup
+
+from epic_events import telemetry
+
+# Command name -> ("module:attribute", short help). The attribute is either a
+# Typer sub-app or a plain command function. Modules are only imported when
+# their command actually runs, so `--help` never pays for SQLAlchemy, passlib,
+# jwt or the token storage.
+COMMANDS = {
+    "login": ("epic_events.apps.auth:login", "Log in and store the session token."),
+    "logout": ("epic_events.apps.auth:logout", "Log out and stop the token storage."),
+    "renew": (
+        "epic_events.apps.auth:renew",
+        "Renew the session token before it expires.",
+    ),
+    "whoami": ("epic_events.apps.auth:get_auth_user", "Show the logged in user."),
+    "error": ("epic_events.apps.auth:trigger_error", "Raise an error for Sentry."),
+    "users": ("epic_events.apps.users:app", "Manage users."),
+    "companies": ("epic_events.apps.companies:app", "Manage companies."),
+    "customers": ("epic_events.apps.customers:app", "Manage customers."),
+    "contracts": ("epic_events.apps.contracts:app", "Manage contracts."),
+    "events": ("epic_events.apps.events:app", "Manage events."),
+    "reports": ("epic_events.apps.reports:app", "Revenue and activity reports."),
+    "search": (
+        "epic_events.apps.search:search_all",
+        "Search companies, customers and events.",
+    ),
+    "reindex": ("epic_events.apps.search:reindex_search", "Rebuild the search index."),
+    "dashboard": (
+        "epic_events.apps.dashboard:app",
+        "Live counters from the summary tables.",
+    ),
+    "export": (
+        "epic_events.apps.snapshots:export_database",
+        "Export the database to a snapshot.",
+    ),
+    "restore": (
+        "epic_events.apps.snapshots:restore_database",
+        "Restore the database from a snapshot.",
+    ),
+    "shell": ("epic_events.apps.shell:shell", "Run commands in one warm process."),
+    "daemon": (
+        "epic_events.apps.daemon:app",
+        "Serve commands from a background process.",
+    ),
+}
+
+
+def load_command(name: str):
+    """
+    Import a registered command and build its click command.
+
+    Args:
+        name (str): The command name, as registered in COMMANDS.
+
+    Returns:
+        click.Command: The command, or group for Typer sub-apps.
+    """
+    path, help_text = COMMANDS[name]
+    module_name, attribute = path.split(":")
+    target = getattr(import_module(module_name), attribute)
+
+    wrapper = typer.Typer(add_completion=False)
+    wrapper.callback()(lambda: None)
+    if isinstance(target, typer.Typer):
+        wrapper.add_typer(target, name=name, help=help_text)
+    else:
+        wrapper.command(name)(target)
+
+    command = typer.main.get_command(wrapper).commands[name]
+    return telemetry.instrument_command(command, name)
+
+
+class LazyGroup(TyperGroup):
+    """
+    Root group resolving the registered commands on first use.
+
+    While the help page is rendered, commands that were not loaded yet are
+    represented by stubs carrying their registered short help.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._formatting_help = False
+
+    def list_commands(self, ctx):
+        loaded = super().list_commands(ctx)
+        return [*COMMANDS, *(name for name in loaded if name not in COMMANDS)]
+
+    def get_command(self, ctx, cmd_name):
+        command = super().get_command(ctx, cmd_name)
+        if command is not None or cmd_name not in COMMANDS:
+            return command
+
+        if self._formatting_help:
+            return TyperCommand(name=cmd_name, help=COMMANDS[cmd_name][1])
+
+        command = load_command(cmd_name)
+        self.add_command(command, cmd_name)
+        return command
+
+    def format_help(self, ctx, formatter):
+        self._formatting_help = True
+        try:
+            return super().format_help(ctx, formatter)
+        finally:
+            self._formatting_help = False
+
+
+app = typer.Typer(cls=LazyGroup)
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    debug_sql: bool = typer.Option(
+        False,
+        "--debug-sql",
+        envvar="DEBUG_SQL",
+        help="Print the SQL statements run by the command, grouped, when it ends.",
+    ),
+) -> None:
+    """
+    Epic Events CRM.
+    """
+    if debug_sql:
+        from epic_events.sql_report import recording
+
+        ctx.with_resource(recording())
@@ -0,0 +1,111 @@
+"""
+Thin client of the command daemon, see epic_events.daemon.
+
+This module is imported on every CLI invocation: it must only depend on the
+standard library.
+"""
+
+import json
+import os
+import socket
+import sys
+
+DEFAULT_DAEMON_SOCKET = "~/.epic_events.sock"
+
+# Commands always run in the calling process.
+LOCAL_COMMANDS = {"daemon", "shell"}
+
+
+def daemon_socket_path() -> str:
+    """
+    Path of the daemon socket.
+
+    Only the environment is read, not the .env file, so that the client does not
+    pay for the settings. An empty DAEMON_SOCKET disables the daemon.
+
+    Returns:
+        str: The socket path, empty when the daemon is disabled.
+    """
+    path = os.environ.get("DAEMON_SOCKET", DEFAULT_DAEMON_SOCKET)
+    return os.path.expanduser(path) if path else ""
+
+
+def is_running(socket_path: str) -> bool:
+    """
+    Check whether a daemon accepts connections on a socket.
+
+    Args:
+        socket_path (str): The daemon socket path.
+
+    Returns:
+        bool: True if a daemon is listening.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def _send(sock: socket.socket, message: dict) -> None:
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def _read_input(hidden: bool) -> str:
+    sys.stdout.flush()
+    sys.stderr.flush()
+    if hidden:
+        import getpass
+
+        try:
+            return getpass.getpass("") + "\n"
+        except EOFError:
+            return ""
+    return sys.stdin.readline()
+
+
+def run_remote(argv: list[str]):
+    """
+    Run a command in the daemon, streaming its output and input.
+
+    Args:
+        argv (list[str]): The command line, without the program name.
+
+    Returns:
+        int | None: The exit code of the command, or None when it must run in
+        this process: the daemon is disabled, not running or the command is local.
+    """
+    path = daemon_socket_path()
+    if not path or (argv and argv[0] in LOCAL_COMMANDS):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+
+    with sock, sock.makefile("rb") as replies:
+        # Relative paths in argv are resolved by the daemon against our cwd.
+        _send(
+            sock,
+            {"argv": argv, "isatty": sys.stdout.isatty(), "cwd": os.getcwd()},
+        )
+        for line in replies:
+            message = json.loads(line)
+            if "out" in message:
+                sys.stdout.write(message["out"])
+            elif "err" in message:
+                sys.stderr.write(message["err"])
+            elif "read" in message:
+                _send(sock, {"line": _read_input(message.get("hidden", False))})
+            elif "exit" in message:
+                sys.stdout.flush()
+                return message["exit"]
+
+    print("Connection to the daemon lost.", file=sys.stderr)
+    return 1
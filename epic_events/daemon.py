@@ -0,0 +1,335 @@
+"""
+Command daemon: runs the CLI commands of concurrent clients in one process.
+
+The daemon listens on a Unix socket, see epic_events.client for the thin client
+used by `python -m epic_events`. Each connection carries one command line and
+is served by its own thread, with the interpreter, imports and engine (and its
+connection pool) shared by all of them.
+
+Messages are JSON lines. The client sends {"argv": [...], "isatty": bool,
+"cwd": "..."}, then {"line": "..."} whenever the daemon asks for input. The daemon sends
+{"out": "..."} and {"err": "..."} with the command output, {"read": true,
+"hidden": bool} when the command prompts, and finally {"exit": code}.
+"""
+
+import contextvars
+import functools
+import getpass
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+
+import click
+import typer.main
+import typer.models
+
+from epic_events.apps.shell import run_command
+from epic_events.cli import COMMANDS, app, load_command
+from epic_events.client import LOCAL_COMMANDS, is_running
+from epic_events.models import session
+
+OUTPUT_BUFFER_SIZE = 64 * 1024
+
+_tty_getpass = getpass.getpass
+
+# Working directory of the client whose command runs in the current context.
+_client_cwd = contextvars.ContextVar("client_cwd", default=None)
+
+# The parameter types of click and of the Typer versions vendoring it.
+PATH_TYPES = tuple(
+    path_type
+    for path_type in (click.Path, getattr(typer.models, "TyperPath", None))
+    if path_type is not None
+)
+
+
+def _convert_client_path(convert, value, param, ctx):
+    cwd = _client_cwd.get()
+    if cwd is not None and isinstance(value, (str, os.PathLike)) and value != "-":
+        # An absolute value is kept as is by os.path.join.
+        value = os.path.join(cwd, os.fspath(value))
+    return convert(value, param, ctx)
+
+
+def resolve_client_paths(command: click.Command) -> None:
+    """
+    Make the path parameters of a command tree relative to the directory of
+    the client running the command, rather than to the daemon's.
+
+    Relative paths are joined to the client's directory before click checks
+    them, so that `exists=True` and the command itself see the same file the
+    client meant.
+
+    Args:
+        command (click.Command): The root command, or group, to patch.
+    """
+    for param in command.params:
+        if isinstance(param.type, PATH_TYPES):
+            param.type.convert = functools.partial(
+                _convert_client_path, param.type.convert
+            )
+    for subcommand in getattr(command, "commands", {}).values():
+        resolve_client_paths(subcommand)
+
+
+class ClientConnection:
+    """
+    The connection of one client, shared by the output and input streams of
+    its command.
+    """
+
+    def __init__(self, rfile, wfile, isatty: bool = False):
+        self.rfile = rfile
+        self.wfile = wfile
+        self.isatty = isatty
+
+    def send(self, message: dict) -> None:
+        self.wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+    def read_line(self, hidden: bool = False) -> str:
+        """
+        Ask the client for one line of input.
+
+        Args:
+            hidden (bool): The client must not echo the input, e.g. passwords.
+
+        Returns:
+            str: The line, with its newline, or an empty string at end of input.
+        """
+        self.send({"read": True, "hidden": hidden})
+        line = self.rfile.readline()
+        return json.loads(line)["line"] if line else ""
+
+
+class ClientOutput(io.TextIOBase):
+    """
+    Text stream sending what is written to one of the client's outputs.
+    """
+
+    def __init__(self, client: ClientConnection, key: str):
+        self.client = client
+        self.key = key
+        self._pending = []
+        self.size = 0
+
+    @property
+    def encoding(self):
+        return "utf-8"
+
+    @property
+    def errors(self):
+        return "strict"
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return self.client.isatty
+
+    def write(self, text: str) -> int:
+        if not isinstance(text, str):
+            # click probes streams with a bytes write to detect binary ones.
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        self._pending.append(text)
+        self.size += len(text)
+        if self.size >= OUTPUT_BUFFER_SIZE:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        if self._pending:
+            self.client.send({self.key: "".join(self._pending)})
+            self._pending.clear()
+            self.size = 0
+
+
+class ClientInput(io.TextIOBase):
+    """
+    Text stream reading lines from the client, on demand.
+    """
+
+    def __init__(self, client: ClientConnection, outputs):
+        self.client = client
+        self.outputs = outputs
+
+    @property
+    def encoding(self):
+        return "utf-8"
+
+    def readable(self):
+        return True
+
+    def isatty(self):
+        return self.client.isatty
+
+    def readline(self, size=-1, hidden: bool = False) -> str:
+        # Prompts must reach the client before it is asked for the answer.
+        for output in self.outputs:
+            output.flush()
+        return self.client.read_line(hidden)
+
+
+class ThreadLocalStream:
+    """
+    Stand-in for sys.stdout, sys.stderr or sys.stdin, forwarding to the stream
+    bound to the current thread or to the original one.
+    """
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def bind(self, stream) -> None:
+        self._local.stream = stream
+
+    def unbind(self) -> None:
+        self._local.stream = None
+
+    def __getattr__(self, name):
+        return getattr(getattr(self._local, "stream", None) or self._default, name)
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    """
+    Run the command line sent by one client.
+    """
+
+    def handle(self):
+        if not self.server.is_allowed(self.request):
+            return
+        line = self.rfile.readline()
+        if not line:
+            return
+        request = json.loads(line)
+        client = ClientConnection(self.rfile, self.wfile, request.get("isatty", False))
+        # Each command starts from an empty context: the current user of the
+        # previous command served by this thread is not reused.
+        exit_code = contextvars.Context().run(
+            self.server.run, client, request["argv"], request.get("cwd")
+        )
+        client.send({"exit": exit_code})
+
+
+class CommandServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server running the CLI commands, one thread per client.
+
+    Only processes of the user running the daemon may connect: the socket is
+    created without group or other permissions and, where the platform reports
+    it, the uid of each client is checked.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.root = typer.main.get_command(app)
+        for name in COMMANDS:
+            if name not in LOCAL_COMMANDS:
+                self.root.add_command(load_command(name), name)
+        resolve_client_paths(self.root)
+
+        self.stdout = sys.stdout = ThreadLocalStream(sys.stdout)
+        self.stderr = sys.stderr = ThreadLocalStream(sys.stderr)
+        self.stdin = sys.stdin = ThreadLocalStream(sys.stdin)
+        getpass.getpass = self.getpass
+
+        umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, CommandHandler)
+        finally:
+            os.umask(umask)
+
+    def is_allowed(self, sock: socket.socket) -> bool:
+        if not hasattr(socket, "SO_PEERCRED"):
+            return True
+        credentials = sock.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+        )
+        _, uid, _ = struct.unpack("3i", credentials)
+        return uid == os.getuid()
+
+    def getpass(self, prompt: str = "Password: ", stream=None) -> str:
+        """
+        getpass.getpass for the commands: reads from the client, without echo.
+        """
+        client_input = getattr(self.stdin._local, "stream", None)
+        if client_input is None:
+            return _tty_getpass(prompt, stream)
+        self.stderr.write(prompt)
+        return client_input.readline(hidden=True).rstrip("\n")
+
+    def run(self, client: ClientConnection, argv: list[str], cwd=None) -> int:
+        """
+        Run one command with the client as its standard streams.
+
+        Args:
+            client (ClientConnection): The client that sent the command.
+            argv (list[str]): The command line, without the program name.
+            cwd (str, optional): The working directory of the client, that
+                relative path parameters are resolved against.
+
+        Returns:
+            int: The exit code of the command.
+        """
+        _client_cwd.set(cwd)
+        stdout = ClientOutput(client, "out")
+        stderr = ClientOutput(client, "err")
+        self.stdout.bind(stdout)
+        self.stderr.bind(stderr)
+        self.stdin.bind(ClientInput(client, (stdout, stderr)))
+        try:
+            if argv and argv[0] in LOCAL_COMMANDS:
+                typer.echo(f"`{argv[0]}` cannot run in the daemon.", err=True)
+                return 1
+            return run_command(self.root, argv)
+        finally:
+            stdout.flush()
+            stderr.flush()
+            self.stdout.unbind()
+            self.stderr.unbind()
+            self.stdin.unbind()
+            # Return the connection to the shared pool.
+            session.remove()
+
+
+def serve(socket_path: str) -> None:
+    """
+    Serve commands on a socket until SIGTERM or SIGINT.
+
+    A pidfile is written next to the socket, and both are removed on exit.
+
+    Args:
+        socket_path (str): The socket to listen on.
+
+    Raises:
+        RuntimeError: If another daemon already listens on the socket.
+    """
+    if is_running(socket_path):
+        raise RuntimeError(f"A daemon is already listening on {socket_path}")
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    pid_path = f"{socket_path}.pid"
+    server = CommandServer(socket_path)
+    with open(pid_path, "w") as pid_file:
+        pid_file.write(str(os.getpid()))
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for path in (socket_path, pid_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
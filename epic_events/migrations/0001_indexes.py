@@ -0,0 +1,27 @@
+"""
+Index the foreign keys and filter columns used by the list commands.
+"""
+
+from sqlalchemy import Index, MetaData, Table
+
+# (index name, table, columns)
+INDEXES = (
+    ("ix_customer_sales_rep_id", "customer", ("sales_rep_id",)),
+    ("ix_customer_company_id", "customer", ("company_id",)),
+    ("ix_event_support_rep_id", "event", ("support_rep_id",)),
+    ("ix_event_start_date", "event", ("start_date",)),
+    ("ix_contract_signed", "contract", ("signed",)),
+    ("ix_user_time_updated", "user", ("time_updated",)),
+    ("ix_company_time_updated", "company", ("time_updated",)),
+    ("ix_customer_time_updated", "customer", ("time_updated",)),
+    ("ix_contract_time_updated", "contract", ("time_updated",)),
+    ("ix_event_time_updated", "event", ("time_updated",)),
+)
+
+
+def upgrade(connection):
+    metadata = MetaData()
+    for name, table_name, columns in INDEXES:
+        table = Table(table_name, metadata, autoload_with=connection)
+        index = Index(name, *(table.c[column] for column in columns))
+        index.create(connection, checkfirst=True)
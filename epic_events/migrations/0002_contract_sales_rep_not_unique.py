@@ -0,0 +1,67 @@
+"""
+Allow a sales rep to hold several contracts.
+
+`contract.sales_rep_id` was declared unique, limiting every sales rep to a
+single contract. The constraint is replaced by a plain index. SQLite cannot
+drop a constraint, so the table is rebuilt there.
+"""
+
+from sqlalchemy import Index, MetaData, Table, inspect, text
+
+CONTRACT_SQLITE = """
+CREATE TABLE _contract_new (
+    id INTEGER NOT NULL,
+    signed BOOLEAN,
+    value NUMERIC(10, 2) NOT NULL,
+    amount_due NUMERIC(10, 2) NOT NULL,
+    customer_id INTEGER,
+    sales_rep_id INTEGER,
+    time_created DATETIME DEFAULT CURRENT_TIMESTAMP,
+    time_updated DATETIME,
+    PRIMARY KEY (id),
+    UNIQUE (customer_id),
+    FOREIGN KEY(customer_id) REFERENCES customer (id),
+    FOREIGN KEY(sales_rep_id) REFERENCES sales_rep (id)
+)
+"""
+CONTRACT_COLUMNS = (
+    "id, signed, value, amount_due, customer_id, sales_rep_id, "
+    "time_created, time_updated"
+)
+
+
+def upgrade(connection):
+    inspector = inspect(connection)
+    constraint = next(
+        (
+            constraint
+            for constraint in inspector.get_unique_constraints("contract")
+            if constraint["column_names"] == ["sales_rep_id"]
+        ),
+        None,
+    )
+
+    if constraint is not None and connection.dialect.name == "sqlite":
+        indexes = inspector.get_indexes("contract")
+        connection.execute(text(CONTRACT_SQLITE))
+        connection.execute(
+            text(
+                f"INSERT INTO _contract_new ({CONTRACT_COLUMNS}) "
+                f"SELECT {CONTRACT_COLUMNS} FROM contract"
+            )
+        )
+        connection.execute(text("DROP TABLE contract"))
+        connection.execute(text("ALTER TABLE _contract_new RENAME TO contract"))
+        table = Table("contract", MetaData(), autoload_with=connection)
+        for index in indexes:
+            columns = (table.c[column] for column in index["column_names"])
+            Index(index["name"], *columns, unique=index["unique"]).create(connection)
+    elif constraint is not None:
+        connection.execute(
+            text(f'ALTER TABLE contract DROP CONSTRAINT "{constraint["name"]}"')
+        )
+
+    table = Table("contract", MetaData(), autoload_with=connection)
+    Index("ix_contract_sales_rep_id", table.c.sales_rep_id).create(
+        connection, checkfirst=True
+    )
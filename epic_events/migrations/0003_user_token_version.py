@@ -0,0 +1,18 @@
+"""
+Add `user.token_version`, checked against the version carried by session
+tokens to revoke them.
+"""
+
+from sqlalchemy import inspect, text
+
+
+def upgrade(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("user")}
+    if "token_version" not in columns:
+        table = connection.dialect.identifier_preparer.quote("user")
+        connection.execute(
+            text(
+                f"ALTER TABLE {table} "
+                "ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"
+            )
+        )
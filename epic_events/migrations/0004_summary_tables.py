@@ -0,0 +1,182 @@
+"""
+Summary tables for the dashboard, kept up to date by triggers.
+
+- customer_balance: contracts and outstanding amount (amount due on signed
+  contracts) of every customer.
+- sales_rep_balance: the same per sales rep of the contracts.
+- support_rep_open_events: events per support rep and end day, open events
+  being those ending today or later (or without an end date).
+
+Each insert, update and delete of a contract, customer or event adjusts the
+rows of the groups it belongs to. The triggers are only created on SQLite: on
+other databases the tables must be refreshed with `dashboard rebuild`, which
+the migration warns about, as the dashboard does.
+Migrations rebuilding one of the source tables must create its triggers again.
+"""
+
+import warnings
+
+from sqlalchemy import text
+
+# Must stay equal to epic_events.models.summaries.OPEN_END_DAY, which reads and
+# rebuilds the rows these triggers write.
+OPEN_END_DAY = "9999-12-31"
+
+TABLES = (
+    """
+    CREATE TABLE IF NOT EXISTS customer_balance (
+        customer_id INTEGER NOT NULL PRIMARY KEY,
+        contracts INTEGER NOT NULL DEFAULT 0,
+        outstanding NUMERIC(12, 2) NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sales_rep_balance (
+        sales_rep_id INTEGER NOT NULL PRIMARY KEY,
+        contracts INTEGER NOT NULL DEFAULT 0,
+        outstanding NUMERIC(12, 2) NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS support_rep_open_events (
+        support_rep_id INTEGER NOT NULL,
+        end_day VARCHAR(10) NOT NULL,
+        events INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (support_rep_id, end_day)
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_customer_balance_outstanding
+    ON customer_balance (outstanding)
+    """,
+)
+
+# Statements adding (sign 1) or removing (sign -1) the contract or event
+# in the NEW or OLD row to its groups.
+CONTRACT_TO_CUSTOMER = """
+    UPDATE customer_balance SET
+        contracts = contracts + {sign},
+        outstanding = round(outstanding + {sign} *
+            CASE WHEN {row}.signed THEN {row}.amount_due ELSE 0 END, 2)
+    WHERE customer_id = {row}.customer_id;
+"""
+CONTRACT_TO_SALES_REP = """
+    INSERT INTO sales_rep_balance (sales_rep_id, contracts, outstanding)
+    SELECT {row}.sales_rep_id, {sign},
+        {sign} * CASE WHEN {row}.signed THEN {row}.amount_due ELSE 0 END
+    WHERE {row}.sales_rep_id IS NOT NULL
+    ON CONFLICT (sales_rep_id) DO UPDATE SET
+        contracts = contracts + excluded.contracts,
+        outstanding = round(outstanding + excluded.outstanding, 2);
+"""
+EVENT_TO_SUPPORT_REP = f"""
+    INSERT INTO support_rep_open_events (support_rep_id, end_day, events)
+    SELECT {{row}}.support_rep_id,
+        coalesce(date({{row}}.end_date), '{OPEN_END_DAY}'), {{sign}}
+    WHERE {{row}}.support_rep_id IS NOT NULL
+    ON CONFLICT (support_rep_id, end_day) DO UPDATE SET
+        events = events + excluded.events;
+"""
+DELETE_EMPTY_SALES_REPS = "DELETE FROM sales_rep_balance WHERE contracts = 0;"
+DELETE_EMPTY_DAYS = "DELETE FROM support_rep_open_events WHERE events = 0;"
+
+
+def _contract(row, sign):
+    return "".join(
+        statement.format(row=row, sign=sign)
+        for statement in (CONTRACT_TO_CUSTOMER, CONTRACT_TO_SALES_REP)
+    )
+
+
+def _event(row, sign):
+    return EVENT_TO_SUPPORT_REP.format(row=row, sign=sign)
+
+
+# (name, event, statements)
+TRIGGERS = (
+    (
+        "customer_summary_insert",
+        "AFTER INSERT ON customer",
+        "INSERT INTO customer_balance (customer_id, contracts, outstanding) "
+        "SELECT NEW.id, count(id), coalesce(round(sum(CASE WHEN signed "
+        "THEN amount_due ELSE 0 END), 2), 0) "
+        "FROM contract WHERE customer_id = NEW.id "
+        "ON CONFLICT (customer_id) DO NOTHING;",
+    ),
+    (
+        "customer_summary_delete",
+        "AFTER DELETE ON customer",
+        "DELETE FROM customer_balance WHERE customer_id = OLD.id;",
+    ),
+    ("contract_summary_insert", "AFTER INSERT ON contract", _contract("NEW", 1)),
+    (
+        "contract_summary_delete",
+        "AFTER DELETE ON contract",
+        _contract("OLD", -1) + DELETE_EMPTY_SALES_REPS,
+    ),
+    (
+        "contract_summary_update",
+        "AFTER UPDATE OF signed, amount_due, customer_id, sales_rep_id ON contract",
+        _contract("OLD", -1) + _contract("NEW", 1) + DELETE_EMPTY_SALES_REPS,
+    ),
+    ("event_summary_insert", "AFTER INSERT ON event", _event("NEW", 1)),
+    (
+        "event_summary_delete",
+        "AFTER DELETE ON event",
+        _event("OLD", -1) + DELETE_EMPTY_DAYS,
+    ),
+    (
+        "event_summary_update",
+        "AFTER UPDATE OF support_rep_id, end_date ON event",
+        _event("OLD", -1) + _event("NEW", 1) + DELETE_EMPTY_DAYS,
+    ),
+)
+
+POPULATE = (
+    "DELETE FROM customer_balance",
+    "DELETE FROM sales_rep_balance",
+    "DELETE FROM support_rep_open_events",
+    """
+    INSERT INTO customer_balance (customer_id, contracts, outstanding)
+    SELECT customer.id, count(contract.id), coalesce(round(sum(
+        CASE WHEN contract.signed THEN contract.amount_due ELSE 0 END), 2), 0)
+    FROM customer LEFT JOIN contract ON contract.customer_id = customer.id
+    GROUP BY customer.id
+    """,
+    """
+    INSERT INTO sales_rep_balance (sales_rep_id, contracts, outstanding)
+    SELECT sales_rep_id, count(id),
+        round(sum(CASE WHEN signed THEN amount_due ELSE 0 END), 2)
+    FROM contract WHERE sales_rep_id IS NOT NULL
+    GROUP BY sales_rep_id
+    """,
+    f"""
+    INSERT INTO support_rep_open_events (support_rep_id, end_day, events)
+    SELECT support_rep_id, coalesce(date(end_date), '{OPEN_END_DAY}'), count(id)
+    FROM event WHERE support_rep_id IS NOT NULL
+    GROUP BY 1, 2
+    """,
+)
+
+
+def upgrade(connection):
+    for statement in TABLES:
+        connection.execute(text(statement))
+    if connection.dialect.name != "sqlite":
+        warnings.warn(
+            f"The summary tables are not maintained on {connection.dialect.name}: "
+            "the dashboard shows their state as of the last `dashboard rebuild`. "
+            "Run it now, and after every change to contracts, customers or events "
+            "that the dashboard must reflect.",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+        return
+
+    for name, event, statements in TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        connection.execute(
+            text(f"CREATE TRIGGER {name} {event} FOR EACH ROW BEGIN {statements} END")
+        )
+    for statement in POPULATE:
+        connection.execute(text(statement))
@@ -0,0 +1,21 @@
+"""
+Partial indexes behind the `contracts list --unsigned` and `--unpaid` filters.
+
+Both index the contract ids of the matching rows only, in the order of the
+keyset pagination, so that each page is read from the index instead of
+scanning the contracts.
+"""
+
+from sqlalchemy import Index, MetaData, Table
+
+
+def upgrade(connection):
+    table = Table("contract", MetaData(), autoload_with=connection)
+    unsigned = table.c.signed.is_not(True)
+    unpaid = table.c.amount_due > 0
+    for name, where in (
+        ("ix_contract_unsigned", unsigned),
+        ("ix_contract_unpaid", unpaid),
+    ):
+        index = Index(name, table.c.id, sqlite_where=where, postgresql_where=where)
+        index.create(connection, checkfirst=True)
@@ -0,0 +1,93 @@
+"""
+Full-text index of the companies, customers and events, for `search`.
+
+One FTS5 table holds a row per company, customer and event, with the rowid
+`id * 4 + kind` so that the triggers keeping it in sync replace a row with a
+primary key lookup. Only created on SQLite builds with FTS5.
+"""
+
+from sqlalchemy import text
+
+# kind -> (code of the rowid, source table, indexed columns). Migrations do not
+# import the application modules, which change after them: SOURCES is copied in
+# epic_events.models.search, whose reindex rebuilds the rows these triggers
+# write, with the statements of populate. Both must stay in sync.
+SOURCES = {
+    "company": (1, "company", ("name",)),
+    "customer": (2, "customer", ("name",)),
+    "event": (3, "event", ("name", "location", "notes")),
+}
+
+CREATE_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    kind UNINDEXED,
+    name,
+    location,
+    notes,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+# Names weigh more than locations, locations more than notes.
+RANK = (
+    "INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25(0, 10, 4, 1)')"
+)
+
+
+def _insert(kind, row):
+    code, _, columns = SOURCES[kind]
+    values = ", ".join(f"{row}.{column}" for column in columns)
+    return (
+        f"INSERT INTO search_index (rowid, kind, {', '.join(columns)}) "
+        f"VALUES ({row}.id * 4 + {code}, '{kind}', {values});"
+    )
+
+
+def _delete(kind, row):
+    code = SOURCES[kind][0]
+    return f"DELETE FROM search_index WHERE rowid = {row}.id * 4 + {code};"
+
+
+def triggers():
+    """
+    Yields:
+        tuple[str, str, str]: The name, event and statements of each trigger.
+    """
+    for kind, (_, table, columns) in SOURCES.items():
+        yield f"{table}_search_insert", f"AFTER INSERT ON {table}", _insert(kind, "NEW")
+        yield (
+            f"{table}_search_update",
+            f"AFTER UPDATE OF {', '.join(columns)} ON {table}",
+            _delete(kind, "OLD") + _insert(kind, "NEW"),
+        )
+        yield f"{table}_search_delete", f"AFTER DELETE ON {table}", _delete(kind, "OLD")
+
+
+def populate(connection):
+    connection.execute(text("DELETE FROM search_index"))
+    for kind, (code, table, columns) in SOURCES.items():
+        connection.execute(
+            text(
+                f"INSERT INTO search_index (rowid, kind, {', '.join(columns)}) "
+                f"SELECT id * 4 + {code}, '{kind}', {', '.join(columns)} FROM {table}"
+            )
+        )
+
+
+def upgrade(connection):
+    if connection.dialect.name != "sqlite":
+        return
+    has_fts5 = connection.execute(
+        text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+    ).scalar()
+    if not has_fts5:
+        return
+
+    connection.execute(text(CREATE_TABLE))
+    connection.execute(text(RANK))
+    for name, event, statements in triggers():
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        connection.execute(
+            text(f"CREATE TRIGGER {name} {event} FOR EACH ROW BEGIN {statements} END")
+        )
+    populate(connection)
@@ -0,0 +1,23 @@
+"""
+Index the events by support rep and dates, for the schedule and the conflict
+checks.
+
+The index covers the overlap conditions, so that they are evaluated on the
+index entries of one support rep, and replaces the index on support_rep_id
+alone, which is one of its prefixes.
+"""
+
+from sqlalchemy import Index, MetaData, Table
+
+
+def upgrade(connection):
+    table = Table("event", MetaData(), autoload_with=connection)
+    Index(
+        "ix_event_support_rep_schedule",
+        table.c.support_rep_id,
+        table.c.start_date,
+        table.c.end_date,
+    ).create(connection, checkfirst=True)
+    Index("ix_event_support_rep_id", table.c.support_rep_id).drop(
+        connection, checkfirst=True
+    )
@@ -0,0 +1,26 @@
+"""
+Index the empty rows of the summary tables, for the triggers deleting them.
+
+After each contract or event deleted or updated, the triggers of 0004 delete
+the summary rows left at zero. Without an index each of those deletes scans
+its whole table, so that deleting many rows, as `restore --replace` does, took
+a time quadratic in their number. A partial index holds only the rows at zero,
+which the triggers delete at once: it stays empty and costs nothing to keep.
+"""
+
+from sqlalchemy import text
+
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_sales_rep_balance_empty "
+    "ON sales_rep_balance (contracts) WHERE contracts = 0",
+    "CREATE INDEX IF NOT EXISTS ix_support_rep_open_events_empty "
+    "ON support_rep_open_events (events) WHERE events = 0",
+)
+
+
+def upgrade(connection):
+    # The triggers are only created on SQLite.
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in INDEXES:
+        connection.execute(text(statement))
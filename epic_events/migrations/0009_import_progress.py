@@ -0,0 +1,10 @@
+"""
+Add the `import_progress` table, where resumable imports save how far they
+went in the transaction of each batch.
+"""
+
+from epic_events.models.imports import import_progress
+
+
+def upgrade(connection):
+    import_progress.create(connection, checkfirst=True)
@@ -0,0 +1,76 @@
+"""
+Versioned, in-place schema migrations.
+
+Each migration is a module of this package named `<4 digit version>_<name>`,
+exposing an `upgrade(connection)` function. Applied versions are recorded in
+the `schema_version` table, and every migration runs in its own transaction.
+
+Migrations must be idempotent: a database created from the current models
+with `Base.metadata.create_all` is brought up to date by simply running all of
+them.
+"""
+
+import pkgutil
+import re
+from importlib import import_module
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, select
+
+metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    metadata,
+    Column("version", String(64), primary_key=True),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def available_migrations() -> list[str]:
+    """
+    List the migration modules of this package, oldest first.
+
+    Returns:
+        list[str]: The migration versions, e.g. ["0001_indexes"].
+    """
+    return sorted(
+        module.name
+        for module in pkgutil.iter_modules(__path__)
+        if re.match(r"\d{4}_", module.name)
+    )
+
+
+def applied_migrations(connection) -> set[str]:
+    """
+    Read the versions already applied to a database.
+
+    Args:
+        connection: An open SQLAlchemy connection.
+
+    Returns:
+        set[str]: The applied versions.
+    """
+    schema_version.create(connection, checkfirst=True)
+    return set(connection.scalars(select(schema_version.c.version)))
+
+
+def upgrade(engine) -> list[str]:
+    """
+    Apply every pending migration, each in its own transaction.
+
+    Args:
+        engine: The SQLAlchemy engine of the database to upgrade.
+
+    Returns:
+        list[str]: The versions applied by this call.
+    """
+    with engine.begin() as connection:
+        applied = applied_migrations(connection)
+
+    pending = [version for version in available_migrations() if version not in applied]
+    for version in pending:
+        migration = import_module(f"{__name__}.{version}")
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(schema_version.insert().values(version=version))
+    return pending
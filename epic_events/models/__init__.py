@@ -1,20 +1,158 @@
-import os
+from dataclasses import dataclass, field
+from functools import cache
 
 import sqlalchemy
-from dotenv import load_dotenv
+from sqlalchemy import event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
 
-load_dotenv()
-DB_PATH = os.getenv("DB_PATH")
+from epic_events import sql_report, telemetry
+from epic_events.settings import get_settings
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """
+    Connection settings for one kind of workload.
+
+    Attributes:
+        sqlite_pragmas (dict): PRAGMAs run on every new SQLite connection.
+        pool (dict): Pool arguments for `create_engine` on server backends.
+        readonly (bool): Reject writes at the connection level.
+    """
+
+    sqlite_pragmas: dict = field(default_factory=dict)
+    pool: dict = field(default_factory=dict)
+    readonly: bool = False
+
+
+ENGINE_PROFILES = {
+    # CLI commands: durable enough for an application crash, and waits for a
+    # concurrent writer instead of failing with "database is locked".
+    "interactive": EngineProfile(
+        sqlite_pragmas={
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "cache_size": -16_000,
+            "mmap_size": 64 * 2**20,
+            "temp_store": "MEMORY",
+        },
+        pool={"pool_size": 5, "max_overflow": 5, "pool_pre_ping": True},
+    ),
+    # Imports and maintenance jobs: few, long lived connections with a large
+    # page cache, and a long wait on locks held by other clients.
+    "batch": EngineProfile(
+        sqlite_pragmas={
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 60_000,
+            "cache_size": -256_000,
+            "mmap_size": 1024 * 2**20,
+            "temp_store": "MEMORY",
+        },
+        pool={"pool_size": 2, "max_overflow": 0, "pool_recycle": 3600},
+    ),
+    # Listings and exports: reads served from the memory map, and no write
+    # can go through by mistake. The journal mode is left to the writers.
+    "readonly": EngineProfile(
+        sqlite_pragmas={
+            "query_only": "ON",
+            "busy_timeout": 5000,
+            "cache_size": -64_000,
+            "mmap_size": 1024 * 2**20,
+            "temp_store": "MEMORY",
+        },
+        pool={"pool_size": 10, "max_overflow": 10, "pool_pre_ping": True},
+        readonly=True,
+    ),
+}
+
+READONLY_STATEMENTS = {
+    "postgresql": "SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY",
+    "mysql": "SET SESSION TRANSACTION READ ONLY",
+}
+
+
+def create_engine(url: str, profile: str = "interactive") -> sqlalchemy.engine.Engine:
+    """
+    Create an engine tuned with one of the ENGINE_PROFILES.
+
+    SQLite connections get the profile's PRAGMAs when they are opened, other
+    backends get its pool sizing and, for read-only profiles, a read-only session.
+
+    Args:
+        url (str): The database URL.
+        profile (str): The name of the profile.
+
+    Returns:
+        sqlalchemy.engine.Engine: The configured engine.
+
+    Raises:
+        ValueError: If the profile does not exist.
+    """
+    try:
+        settings = ENGINE_PROFILES[profile]
+    except KeyError:
+        raise ValueError(
+            f"Unknown engine profile {profile!r}, "
+            f"expected one of {', '.join(ENGINE_PROFILES)}"
+        ) from None
+
+    backend = sqlalchemy.engine.make_url(url).get_backend_name()
+    if backend == "sqlite":
+        engine = sqlalchemy.create_engine(url)
+        statements = [
+            f"PRAGMA {name} = {value}"
+            for name, value in settings.sqlite_pragmas.items()
+        ]
+    else:
+        engine = sqlalchemy.create_engine(url, **settings.pool)
+        statements = []
+        if settings.readonly and backend in READONLY_STATEMENTS:
+            statements.append(READONLY_STATEMENTS[backend])
+
+    if statements:
+
+        @event.listens_for(engine, "connect")
+        def configure_connection(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.close()
+            # Session settings made in a rolled back transaction are lost.
+            dbapi_connection.commit()
+
+    return engine
+
+
+@cache
+def get_engine() -> sqlalchemy.engine.Engine:
+    """
+    Create the application engine from the settings, on first use.
+
+    Returns:
+        sqlalchemy.engine.Engine: The engine for DB_PATH with the DB_PROFILE profile.
+
+    Raises:
+        ValueError: If DB_PATH is not set or DB_PROFILE is unknown.
+    """
+    settings = get_settings()
+    if not settings.db_path:
+        raise ValueError("DB_PATH is not set.")
+    engine = create_engine(settings.db_path, settings.db_profile)
+    telemetry.instrument_engine(engine)
+    sql_report.instrument_engine(engine)
+    return engine
 
-engine = sqlalchemy.create_engine(DB_PATH)
 
 Base = declarative_base()
 
-Base.metadata.create_all(engine)
-Session = sessionmaker(bind=engine)
-session = Session()
+Session = sessionmaker()
+
+# Session of the current thread. It is only opened, along with the engine, the
+# first time a command touches the database.
+session = scoped_session(lambda: Session(bind=get_engine()))
 
 from epic_events.models.companies import Company  # noqa F401
 from epic_events.models.contracts import Contract  # noqa F401
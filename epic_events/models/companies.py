@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import Column, DateTime, Integer, String, insert
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -11,7 +11,7 @@ class Company(Base):
     name = Column(String(255), nullable=False, unique=True)
     customers = relationship("Customer", back_populates="company")
     time_created = Column(DateTime(timezone=True), server_default=func.now())
-    time_updated = Column(DateTime(timezone=True), onupdate=func.now())
+    time_updated = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
 
 
 def get_or_create_company(conn, company_name):
@@ -21,3 +21,50 @@ def get_or_create_company(conn, company_name):
         conn.add(company)
         conn.commit()
     return company
+
+
+def insert_ignoring_conflicts(conn, model):
+    """
+    Build an INSERT that skips rows conflicting with a unique constraint.
+
+    Args:
+        conn: The SQLAlchemy session the statement will run on.
+        model: The mapped class to insert into.
+
+    Returns:
+        Insert: An `INSERT ... ON CONFLICT DO NOTHING` on SQLite and PostgreSQL,
+        a plain INSERT on other backends.
+    """
+    dialect = conn.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(model)
+    return dialect_insert(model).on_conflict_do_nothing()
+
+
+def get_or_create_companies(conn, company_names):
+    """
+    Bulk version of get_or_create_company, without committing.
+
+    Missing companies are inserted in a single statement, then the ids of all
+    the given names are read back in a single SELECT.
+
+    Args:
+        conn: The SQLAlchemy session to use.
+        company_names (set[str]): The company names to resolve.
+
+    Returns:
+        dict[str, int]: The company id of each name.
+    """
+    if not company_names:
+        return {}
+    conn.execute(
+        insert_ignoring_conflicts(conn, Company),
+        [{"name": name} for name in company_names],
+    )
+    return dict(
+        conn.query(Company.name, Company.id).filter(Company.name.in_(company_names))
+    )
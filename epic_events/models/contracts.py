@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, Numeric
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, Numeric
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -8,7 +8,7 @@ from epic_events.models import Base
 class Contract(Base):
     __tablename__ = "contract"
     id = Column(Integer, primary_key=True)
-    signed = Column(Boolean, default=False)
+    signed = Column(Boolean, default=False, index=True)
     value = Column(Numeric(precision=10, scale=2), nullable=False)
     amount_due = Column(Numeric(precision=10, scale=2), nullable=False)
 
@@ -16,9 +16,25 @@ class Contract(Base):
     customer = relationship("Customer", back_populates="contract")
 
     sales_rep = relationship("SalesRep", back_populates="contracts")
-    sales_rep_id = Column(Integer, ForeignKey("sales_rep.id"), unique=True)
+    sales_rep_id = Column(Integer, ForeignKey("sales_rep.id"), index=True)
 
-    event = relationship("Event", back_populates="contract")
+    event = relationship("Event", back_populates="contract", uselist=False)
 
     time_created = Column(DateTime(timezone=True), server_default=func.now())
-    time_updated = Column(DateTime(timezone=True), onupdate=func.now())
+    time_updated = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
+
+    # Partial indexes of the `contracts list --unsigned` and `--unpaid` filters.
+    __table_args__ = (
+        Index(
+            "ix_contract_unsigned",
+            "id",
+            sqlite_where=signed.is_not(True),
+            postgresql_where=signed.is_not(True),
+        ),
+        Index(
+            "ix_contract_unpaid",
+            "id",
+            sqlite_where=amount_due > 0,
+            postgresql_where=amount_due > 0,
+        ),
+    )
@@ -10,16 +10,16 @@ class Customer(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
 
-    company_id = Column(Integer, ForeignKey("company.id"))
+    company_id = Column(Integer, ForeignKey("company.id"), index=True)
     company = relationship("Company", back_populates="customers")
 
     contract = relationship("Contract", back_populates="customer")
 
-    sales_rep_id = Column(Integer, ForeignKey("sales_rep.id"))
+    sales_rep_id = Column(Integer, ForeignKey("sales_rep.id"), index=True)
     sales_rep = relationship("SalesRep", back_populates="customers")
 
     time_created = Column(DateTime(timezone=True), server_default=func.now())
-    time_updated = Column(DateTime(timezone=True), onupdate=func.now())
+    time_updated = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
 
     def __repr__(self):
         return f"Customer(name={self.name}, company={self.company}, sales_rep_id={self.sales_rep.id})"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -10,7 +10,7 @@ class Event(Base):
 
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
-    start_date = Column(DateTime)
+    start_date = Column(DateTime, index=True)
     end_date = Column(DateTime)
     attendees = Column(Integer)
     location = Column(String(255))
@@ -25,4 +25,10 @@ class Event(Base):
     support_rep = relationship("SupportRep", back_populates="events")
 
     time_created = Column(DateTime(timezone=True), server_default=func.now())
-    time_updated = Column(DateTime(timezone=True), onupdate=func.now())
+    time_updated = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
+
+    __table_args__ = (
+        Index(
+            "ix_event_support_rep_schedule", "support_rep_id", "start_date", "end_date"
+        ),
+    )
@@ -0,0 +1,113 @@
+"""
+Progress of the resumable imports.
+
+The number of records of a file already imported is saved in the transaction
+committing them, so that it can never disagree with the rows in the database.
+The size and modification time of the file are saved with it: an import only
+resumes on the same file.
+
+Like `schema_version`, the table is bookkeeping rather than part of the models,
+and is left out of `Base.metadata` and so of the snapshots.
+"""
+
+from pathlib import Path
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    delete,
+    func,
+    insert,
+    select,
+    update,
+)
+
+metadata = MetaData()
+
+import_progress = Table(
+    "import_progress",
+    metadata,
+    Column("path", String(1024), primary_key=True),
+    Column("size", BigInteger, nullable=False),
+    Column("mtime_ns", BigInteger, nullable=False),
+    Column("records", Integer, nullable=False),
+    Column(
+        "time_updated",
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    ),
+)
+
+
+def file_fingerprint(path: Path) -> dict:
+    """
+    Returns:
+        dict: The size and modification time of a file, as saved with its
+        progress.
+    """
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_progress(conn, path: Path) -> dict | None:
+    """
+    Read the progress of an interrupted import.
+
+    Args:
+        conn: The SQLAlchemy session or connection to query with.
+        path (Path): The imported file.
+
+    Returns:
+        dict | None: The saved size, mtime_ns and records of the file, None if
+        no import of it was interrupted.
+    """
+    row = conn.execute(
+        select(
+            import_progress.c.size,
+            import_progress.c.mtime_ns,
+            import_progress.c.records,
+        ).where(import_progress.c.path == str(path.resolve()))
+    ).first()
+    return None if row is None else dict(row._mapping)
+
+
+def save_progress(conn, path: Path, fingerprint: dict, records: int) -> None:
+    """
+    Save the number of records of a file imported so far, in the current
+    transaction.
+
+    Args:
+        conn: The SQLAlchemy session or connection to write with.
+        path (Path): The imported file.
+        fingerprint (dict): The file_fingerprint of the file.
+        records (int): The number of records already imported.
+    """
+    key = str(path.resolve())
+    updated = conn.execute(
+        update(import_progress)
+        .where(import_progress.c.path == key)
+        .values(records=records, **fingerprint)
+    ).rowcount
+    if not updated:
+        conn.execute(
+            insert(import_progress).values(path=key, records=records, **fingerprint)
+        )
+
+
+def clear_progress(conn, path: Path) -> None:
+    """
+    Forget the progress of a file, in the current transaction.
+
+    Args:
+        conn: The SQLAlchemy session or connection to write with.
+        path (Path): The imported file.
+    """
+    conn.execute(
+        delete(import_progress).where(import_progress.c.path == str(path.resolve()))
+    )
@@ -0,0 +1,365 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import aliased, joinedload, selectinload
+
+from epic_events.models.companies import Company
+from epic_events.models.contracts import Contract
+from epic_events.models.customers import Customer
+from epic_events.models.events import Event
+from epic_events.models.users import User
+
+PAGE_SIZE = 500
+
+
+def companies_query(conn):
+    """
+    Build the query behind `companies list`.
+
+    Customers are loaded with a single extra SELECT ... IN statement, so the
+    listing always runs two statements whatever the number of companies.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: The companies query, ordered by id.
+    """
+    return (
+        conn.query(Company)
+        .options(selectinload(Company.customers))
+        .order_by(Company.id)
+    )
+
+
+def customers_query(conn):
+    """
+    Build the query behind `customers list`.
+
+    Company and sales rep are joined in the same statement.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: The customers query, ordered by id.
+    """
+    return (
+        conn.query(Customer)
+        .options(
+            joinedload(Customer.company),
+            joinedload(Customer.sales_rep),
+        )
+        .order_by(Customer.id)
+    )
+
+
+def contracts_query(conn):
+    """
+    Build the query behind `contracts list`.
+
+    Customer, customer's company, sales rep and event are joined in the same
+    statement.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: The contracts query, ordered by id.
+    """
+    return (
+        conn.query(Contract)
+        .options(
+            joinedload(Contract.customer).joinedload(Customer.company),
+            joinedload(Contract.sales_rep),
+            joinedload(Contract.event),
+        )
+        .order_by(Contract.id)
+    )
+
+
+def events_query(conn):
+    """
+    Build the query behind `events list`.
+
+    Contract and support rep are joined in the same statement.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: The events query, ordered by id.
+    """
+    return (
+        conn.query(Event)
+        .options(
+            joinedload(Event.contract),
+            joinedload(Event.support_rep),
+        )
+        .order_by(Event.id)
+    )
+
+
+def users_query(conn):
+    """
+    Build the query behind `users list`.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: The users query, ordered by id.
+    """
+    return conn.query(User).order_by(User.id)
+
+
+def companies_rows(conn):
+    """
+    Build the column query behind `companies list --format`.
+
+    Customer names are aggregated in the database, one row per company.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: A query of plain rows, ordered by company id.
+    """
+    return (
+        conn.query(
+            Company.id,
+            Company.name,
+            func.aggregate_strings(Customer.name, ", ").label("customers"),
+        )
+        .outerjoin(Company.customers)
+        .group_by(Company.id, Company.name)
+        .order_by(Company.id)
+    )
+
+
+def customers_rows(conn):
+    """
+    Build the column query behind `customers list --format`.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: A query of plain rows, ordered by customer id.
+    """
+    sales_rep = aliased(User)
+    return (
+        conn.query(
+            Customer.id,
+            Customer.name,
+            Company.name.label("company"),
+            sales_rep.username.label("sales_rep"),
+            Customer.time_created,
+            Customer.time_updated,
+        )
+        .outerjoin(Company, Customer.company_id == Company.id)
+        .outerjoin(sales_rep, Customer.sales_rep_id == sales_rep.id)
+        .order_by(Customer.id)
+    )
+
+
+def contracts_rows(conn):
+    """
+    Build the column query behind `contracts list --format`.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: A query of plain rows, ordered by contract id.
+    """
+    sales_rep = aliased(User)
+    return (
+        conn.query(
+            Contract.id,
+            Company.name.label("company"),
+            Customer.name.label("customer"),
+            Contract.value,
+            Contract.amount_due,
+            sales_rep.username.label("sales_rep"),
+            Event.name.label("event"),
+            Contract.signed,
+            Contract.time_created,
+            Contract.time_updated,
+        )
+        .outerjoin(Customer, Contract.customer_id == Customer.id)
+        .outerjoin(Company, Customer.company_id == Company.id)
+        .outerjoin(sales_rep, Contract.sales_rep_id == sales_rep.id)
+        .outerjoin(Event, Event.contract_id == Contract.id)
+        .order_by(Contract.id)
+    )
+
+
+def events_rows(conn):
+    """
+    Build the column query behind `events list --format`.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: A query of plain rows, ordered by event id.
+    """
+    support_rep = aliased(User)
+    return (
+        conn.query(
+            Event.id,
+            Event.name,
+            Event.start_date,
+            Event.end_date,
+            Event.attendees,
+            Event.location,
+            Event.notes,
+            Event.contract_id.label("contract"),
+            support_rep.username.label("support_rep"),
+            Event.time_created,
+            Event.time_updated,
+        )
+        .outerjoin(support_rep, Event.support_rep_id == support_rep.id)
+        .order_by(Event.id)
+    )
+
+
+def users_rows(conn):
+    """
+    Build the column query behind `users list --format`.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: A query of plain rows, ordered by user id.
+    """
+    return conn.query(User.id, User.username, User.email, User.user_type).order_by(
+        User.id
+    )
+
+
+def contract_filters(sales_rep_id=None, unsigned=False, unpaid=False) -> list:
+    """
+    Build the WHERE criteria of the `contracts list` filters.
+
+    Args:
+        sales_rep_id (int, optional): Only the contracts of this sales rep.
+        unsigned (bool): Only the contracts not signed yet.
+        unpaid (bool): Only the contracts with an amount due.
+
+    Returns:
+        list: The criteria, to pass to `Query.filter`.
+    """
+    criteria = []
+    if sales_rep_id is not None:
+        criteria.append(Contract.sales_rep_id == sales_rep_id)
+    if unsigned:
+        criteria.append(Contract.signed.is_not(True))
+    if unpaid:
+        criteria.append(Contract.amount_due > 0)
+    return criteria
+
+
+def customer_filters(sales_rep_id=None, unassigned=False) -> list:
+    """
+    Build the WHERE criteria of the `customers list` filters.
+
+    Args:
+        sales_rep_id (int, optional): Only the customers of this sales rep.
+        unassigned (bool): Only the customers without a sales rep.
+
+    Returns:
+        list: The criteria, to pass to `Query.filter`.
+    """
+    criteria = []
+    if sales_rep_id is not None:
+        criteria.append(Customer.sales_rep_id == sales_rep_id)
+    if unassigned:
+        criteria.append(Customer.sales_rep_id.is_(None))
+    return criteria
+
+
+def event_filters(support_rep_id=None, unassigned=False, start=None, end=None) -> list:
+    """
+    Build the WHERE criteria of the `events list` filters.
+
+    Args:
+        support_rep_id (int, optional): Only the events of this support rep.
+        unassigned (bool): Only the events without a support rep.
+        start (datetime, optional): Only the events starting this day or later.
+        end (datetime, optional): Only the events starting this day or earlier.
+
+    Returns:
+        list: The criteria, to pass to `Query.filter`.
+    """
+    criteria = []
+    if support_rep_id is not None:
+        criteria.append(Event.support_rep_id == support_rep_id)
+    if unassigned:
+        criteria.append(Event.support_rep_id.is_(None))
+    if start is not None:
+        criteria.append(
+            Event.start_date >= datetime.combine(start, datetime.min.time())
+        )
+    if end is not None:
+        end_day = datetime.combine(end, datetime.min.time()) + timedelta(days=1)
+        criteria.append(Event.start_date < end_day)
+    return criteria
+
+
+def paginate(query, key, after=None, limit=None, page_size=PAGE_SIZE):
+    """
+    Stream the rows of a query page by page using keyset pagination.
+
+    Each page is fetched with its own `WHERE key > last_key LIMIT page_size`
+    statement, so memory and time-to-first-row stay constant whatever the
+    table size. The query must be ordered by `key`.
+
+    Args:
+        query: The query to paginate, ordered by `key`.
+        key: The unique, ordered column to paginate on (usually the id).
+        after: Only yield rows whose key is strictly greater than this value.
+        limit: Maximum number of rows to yield, all rows if None.
+        page_size: Number of rows fetched per statement.
+
+    Yields:
+        list: The rows of each page.
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        page_query = query if after is None else query.filter(key > after)
+        page = page_query.limit(size).all()
+        if not page:
+            return
+
+        yield page
+
+        if len(page) < size:
+            return
+        after = getattr(page[-1], key.key)
+        if remaining is not None:
+            remaining -= len(page)
+
+
+def stream_rows(query, key, after=None, limit=None, page_size=PAGE_SIZE):
+    """
+    Stream the rows of a column query straight off a single cursor.
+
+    Args:
+        query: The column query to stream, ordered by `key`.
+        key: The column `after` applies to.
+        after: Only yield rows whose key is strictly greater than this value.
+        limit: Maximum number of rows to yield, all rows if None.
+        page_size: Number of rows buffered per fetch.
+
+    Returns:
+        Iterator: The result rows, fetched `page_size` at a time.
+    """
+    if after is not None:
+        query = query.filter(key > after)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.yield_per(page_size)
@@ -0,0 +1,176 @@
+"""
+Aggregate queries behind the `reports` commands.
+
+Every report is computed by the database with GROUP BY and window functions:
+only one row per group comes back, whatever the number of contracts or events.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import case, func, literal
+from sqlalchemy.orm import aliased
+
+from epic_events.models.companies import Company
+from epic_events.models.contracts import Contract
+from epic_events.models.customers import Customer
+from epic_events.models.events import Event
+from epic_events.models.users import User
+
+UNASSIGNED = "(unassigned)"
+
+
+def _share(amount, total):
+    # Percentage of a total, NULL instead of a division by zero.
+    return func.round(100.0 * amount / func.nullif(total, 0), 1)
+
+
+def month_of(conn, column):
+    """
+    Build the `YYYY-MM` month of a date column, for the dialect of a session.
+
+    Args:
+        conn: The SQLAlchemy session the query will run on.
+        column: The date or datetime column.
+
+    Returns:
+        ColumnElement: The month expression.
+    """
+    dialect = conn.get_bind().dialect.name
+    if dialect == "postgresql":
+        return func.to_char(column, "YYYY-MM")
+    if dialect in ("mysql", "mariadb"):
+        return func.date_format(column, "%Y-%m")
+    return func.strftime("%Y-%m", column)
+
+
+def revenue_by_sales_rep(conn):
+    """
+    Build the revenue report: signed contract value per sales rep.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: One row per sales rep, best first, with their contract count,
+        revenue, collected and outstanding amounts, share of the total revenue
+        and rank.
+    """
+    sales_rep = aliased(User)
+    revenue = func.sum(case((Contract.signed, Contract.value), else_=0))
+    outstanding = func.sum(case((Contract.signed, Contract.amount_due), else_=0))
+    return (
+        conn.query(
+            func.coalesce(sales_rep.username, UNASSIGNED).label("sales_rep"),
+            func.count(Contract.id).label("contracts"),
+            func.sum(case((Contract.signed, 1), else_=0)).label("signed"),
+            revenue.label("revenue"),
+            (revenue - outstanding).label("collected"),
+            outstanding.label("outstanding"),
+            _share(revenue, func.sum(revenue).over()).label("share"),
+            func.rank().over(order_by=revenue.desc()).label("rank"),
+        )
+        .select_from(Contract)
+        .outerjoin(sales_rep, Contract.sales_rep_id == sales_rep.id)
+        .group_by(sales_rep.id, sales_rep.username)
+        .order_by(revenue.desc(), sales_rep.username)
+    )
+
+
+def outstanding_by_company(conn):
+    """
+    Build the outstanding balance report: amount due on signed contracts per
+    company.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: One row per company with a balance, largest first, with its
+        contract count, balance, running total and share of the total balance.
+    """
+    balance = func.sum(Contract.amount_due)
+    return (
+        conn.query(
+            func.coalesce(Company.name, UNASSIGNED).label("company"),
+            func.count(Contract.id).label("contracts"),
+            balance.label("outstanding"),
+            func.sum(balance)
+            .over(order_by=(balance.desc(), Company.name), rows=(None, 0))
+            .label("running_total"),
+            _share(balance, func.sum(balance).over()).label("share"),
+        )
+        .select_from(Contract)
+        .join(Customer, Contract.customer_id == Customer.id)
+        .outerjoin(Company, Customer.company_id == Company.id)
+        .filter(Contract.signed.is_(True), Contract.amount_due > 0)
+        .group_by(Company.id, Company.name)
+        .order_by(balance.desc(), Company.name)
+    )
+
+
+def pipeline(conn):
+    """
+    Build the pipeline report: contracts and value, signed versus unsigned.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: One row per status with its contract count, value, amount due,
+        average value and share of the total value.
+    """
+    signed = func.coalesce(Contract.signed, False)
+    value = func.sum(Contract.value)
+    return (
+        conn.query(
+            case((signed, literal("signed")), else_=literal("unsigned")).label(
+                "status"
+            ),
+            func.count(Contract.id).label("contracts"),
+            value.label("value"),
+            func.sum(Contract.amount_due).label("amount_due"),
+            func.round(func.avg(Contract.value), 2).label("average_value"),
+            _share(value, func.sum(value).over()).label("share"),
+        )
+        .group_by(signed)
+        .order_by(signed.desc())
+    )
+
+
+def events_by_support_rep(conn, year=None):
+    """
+    Build the workload report: events per support rep and month.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+        year (int, optional): Only count the events starting that year.
+
+    Returns:
+        Query: One row per support rep and month, with the event count,
+        attendees, and the support rep's running event count.
+    """
+    support_rep = aliased(User)
+    month = month_of(conn, Event.start_date)
+    events = func.count(Event.id)
+    query = (
+        conn.query(
+            func.coalesce(support_rep.username, UNASSIGNED).label("support_rep"),
+            month.label("month"),
+            events.label("events"),
+            func.coalesce(func.sum(Event.attendees), 0).label("attendees"),
+            func.sum(events)
+            .over(partition_by=support_rep.id, order_by=month)
+            .label("running_events"),
+        )
+        .select_from(Event)
+        .outerjoin(support_rep, Event.support_rep_id == support_rep.id)
+        .filter(Event.start_date.is_not(None))
+    )
+    if year is not None:
+        query = query.filter(
+            Event.start_date >= datetime(year, 1, 1),
+            Event.start_date < datetime(year + 1, 1, 1),
+        )
+    return query.group_by(support_rep.id, support_rep.username, month).order_by(
+        support_rep.username, month
+    )
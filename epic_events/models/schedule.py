@@ -0,0 +1,184 @@
+"""
+Support rep schedules and double bookings.
+
+Events are treated as closed intervals of days: an event ending the day
+another starts overlaps it, and an event without an end date lasts its start
+day. Every query runs on the index over (support_rep_id, start_date, end_date),
+on the range of start dates bounded by the longest event before the first day.
+"""
+
+import heapq
+import math
+from collections import namedtuple
+from datetime import timedelta
+
+from sqlalchemy import extract, func
+
+from epic_events.models.events import Event
+
+Conflict = namedtuple("Conflict", "support_rep_id first second start end")
+
+# End of an event, an event without end date lasting its start day.
+EVENT_END = func.coalesce(Event.end_date, Event.start_date)
+
+
+def duration_days(conn):
+    """
+    Build the duration of an event in days, for the dialect of a session.
+
+    Args:
+        conn: The SQLAlchemy session the query will run on.
+
+    Returns:
+        ColumnElement | None: The duration expression, None if the dialect
+        has none.
+    """
+    dialect = conn.get_bind().dialect.name
+    if dialect == "sqlite":
+        return func.julianday(EVENT_END) - func.julianday(Event.start_date)
+    if dialect == "postgresql":
+        return extract("epoch", EVENT_END - Event.start_date) / 86400
+    return None
+
+
+def longest_event(conn, support_rep_id: int | None = None) -> timedelta | None:
+    """
+    Read the duration of the longest event, in whole days.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+        support_rep_id (int, optional): Only read the events of a support rep,
+            on its entries of the schedule index.
+
+    Returns:
+        timedelta | None: The duration rounded up, None if there is no event or
+        the dialect cannot compute it.
+    """
+    duration = duration_days(conn)
+    if duration is None:
+        return None
+    query = conn.query(func.max(duration)).filter(Event.start_date.is_not(None))
+    if support_rep_id is not None:
+        query = query.filter(Event.support_rep_id == support_rep_id)
+    days = query.scalar()
+    return None if days is None else timedelta(days=math.ceil(days))
+
+
+def overlapping(support_rep_id: int, start, end, longest=None) -> list:
+    """
+    Build the WHERE criteria of the events of a support rep overlapping dates.
+
+    Args:
+        support_rep_id (int): The support rep.
+        start (datetime): The first day of the range.
+        end (datetime): The last day of the range.
+        longest (timedelta, optional): The longest_event of the support rep.
+
+    Returns:
+        list: The criteria, to pass to `Query.filter`.
+    """
+    criteria = [
+        Event.support_rep_id == support_rep_id,
+        Event.start_date <= end,
+        EVENT_END >= start,
+    ]
+    if longest is not None:
+        # Redundant with the end condition, but it bounds the range of the
+        # index scan.
+        criteria.append(Event.start_date >= start - longest)
+    return criteria
+
+
+def schedule_query(conn, support_rep_id: int, start, end):
+    """
+    Build the query of the events of a support rep between two days.
+
+    The longest event of the support rep is read first, to bound the scan.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+        support_rep_id (int): The support rep.
+        start (datetime): The first day of the schedule.
+        end (datetime): The last day of the schedule.
+
+    Returns:
+        Query: The events overlapping the range, in chronological order.
+    """
+    return (
+        conn.query(Event)
+        .filter(
+            *overlapping(
+                support_rep_id, start, end, longest_event(conn, support_rep_id)
+            )
+        )
+        .order_by(Event.start_date, Event.end_date, Event.id)
+    )
+
+
+def conflicting_events(conn, event: Event) -> list[Event]:
+    """
+    Find the other events booking the support rep of an event at its dates.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+        event (Event): The event to check, saved or not.
+
+    Returns:
+        list[Event]: The overlapping events, in chronological order. Empty if
+        the event has no support rep or start date.
+    """
+    if event.support_rep_id is None or event.start_date is None:
+        return []
+    query = schedule_query(
+        conn, event.support_rep_id, event.start_date, event.end_date or event.start_date
+    )
+    if event.id is not None:
+        query = query.filter(Event.id != event.id)
+    # Saving the event being checked now would run the conflict query on it.
+    with conn.no_autoflush:
+        return query.all()
+
+
+def find_conflicts(conn, start=None):
+    """
+    Find every pair of overlapping events of a support rep.
+
+    The events are read in one pass in index order, by support rep then start
+    date, and swept keeping the events still running: each event is only
+    compared with the events it overlaps.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+        start (datetime, optional): Ignore the events ended before this day.
+
+    Yields:
+        Conflict: The support rep, the ids of both events, in start order, and
+        the first and last overlapping days.
+    """
+    query = (
+        conn.query(Event.support_rep_id, Event.id, Event.start_date, EVENT_END)
+        .filter(Event.support_rep_id.is_not(None), Event.start_date.is_not(None))
+        .order_by(Event.support_rep_id, Event.start_date)
+    )
+    if start is not None:
+        query = query.filter(EVENT_END >= start)
+        longest = longest_event(conn)
+        if longest is not None:
+            query = query.filter(Event.start_date >= start - longest)
+
+    current_rep = None
+    running = []  # heap of (end, id) of the events overlapping the sweep line
+    for support_rep_id, event_id, event_start, event_end in query.yield_per(1000):
+        if support_rep_id != current_rep:
+            current_rep, running = support_rep_id, []
+        while running and running[0][0] < event_start:
+            heapq.heappop(running)
+        for other_end, other_id in sorted(running, key=lambda item: item[1]):
+            yield Conflict(
+                support_rep_id,
+                other_id,
+                event_id,
+                event_start,
+                min(other_end, event_end),
+            )
+        heapq.heappush(running, (event_end, event_id))
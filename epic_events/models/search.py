@@ -0,0 +1,119 @@
+"""
+Full-text search over the companies, customers and events.
+
+The FTS5 table `search_index` and the triggers keeping it in sync are created
+by the migration 0006_search_index. Each row is one company, customer or
+event, with the rowid `id * 4 + kind code`.
+"""
+
+import re
+
+from sqlalchemy import inspect, text
+
+# kind -> (code of the rowid, source table, indexed columns). Copy of SOURCES
+# in the migration 0006_search_index, whose triggers write the rows that
+# reindex rebuilds: both must stay in sync.
+SOURCES = {
+    "company": (1, "company", ("name",)),
+    "customer": (2, "customer", ("name",)),
+    "event": (3, "event", ("name", "location", "notes")),
+}
+
+# Markers around the matches in the excerpts, see search.
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+SEARCH = """
+SELECT kind, rowid / 4 AS id, name,
+    snippet(search_index, -1, :match_start, :match_end, '...', 10) AS excerpt
+FROM search_index
+WHERE search_index MATCH :query {kind_filter}
+ORDER BY rank
+LIMIT :limit
+"""
+
+
+def has_search_index(conn) -> bool:
+    """
+    Check whether the database has the full-text index.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        bool: False on databases without FTS5, e.g. other than SQLite.
+    """
+    return inspect(conn.get_bind()).has_table("search_index")
+
+
+def match_query(terms: str) -> str:
+    """
+    Turn free text into an FTS5 query matching every word, as a prefix.
+
+    Quoting the words keeps FTS5 operators and punctuation typed by the user
+    from being parsed as query syntax.
+
+    Args:
+        terms (str): The words to look for, e.g. "lyon cater".
+
+    Returns:
+        str: The FTS5 query, e.g. '"lyon"* "cater"*', empty without words.
+    """
+    words = re.findall(r"\w+", terms)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search(conn, terms: str, kind=None, limit: int = 20):
+    """
+    Find the companies, customers and events matching some words, best first.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+        terms (str): The words to look for.
+        kind (str, optional): Only return this kind of rows, a key of SOURCES.
+        limit (int): Maximum number of hits.
+
+    Returns:
+        list: (kind, id, name, excerpt) rows, the matches in the excerpt
+        between MATCH_START and MATCH_END.
+    """
+    query = match_query(terms)
+    if not query:
+        return []
+    kind_filter = "AND kind = :kind" if kind is not None else ""
+    statement = text(SEARCH.format(kind_filter=kind_filter))
+    parameters = {
+        "query": query,
+        "limit": limit,
+        "match_start": MATCH_START,
+        "match_end": MATCH_END,
+    }
+    if kind is not None:
+        parameters["kind"] = kind
+    return conn.execute(statement, parameters).all()
+
+
+def reindex(conn) -> dict[str, int]:
+    """
+    Rebuild the full-text index from the source tables, without committing.
+
+    Same statements as `populate` in the migration 0006_search_index.
+
+    Args:
+        conn: The SQLAlchemy session to use.
+
+    Returns:
+        dict[str, int]: The number of rows indexed of each kind.
+    """
+    conn.execute(text("DELETE FROM search_index"))
+    counts = {}
+    for kind, (code, table, columns) in SOURCES.items():
+        result = conn.execute(
+            text(
+                f"INSERT INTO search_index (rowid, kind, {', '.join(columns)}) "
+                f"SELECT id * 4 + {code}, '{kind}', {', '.join(columns)} FROM {table}"
+            )
+        )
+        counts[kind] = result.rowcount
+    conn.execute(text("INSERT INTO search_index (search_index) VALUES ('optimize')"))
+    return counts
@@ -0,0 +1,466 @@
+"""
+Streaming snapshots of the whole database, for `export` and `restore`.
+
+A snapshot is a directory holding one gzipped file per table, with the column
+values of one row per line as a JSON array, and a `manifest.json` listing the
+tables with their columns, row count and checksum, and the migrations applied
+to the database. The manifest is written last: a directory without one is an
+export that did not complete.
+
+Tables are read in primary key chunks and written in batches, so that memory
+does not grow with their size. On SQLite the tables are shared between worker
+processes, encoding rows being CPU bound, all reading the same snapshot of the
+database: as no table is read before that snapshot, their foreign keys do not
+constrain the order. Other backends export them one after the other in a
+single REPEATABLE READ transaction.
+"""
+
+import gzip
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import UTC, date, datetime
+from decimal import Decimal
+
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Float,
+    Numeric,
+    delete,
+    func,
+    insert,
+    select,
+    text,
+)
+
+from epic_events.migrations import applied_migrations
+from epic_events.models import Base, create_engine
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+CHUNK_SIZE = 5000
+BATCH_SIZE = 5000
+TRANSACTION_SIZE = 100_000
+# Lower levels compress much faster, and only slightly worse.
+COMPRESS_LEVEL = 3
+
+
+def snapshot_tables() -> list:
+    """
+    Returns:
+        list[Table]: The tables of the models, parents before children.
+    """
+    return list(Base.metadata.sorted_tables)
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _parser(column):
+    """The function turning a JSON value back into the column's Python type."""
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat
+    if isinstance(column.type, Date):
+        return date.fromisoformat
+    if isinstance(column.type, Numeric) and not isinstance(column.type, Float):
+        return Decimal
+    return None
+
+
+def _file_name(table) -> str:
+    return f"{table.name}.ndjson.gz"
+
+
+def begin_read(engine):
+    """
+    Open a connection in a read transaction, its snapshot already taken.
+
+    Args:
+        engine: The SQLAlchemy engine of the database.
+
+    Returns:
+        Connection: A connection reading the database as it is now, until it
+        is closed.
+    """
+    if engine.dialect.name == "sqlite":
+        connection = engine.connect()
+        connection.exec_driver_sql("BEGIN")
+    else:
+        connection = engine.connect().execution_options(
+            isolation_level="REPEATABLE READ"
+        )
+    # The snapshot is taken by the first read of the transaction.
+    applied_migrations(connection)
+    return connection
+
+
+def share_tables(connection, tables: list, workers: int) -> list[list]:
+    """
+    Share tables between workers, the largest first to the least loaded.
+
+    Args:
+        connection: The SQLAlchemy connection to count the rows with.
+        tables (list[Table]): The tables to export.
+        workers (int): The number of workers.
+
+    Returns:
+        list[list[Table]]: The tables of each worker, none empty.
+    """
+    sizes = {
+        table.name: connection.scalar(select(func.count()).select_from(table))
+        for table in tables
+    }
+    groups = [[] for _ in range(min(workers, len(tables)))]
+    loads = [0] * len(groups)
+    for table in sorted(tables, key=lambda table: -sizes[table.name]):
+        least = loads.index(min(loads))
+        groups[least].append(table)
+        loads[least] += sizes[table.name]
+    return groups
+
+
+# Queue on which the export workers tell that their snapshot is taken.
+_started = None
+
+
+def _init_export_worker(started) -> None:
+    global _started
+    _started = started
+
+
+def _export_tables(url: str, names: list[str], directory: str, chunk_size: int):
+    """Export some tables in a worker process, from a single read transaction."""
+    engine = create_engine(url, profile="readonly")
+    try:
+        with begin_read(engine) as connection:
+            _started.put(os.getpid())
+            return [
+                export_table(
+                    connection, Base.metadata.tables[name], directory, chunk_size
+                )
+                for name in names
+            ]
+    finally:
+        engine.dispose()
+
+
+def _wait_started(started, futures) -> None:
+    """Wait for a worker to take its snapshot, or raise the error of one."""
+    while True:
+        try:
+            started.get(timeout=0.1)
+            return
+        except queue.Empty:
+            for future in futures:
+                if future.done():
+                    future.result()
+
+
+def export_table(connection, table, directory: str, chunk_size: int) -> dict:
+    """
+    Write the rows of a table to its snapshot file, in primary key chunks.
+
+    Args:
+        connection: The SQLAlchemy connection to read with.
+        table (Table): The table to export.
+        directory (str): The snapshot directory.
+        chunk_size (int): The number of rows read per statement.
+
+    Returns:
+        dict: The manifest entry of the table.
+    """
+    (key,) = table.primary_key.columns
+    columns = [column.name for column in table.columns]
+    key_index = columns.index(key.name)
+    encoder = json.JSONEncoder(default=_to_json, separators=(",", ":"))
+    digest = hashlib.sha256()
+    rows = 0
+    last = None
+
+    path = os.path.join(directory, _file_name(table))
+    with gzip.open(path, "wb", compresslevel=COMPRESS_LEVEL) as file:
+        while True:
+            query = select(table).order_by(key).limit(chunk_size)
+            if last is not None:
+                query = query.where(key > last)
+            chunk = connection.execute(query).all()
+            if not chunk:
+                break
+            data = "".join(encoder.encode(list(row)) + "\n" for row in chunk).encode()
+            digest.update(data)
+            file.write(data)
+            rows += len(chunk)
+            last = chunk[-1][key_index]
+
+    return {
+        "name": table.name,
+        "file": _file_name(table),
+        "columns": columns,
+        "rows": rows,
+        "sha256": digest.hexdigest(),
+    }
+
+
+def export_parallel(
+    engine, tables: list, directory: str, workers: int, chunk_size: int
+):
+    """
+    Export tables of a SQLite database in worker processes, from one snapshot.
+
+    Each worker starts its read transaction while the parent holds the write
+    lock, so that no commit can happen before all of them have. Writers are
+    only held back for the time it takes to start the workers.
+
+    Args:
+        engine: The SQLAlchemy engine of the database to export.
+        tables (list[Table]): The tables to export.
+        directory (str): The snapshot directory.
+        workers (int): The number of worker processes.
+        chunk_size (int): The number of rows read per statement.
+
+    Returns:
+        tuple[list[str], list[dict]]: The migrations applied to the snapshot,
+        and the manifest entries of the tables, in the order of `tables`.
+    """
+    url = engine.url.render_as_string(hide_password=False)
+    with engine.connect() as connection:
+        groups = share_tables(connection, tables, workers)
+
+    started = multiprocessing.Queue()
+    with ProcessPoolExecutor(
+        max_workers=len(groups),
+        initializer=_init_export_worker,
+        initargs=(started,),
+    ) as pool:
+        with engine.connect() as fence:
+            fence.exec_driver_sql("BEGIN IMMEDIATE")
+            migrations = sorted(applied_migrations(fence))
+            futures = [
+                pool.submit(
+                    _export_tables,
+                    url,
+                    [table.name for table in group],
+                    directory,
+                    chunk_size,
+                )
+                for group in groups
+            ]
+            for _ in futures:
+                _wait_started(started, futures)
+            fence.rollback()
+        entries = {
+            entry["name"]: entry for future in futures for entry in future.result()
+        }
+    return migrations, [entries[table.name] for table in tables]
+
+
+def export_snapshot(
+    engine, directory: str, workers: int = 1, chunk_size: int = CHUNK_SIZE
+) -> dict:
+    """
+    Export every table of the models to a new snapshot directory.
+
+    Args:
+        engine: The SQLAlchemy engine of the database to export.
+        directory (str): The directory to create.
+        workers (int): The number of processes exporting tables, on SQLite.
+        chunk_size (int): The number of rows read per statement.
+
+    Returns:
+        dict: The manifest of the snapshot.
+
+    Raises:
+        FileExistsError: If the directory already exists.
+    """
+    os.makedirs(directory)
+    tables = snapshot_tables()
+    try:
+        if workers > 1 and engine.dialect.name == "sqlite":
+            migrations, entries = export_parallel(
+                engine, tables, directory, workers, chunk_size
+            )
+        else:
+            with begin_read(engine) as connection:
+                migrations = sorted(applied_migrations(connection))
+                entries = [
+                    export_table(connection, table, directory, chunk_size)
+                    for table in tables
+                ]
+
+        manifest = {
+            "format": FORMAT_VERSION,
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "dialect": engine.dialect.name,
+            "migrations": migrations,
+            "tables": entries,
+        }
+        with open(os.path.join(directory, MANIFEST), "w") as file:
+            json.dump(manifest, file, indent=2)
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    return manifest
+
+
+def read_manifest(directory: str) -> dict:
+    """
+    Read and check the manifest of a snapshot, and the files it lists.
+
+    Every file is read once to check its row count and checksum, so that a
+    damaged snapshot is rejected before anything is restored.
+
+    Args:
+        directory (str): The snapshot directory.
+
+    Returns:
+        dict: The manifest.
+
+    Raises:
+        ValueError: If the snapshot is incomplete, damaged or of another format.
+    """
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        raise ValueError(f"{directory} has no {MANIFEST}: the export did not complete.")
+    with open(path) as file:
+        manifest = json.load(file)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format')}.")
+
+    for entry in manifest["tables"]:
+        digest = hashlib.sha256()
+        rows = 0
+        with gzip.open(os.path.join(directory, entry["file"]), "rb") as file:
+            for line in file:
+                digest.update(line)
+                rows += 1
+        if rows != entry["rows"] or digest.hexdigest() != entry["sha256"]:
+            raise ValueError(f"{entry['file']} does not match the manifest.")
+    return manifest
+
+
+def read_rows(directory: str, entry: dict, table):
+    """
+    Yields:
+        dict: The rows of a snapshot file, with the column types of `table`.
+    """
+    columns = entry["columns"]
+    parsers = [_parser(table.c[name]) for name in columns]
+    with gzip.open(os.path.join(directory, entry["file"]), "rb") as file:
+        for line in file:
+            yield {
+                name: value if parse is None or value is None else parse(value)
+                for name, parse, value in zip(columns, parsers, json.loads(line))
+            }
+
+
+def check_target(connection, manifest: dict, replace: bool) -> None:
+    """
+    Check that a database can receive a snapshot.
+
+    Raises:
+        ValueError: If the migrations or the columns differ, or if the database
+        has rows and `replace` is not set.
+    """
+    tables = {table.name: table for table in snapshot_tables()}
+    applied = applied_migrations(connection)
+    if set(manifest["migrations"]) != applied:
+        raise ValueError(
+            "The snapshot and the database are at different migrations: "
+            "apply the pending ones to both with `just migrate`."
+        )
+    for entry in manifest["tables"]:
+        table = tables.get(entry["name"])
+        if table is None or set(entry["columns"]) != set(table.c.keys()):
+            raise ValueError(f"The columns of {entry['name']} do not match.")
+    if not replace:
+        filled = [
+            name
+            for name, table in tables.items()
+            if connection.execute(select(1).select_from(table).limit(1)).first()
+        ]
+        if filled:
+            raise ValueError(
+                f"The database is not empty ({', '.join(filled)}): "
+                "restore into a new database, or pass --replace."
+            )
+
+
+def restore_snapshot(
+    engine,
+    directory: str,
+    replace: bool = False,
+    batch_size: int = BATCH_SIZE,
+    transaction_size: int = TRANSACTION_SIZE,
+) -> dict[str, int]:
+    """
+    Load a snapshot into a database, parents before children.
+
+    Rows are inserted with one multi-row INSERT per batch, and committed every
+    `transaction_size` rows. The triggers keep the summary tables and the
+    search index up to date.
+
+    With `replace`, the rows of the database are deleted and the snapshot
+    loaded in a single transaction, whatever `transaction_size`: a restore
+    that fails leaves the database as it was, not half replaced.
+
+    Args:
+        engine: The SQLAlchemy engine of the database to restore into.
+        directory (str): The snapshot directory.
+        replace (bool): Delete the rows of the database first, in the same
+            transaction as the load.
+        batch_size (int): The number of rows per INSERT.
+        transaction_size (int): The number of rows per transaction, unless
+            `replace` is set.
+
+    Returns:
+        dict[str, int]: The number of rows restored in each table.
+
+    Raises:
+        ValueError: If the snapshot does not fit the database, see
+        read_manifest and check_target.
+    """
+    manifest = read_manifest(directory)
+    entries = {entry["name"]: entry for entry in manifest["tables"]}
+    tables = snapshot_tables()
+    counts = {}
+
+    with engine.connect() as connection:
+        check_target(connection, manifest, replace)
+        if replace:
+            for table in reversed(tables):
+                connection.execute(delete(table))
+
+        pending = 0
+        for table in tables:
+            entry = entries.get(table.name)
+            if entry is None:
+                continue
+            rows = read_rows(directory, entry, table)
+            while batch := list(itertools.islice(rows, batch_size)):
+                connection.execute(insert(table), batch)
+                pending += len(batch)
+                if not replace and pending >= transaction_size:
+                    connection.commit()
+                    pending = 0
+            counts[table.name] = entry["rows"]
+
+        if connection.dialect.name == "postgresql":
+            # Explicit ids do not advance the sequences of the primary keys.
+            for table in tables:
+                connection.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence('\"{table.name}\"', "
+                        f"'id'), coalesce(max(id), 1)) FROM \"{table.name}\""
+                    )
+                )
+        connection.commit()
+    return counts
@@ -0,0 +1,292 @@
+"""
+Summary tables behind the `dashboard` commands.
+
+The tables are created, and kept up to date by triggers, by the migration
+0004_summary_tables: reading them costs one row per customer, sales rep or
+support rep, whatever the number of contracts and events. `rebuild` recomputes
+them from the source tables and `check` compares both.
+"""
+
+from datetime import date
+
+from sqlalchemy import (
+    Column,
+    Date,
+    Index,
+    Integer,
+    MetaData,
+    Numeric,
+    String,
+    Table,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    select,
+)
+
+from epic_events.models.contracts import Contract
+from epic_events.models.customers import Customer
+from epic_events.models.events import Event
+from epic_events.models.users import User
+
+# End day of the events without end date. Also used by the triggers of the
+# migration 0004_summary_tables: both must stay in sync.
+OPEN_END_DAY = "9999-12-31"
+
+# Dialects on which the migration 0004_summary_tables creates the triggers.
+MAINTAINED_DIALECTS = frozenset({"sqlite"})
+
+metadata = MetaData()
+
+customer_balance = Table(
+    "customer_balance",
+    metadata,
+    Column("customer_id", Integer, primary_key=True, autoincrement=False),
+    Column("contracts", Integer, nullable=False, default=0),
+    Column("outstanding", Numeric(12, 2), nullable=False, default=0),
+    Index("ix_customer_balance_outstanding", "outstanding"),
+)
+
+sales_rep_balance = Table(
+    "sales_rep_balance",
+    metadata,
+    Column("sales_rep_id", Integer, primary_key=True, autoincrement=False),
+    Column("contracts", Integer, nullable=False, default=0),
+    Column("outstanding", Numeric(12, 2), nullable=False, default=0),
+)
+
+support_rep_open_events = Table(
+    "support_rep_open_events",
+    metadata,
+    Column("support_rep_id", Integer, primary_key=True, autoincrement=False),
+    Column("end_day", String(10), primary_key=True),
+    Column("events", Integer, nullable=False, default=0),
+)
+
+
+def maintained_by_triggers(conn) -> bool:
+    """
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        bool: Whether the summary tables follow every change of the source
+        tables. Otherwise they only change on `dashboard rebuild`.
+    """
+    return conn.get_bind().dialect.name in MAINTAINED_DIALECTS
+
+
+def _day_of(conn, column):
+    # `YYYY-MM-DD` day of a datetime column, as stored in end_day.
+    if conn.get_bind().dialect.name == "sqlite":
+        return func.date(column)
+    return func.to_char(cast(column, Date), "YYYY-MM-DD")
+
+
+def _outstanding(total):
+    return func.coalesce(func.round(total, 2), 0)
+
+
+def customer_balance_rows(conn):
+    """
+    Recompute customer_balance from the contracts.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Select: (customer_id, contracts, outstanding) rows.
+    """
+    return (
+        select(
+            Customer.id,
+            func.count(Contract.id),
+            _outstanding(
+                func.sum(case((Contract.signed, Contract.amount_due), else_=0))
+            ),
+        )
+        .outerjoin(Contract, Contract.customer_id == Customer.id)
+        .group_by(Customer.id)
+    )
+
+
+def sales_rep_balance_rows(conn):
+    """
+    Recompute sales_rep_balance from the contracts.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Select: (sales_rep_id, contracts, outstanding) rows.
+    """
+    return (
+        select(
+            Contract.sales_rep_id,
+            func.count(Contract.id),
+            _outstanding(
+                func.sum(case((Contract.signed, Contract.amount_due), else_=0))
+            ),
+        )
+        .where(Contract.sales_rep_id.is_not(None))
+        .group_by(Contract.sales_rep_id)
+    )
+
+
+def support_rep_open_events_rows(conn):
+    """
+    Recompute support_rep_open_events from the events.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Select: (support_rep_id, end_day, events) rows.
+    """
+    end_day = func.coalesce(_day_of(conn, Event.end_date), OPEN_END_DAY)
+    return (
+        select(Event.support_rep_id, end_day, func.count(Event.id))
+        .where(Event.support_rep_id.is_not(None))
+        .group_by(Event.support_rep_id, end_day)
+    )
+
+
+# summary table -> query recomputing its rows
+SUMMARIES = {
+    customer_balance: customer_balance_rows,
+    sales_rep_balance: sales_rep_balance_rows,
+    support_rep_open_events: support_rep_open_events_rows,
+}
+
+
+def rebuild(conn) -> dict[str, int]:
+    """
+    Recompute every summary table from the source tables, without committing.
+
+    Args:
+        conn: The SQLAlchemy session to use.
+
+    Returns:
+        dict[str, int]: The number of rows written to each table.
+    """
+    counts = {}
+    for table, rows in SUMMARIES.items():
+        conn.execute(delete(table))
+        columns = [column.name for column in table.columns]
+        conn.execute(insert(table).from_select(columns, rows(conn)))
+        counts[table.name] = conn.execute(
+            select(func.count()).select_from(table)
+        ).scalar()
+    return counts
+
+
+def check(conn) -> dict[str, list]:
+    """
+    Compare every summary table with the source tables.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        dict[str, list]: For each table, the keys of the rows that differ,
+        with the stored and expected values (None when the row is missing).
+    """
+    differences = {}
+    for table, rows in SUMMARIES.items():
+        key_size = len(table.primary_key.columns)
+
+        def by_key(result, key_size=key_size):
+            return {
+                tuple(row[:key_size]): tuple(_normalize(v) for v in row[key_size:])
+                for row in result
+            }
+
+        stored = by_key(conn.execute(select(table)))
+        expected = by_key(conn.execute(rows(conn)))
+        differences[table.name] = [
+            (key, stored.get(key), expected.get(key))
+            for key in sorted(stored.keys() | expected.keys())
+            if stored.get(key) != expected.get(key)
+        ]
+    return differences
+
+
+def _normalize(value):
+    # Amounts come back as int, float or Decimal depending on the path.
+    return round(float(value), 2) if value is not None else None
+
+
+def sales_rep_balances(conn):
+    """
+    Build the dashboard query of the outstanding amount per sales rep.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: (sales_rep_id, sales_rep, contracts, outstanding) rows, largest
+        first.
+    """
+    return (
+        conn.query(
+            sales_rep_balance.c.sales_rep_id,
+            User.username.label("sales_rep"),
+            sales_rep_balance.c.contracts,
+            sales_rep_balance.c.outstanding,
+        )
+        .outerjoin(User, User.id == sales_rep_balance.c.sales_rep_id)
+        .order_by(sales_rep_balance.c.outstanding.desc())
+    )
+
+
+def customer_balances(conn):
+    """
+    Build the dashboard query of the outstanding amount per customer.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+
+    Returns:
+        Query: (customer_id, customer, contracts, outstanding) rows of the
+        customers with an outstanding amount, largest first.
+    """
+    return (
+        conn.query(
+            customer_balance.c.customer_id,
+            Customer.name.label("customer"),
+            customer_balance.c.contracts,
+            customer_balance.c.outstanding,
+        )
+        .join(Customer, Customer.id == customer_balance.c.customer_id)
+        .filter(customer_balance.c.outstanding > 0)
+        .order_by(customer_balance.c.outstanding.desc())
+    )
+
+
+def open_events(conn, today=None):
+    """
+    Build the dashboard query of the open events per support rep.
+
+    Args:
+        conn: The SQLAlchemy session to query with.
+        today (date, optional): Events ending before this day are closed.
+            Defaults to the current day.
+
+    Returns:
+        Query: (support_rep_id, support_rep, open_events) rows, busiest first.
+    """
+    today = (today or date.today()).isoformat()
+    events = func.sum(support_rep_open_events.c.events)
+    return (
+        conn.query(
+            support_rep_open_events.c.support_rep_id,
+            User.username.label("support_rep"),
+            events.label("open_events"),
+        )
+        .outerjoin(User, User.id == support_rep_open_events.c.support_rep_id)
+        .filter(support_rep_open_events.c.end_day >= today)
+        .group_by(support_rep_open_events.c.support_rep_id, User.username)
+        .order_by(events.desc())
+    )
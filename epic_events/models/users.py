@@ -15,6 +15,21 @@ class UserType(Enum):
     SUPPORT_REP = "support_rep"
 
 
+def hash_password(password: str) -> str:
+    """
+    Hash a password with bcrypt.
+
+    Module-level so that it can be sent to a process pool.
+
+    Args:
+        password (str): The clear text password.
+
+    Returns:
+        str: The bcrypt hash.
+    """
+    return bcrypt.hash(password)
+
+
 class User(Base):
     __tablename__ = "user"
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -22,20 +37,25 @@ class User(Base):
     password = Column(String)
     email = Column(String, unique=True)
     user_type = Column(String)
+    # Bumped to revoke every session token issued to the user.
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     time_created = Column(DateTime(timezone=True), server_default=func.now())
-    time_updated = Column(DateTime(timezone=True), onupdate=func.now())
+    time_updated = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
 
     __mapper_args__ = {
         "polymorphic_identity": "user",
         "polymorphic_on": user_type,
     }
 
-    def __init__(self, password, **kwargs):
+    def __init__(self, password=None, password_hash=None, **kwargs):
         super().__init__(**kwargs)
-        self.set_password(password)
+        if password_hash is not None:
+            self.password = password_hash
+        else:
+            self.set_password(password)
 
     def set_password(self, password):
-        self.password = bcrypt.hash(password)
+        self.password = hash_password(password)
 
     def check_password(self, password):
         return bcrypt.verify(password, self.password)
@@ -74,3 +94,11 @@ class SupportRep(User):
         "polymorphic_identity": UserType.SUPPORT_REP.value,
     }
     events = relationship("Event", back_populates="support_rep")
+
+
+USER_CLASSES = {
+    UserType.ADMIN: Admin,
+    UserType.MANAGER: Manager,
+    UserType.SALES_REP: SalesRep,
+    UserType.SUPPORT_REP: SupportRep,
+}
@@ -0,0 +1,76 @@
+import os
+from functools import cache
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, ConfigDict
+
+
+class Settings(BaseModel):
+    """
+    Configuration of Epic Events, read from the environment and the .env file.
+
+    Every field is set by the environment variable of the same name in upper
+    case, e.g. `db_path` by DB_PATH.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    # Database URL and engine profile, see epic_events.models.ENGINE_PROFILES.
+    db_path: str | None = None
+    db_profile: str = "interactive"
+
+    # Key signing the session tokens, their lifetime in seconds, and how long
+    # before expiry `renew` issues a new one.
+    secret_key: str | None = None
+    jwt_ttl: int = 8 * 3600
+    jwt_refresh_window: int = 3600
+
+    # Token storage binary, process name and socket. Without a binary, the
+    # bundled epic_events.auth.server is used, and forgets tokens after
+    # token_ttl seconds.
+    bin_path: str | None = None
+    storage_name: str | None = None
+    socket_path: str | None = None
+    token_ttl: float = 12 * 3600
+
+    # Telemetry, see epic_events.telemetry.init.
+    sentry_dsn: str | None = None
+    sentry_traces_sample_rate: float = 0.0
+    sentry_profiler: bool = False
+    sentry_profiles_sample_rate: float = 0.0
+    telemetry_sink: str | None = None
+
+    @classmethod
+    def from_env(cls, environ=os.environ) -> "Settings":
+        """
+        Build the settings from environment variables. Empty variables are
+        treated as unset.
+
+        Args:
+            environ (Mapping[str, str]): The variables, defaults to os.environ.
+
+        Returns:
+            Settings: The parsed settings.
+
+        Raises:
+            pydantic.ValidationError: If a variable has an invalid value.
+        """
+        return cls.model_validate(
+            {
+                name.lower(): value
+                for name, value in environ.items()
+                if name.lower() in cls.model_fields and value != ""
+            }
+        )
+
+
+@cache
+def get_settings() -> Settings:
+    """
+    Load the .env file and parse the settings, once per process.
+
+    Returns:
+        Settings: The settings of the application.
+    """
+    load_dotenv()
+    return Settings.from_env()
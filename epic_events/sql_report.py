@@ -0,0 +1,231 @@
+"""
+Statements run by a command, grouped by shape, for `--debug-sql`.
+
+The cursor hooks installed on the application engine by instrument_engine time
+every statement while a report is being recorded, and do nothing otherwise.
+Statements are grouped by shape: their SQL text, where SQLAlchemy already
+renders values as placeholders, with whitespace and expanded IN lists collapsed.
+
+A SELECT shape looking up a single key, by `=` or a one-value IN, and run
+N_PLUS_ONE_THRESHOLD times or more by one command is flagged as an N+1 query:
+one statement per row of a previous query, usually a lazy loaded relationship
+that joinedload or selectinload would fetch at once. The pages of a keyset
+pagination (a LIMIT after a `key > ?`) and the IN lists of selectinload also
+run once per page, and are not flagged.
+"""
+
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from sqlalchemy import event
+
+N_PLUS_ONE_THRESHOLD = 10
+# Number of shapes listed in the report, the slowest first, and their width.
+REPORT_SHAPES = 15
+SHAPE_WIDTH = 160
+
+_report = ContextVar("sql_report", default=None)
+
+# A placeholder of any DBAPI paramstyle: ?, %s, %(name)s or :name.
+_PARAMETER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_PARAMETER_LIST = re.compile(rf"\(\s*{_PARAMETER}(?:\s*,\s*{_PARAMETER})+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+# A comparison of a column with a single value: `col = ?`, `? = col`, `IN (?)`.
+_KEY_LOOKUP = re.compile(
+    rf"[\w\"]\s*=\s*{_PARAMETER}"
+    rf"|{_PARAMETER}\s*=\s*[\w\"]"
+    rf"|\bIN\s*\(\s*{_PARAMETER}\s*\)",
+    re.IGNORECASE,
+)
+# The page of a keyset pagination: a LIMIT after the last key of the previous page.
+_KEYSET_PAGE = re.compile(rf"[<>]=?\s*{_PARAMETER}.*\bLIMIT\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """
+    Normalise a statement so that the runs of one query share the same text.
+
+    Args:
+        statement (str): The SQL sent to the database.
+
+    Returns:
+        str: The statement on one line, IN lists of any length as `(...)`.
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return _PARAMETER_LIST.sub("(...)", statement)
+
+
+def is_key_lookup(shape: str) -> bool:
+    """
+    Args:
+        shape (str): A statement shape.
+
+    Returns:
+        bool: Whether the shape is a SELECT of the rows matching one key value,
+        and not the page of a keyset pagination.
+    """
+    return (
+        shape[:6].upper() == "SELECT"
+        and _KEY_LOOKUP.search(shape) is not None
+        and _KEYSET_PAGE.search(shape) is None
+    )
+
+
+@dataclass
+class ShapeStats:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+@dataclass
+class StatementReport:
+    """
+    Count and time of the statements of one command.
+
+    Attributes:
+        shapes (dict[str, ShapeStats]): The statistics of each statement shape.
+    """
+
+    shapes: dict = field(default_factory=dict)
+
+    def add(self, statement: str, duration_ms: float) -> None:
+        shape = statement_shape(statement)
+        stats = self.shapes.get(shape)
+        if stats is None:
+            stats = self.shapes[shape] = ShapeStats()
+        stats.count += 1
+        stats.total_ms += duration_ms
+        stats.max_ms = max(stats.max_ms, duration_ms)
+
+    @property
+    def count(self) -> int:
+        return sum(stats.count for stats in self.shapes.values())
+
+    @property
+    def total_ms(self) -> float:
+        return sum(stats.total_ms for stats in self.shapes.values())
+
+    def n_plus_one(self) -> list[tuple[str, ShapeStats]]:
+        """
+        Returns:
+            list[tuple[str, ShapeStats]]: The single key lookups run at least
+            N_PLUS_ONE_THRESHOLD times, the most repeated first.
+        """
+        return sorted(
+            (
+                (shape, stats)
+                for shape, stats in self.shapes.items()
+                if stats.count >= N_PLUS_ONE_THRESHOLD and is_key_lookup(shape)
+            ),
+            key=lambda item: -item[1].count,
+        )
+
+
+def instrument_engine(engine) -> None:
+    """
+    Record the statements run by an engine in the current report, if any.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The engine to instrument.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if _report.get() is not None:
+            conn.info.setdefault("sql_report_starts", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        record(conn, statement)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        if exception_context.connection is not None:
+            record(exception_context.connection, exception_context.statement)
+
+
+def record(conn, statement: str) -> None:
+    report = _report.get()
+    starts = conn.info.get("sql_report_starts")
+    # The report may have started while the statement was running.
+    if report is None or not starts:
+        return
+    report.add(statement or "", (time.perf_counter() - starts.pop()) * 1000)
+
+
+@contextmanager
+def recording():
+    """
+    Record the statements run in the block, and print the report after it.
+
+    Yields:
+        StatementReport: The report being recorded.
+    """
+    report = StatementReport()
+    token = _report.set(report)
+    try:
+        yield report
+    finally:
+        _report.reset(token)
+        print_report(report)
+
+
+def _truncate(shape: str) -> str:
+    if len(shape) <= SHAPE_WIDTH:
+        return shape
+    return shape[: SHAPE_WIDTH - 3] + "..."
+
+
+def print_report(report: StatementReport) -> None:
+    """
+    Print a report to stderr, so that it never mixes with exported rows.
+
+    Args:
+        report (StatementReport): The report to print.
+    """
+    from rich.console import Console
+    from rich.table import Table
+    from rich.text import Text
+
+    console = Console(stderr=True)
+    if not report.shapes:
+        console.print("SQL: no statement.")
+        return
+
+    table = Table(
+        title=(
+            f"SQL: {report.count} statement(s), {len(report.shapes)} shape(s), "
+            f"{report.total_ms:.1f} ms"
+        )
+    )
+    for column in ("Count", "Total ms", "Mean ms", "Max ms"):
+        table.add_column(column, justify="right")
+    table.add_column("Statement")
+    slowest = sorted(report.shapes.items(), key=lambda item: -item[1].total_ms)
+    for shape, stats in slowest[:REPORT_SHAPES]:
+        table.add_row(
+            str(stats.count),
+            f"{stats.total_ms:.2f}",
+            f"{stats.total_ms / stats.count:.3f}",
+            f"{stats.max_ms:.2f}",
+            Text(_truncate(shape)),
+        )
+    if len(slowest) > REPORT_SHAPES:
+        table.caption = f"{len(slowest) - REPORT_SHAPES} faster shapes not shown."
+    console.print(table)
+
+    for shape, stats in report.n_plus_one():
+        console.print(
+            Text(
+                f"Possible N+1: {stats.count} runs of `{_truncate(shape)}`. "
+                "Load the rows at once with a join, an IN query, joinedload or "
+                "selectinload.",
+                style="bold yellow",
+            )
+        )
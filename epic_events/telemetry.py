@@ -0,0 +1,195 @@
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_parent_span = ContextVar("parent_span", default=None)
+_state = {"initialised": False, "sentry": False, "sink": None}
+
+
+def init() -> None:
+    """
+    Initialise telemetry from the settings, once per process.
+
+    Nothing is imported or opened unless it is configured:
+
+    - SENTRY_DSN enables Sentry, sampled with SENTRY_TRACES_SAMPLE_RATE
+      (default 0) and profiled with SENTRY_PROFILES_SAMPLE_RATE (default 0)
+      when SENTRY_PROFILER is "on".
+    - TELEMETRY_SINK is the path of a JSONL file every span is appended to,
+      without any network access.
+    """
+    if _state["initialised"]:
+        return
+    _state["initialised"] = True
+
+    from epic_events.settings import get_settings
+
+    settings = get_settings()
+    if settings.sentry_dsn:
+        import sentry_sdk
+
+        sentry_sdk.init(
+            dsn=settings.sentry_dsn,
+            traces_sample_rate=settings.sentry_traces_sample_rate,
+            profiles_sample_rate=(
+                settings.sentry_profiles_sample_rate
+                if settings.sentry_profiler
+                else 0.0
+            ),
+        )
+        _state["sentry"] = True
+
+    if settings.telemetry_sink:
+        # Kept open until the process exits, and line buffered.
+        _state["sink"] = open(  # noqa: SIM115
+            os.path.expanduser(settings.telemetry_sink), "a", buffering=1
+        )
+
+
+def _write(record: dict) -> None:
+    _state["sink"].write(json.dumps(record, default=str) + "\n")
+
+
+@contextmanager
+def span(op: str, name: str):
+    """
+    Time a block of work as a span.
+
+    The first span of a command opens a Sentry transaction, nested spans are
+    attached to it. When TELEMETRY_SINK is set the span is also written to the
+    local JSONL file, with its duration and parent.
+
+    Args:
+        op (str): The kind of work, e.g. "cli.command" or "db.query".
+        name (str): What is being done, e.g. the command path or SQL statement.
+    """
+    init()
+    if not _state["sentry"] and _state["sink"] is None:
+        yield
+        return
+
+    parent = _parent_span.get()
+    span_id = os.urandom(8).hex()
+    trace_id = parent["trace_id"] if parent else os.urandom(16).hex()
+    token = _parent_span.set({"span_id": span_id, "trace_id": trace_id})
+
+    sentry_span = None
+    if _state["sentry"]:
+        import sentry_sdk
+
+        if parent is None:
+            sentry_span = sentry_sdk.start_transaction(op=op, name=name)
+        else:
+            sentry_span = sentry_sdk.start_span(op=op, name=name)
+        sentry_span.__enter__()
+
+    started_at = time.time()
+    start = time.perf_counter()
+    exc_info = (None, None, None)
+    try:
+        yield
+    except BaseException as e:
+        exc_info = (type(e), e, e.__traceback__)
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        _parent_span.reset(token)
+        if sentry_span is not None:
+            sentry_span.__exit__(*exc_info)
+        if _state["sink"] is not None:
+            _write(
+                {
+                    "trace_id": trace_id,
+                    "span_id": span_id,
+                    "parent_id": parent["span_id"] if parent else None,
+                    "op": op,
+                    "name": name,
+                    "start": started_at,
+                    "duration_ms": round(duration_ms, 3),
+                    "error": exc_info[0] and exc_info[0].__name__,
+                }
+            )
+
+
+def capture_message(message: str) -> None:
+    """
+    Report a business event, such as a signed contract.
+
+    Args:
+        message (str): The message to report.
+    """
+    init()
+    if _state["sentry"]:
+        import sentry_sdk
+
+        sentry_sdk.capture_message(message)
+    if _state["sink"] is not None:
+        _write({"op": "message", "name": message, "start": time.time()})
+
+
+def instrument_command(command, path: str):
+    """
+    Wrap every leaf command of a click command tree in a "cli.command" span.
+
+    Args:
+        command (click.Command): The command or group to instrument.
+        path (str): The command path used as span name, e.g. "contracts list".
+
+    Returns:
+        click.Command: The same command, instrumented in place.
+    """
+    for name, subcommand in getattr(command, "commands", {}).items():
+        instrument_command(subcommand, f"{path} {name}")
+
+    callback = command.callback
+    if callback is None or getattr(command, "commands", None):
+        return command
+
+    @functools.wraps(callback)
+    def traced(*args, **kwargs):
+        with span("cli.command", path):
+            return callback(*args, **kwargs)
+
+    command.callback = traced
+    return command
+
+
+def instrument_engine(engine) -> None:
+    """
+    Record every statement run by an engine as a "db.query" span.
+
+    Sentry already records statements through its SQLAlchemy integration, so
+    the hooks are only installed when the local sink is enabled.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The engine to instrument.
+    """
+    init()
+    if _state["sink"] is None:
+        return
+
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        spans = conn.info.setdefault("telemetry_spans", [])
+        manager = span("db.query", statement)
+        manager.__enter__()
+        spans.append(manager)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info["telemetry_spans"].pop().__exit__(None, None, None)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # No statement, and so no span, when the connection itself failed.
+        if exception_context.connection is None:
+            return
+        spans = exception_context.connection.info.get("telemetry_spans")
+        if spans:
+            error = exception_context.original_exception
+            spans.pop().__exit__(type(error), error, error.__traceback__)
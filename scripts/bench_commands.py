@@ -0,0 +1,360 @@
+"""
+Wall time, SQL statements and peak memory of every CLI command, as JSON.
+
+For each size, a database of that many customers is generated with
+scripts/generate_data.py, cached in --workdir until the models, migrations or
+generator change. Every command line of SCENARIOS then runs on a copy of it, in
+a fresh `python -m epic_events` process reading the answers to its prompts from
+stdin, and is reported with:
+
+- wall_ms: the median wall time of the process, startup included;
+- statements: the SQL statements it ran, counted from its TELEMETRY_SINK spans;
+- peak_rss_mb: the largest resident set size of the process.
+
+The report records the commit it was measured on: pass the report of another
+commit to --compare to print the ratios.
+
+    python scripts/bench_commands.py [--sizes 1000 100000 1000000] [--runs 3] [--output bench_commands.json] [--compare old.json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shlex
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from glob import glob
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+parser.add_argument("--runs", type=int, default=3)
+parser.add_argument("--seed", type=int, default=23)
+parser.add_argument("--workdir", default="/tmp/bench_commands")
+parser.add_argument("--output", default="bench_commands.json")
+parser.add_argument("--compare", help="Report of a previous run to compare with.")
+args = parser.parse_args()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "password"
+
+# Command lines and the answers to their prompts, run in this order. In both,
+# {run} is the run number, {user}, {company}, {customer}, {contract} and
+# {event} the id of the next row created in the table, {sales_rep} and
+# {support_rep} existing users, and {workdir} the --workdir. Rows created by a
+# run are deleted by the same run, but for the imports.
+SCENARIOS = (
+    ("login", f"admin\n{PASSWORD}\n"),
+    ("whoami", ""),
+    ("renew --force", ""),
+    ("users list --limit 100", ""),
+    ("companies list --limit 100", ""),
+    ("customers list --limit 100", ""),
+    ("customers list --unassigned --limit 100", ""),
+    ("customers list --format ndjson", ""),
+    ("contracts list --limit 100", ""),
+    ("contracts list --unpaid --format csv", ""),
+    ("events list --limit 100", ""),
+    ("events list --from 2025-01-01 --to 2025-01-31 --format csv", ""),
+    ("events schedule --rep {support_rep} --from 2025-01-01 --days 30", ""),
+    ("events conflicts --from 2026-12-01", ""),
+    ("reports revenue", ""),
+    ("reports outstanding --top 20", ""),
+    ("reports pipeline", ""),
+    ("reports events --year 2025", ""),
+    ("dashboard sales-reps", ""),
+    ("dashboard customers --top 20", ""),
+    ("dashboard support-reps", ""),
+    ("search paris catering", ""),
+    (
+        "users create",
+        f"bench{{run}}\n{PASSWORD}\nbench{{run}}@ee.com\nsales_rep\n",
+    ),
+    ("companies create", "Bench company {run}\n"),
+    ("customers create", "Bench customer {run}\nBench company {run}b\n{sales_rep}\n"),
+    ("contracts create", "{customer}\n5000\n5000\n{sales_rep}\ny\n"),
+    (
+        "events create",
+        (
+            "Bench event {run}\n2025-06-02\n2025-06-03\n100\nLyon\nbench\n"
+            "{contract}\n{support_rep}\ny\n"
+        ),
+    ),
+    ("users update", "{user}\nbench{run}\nnew{run}\nbench{run}@ee.com\n"),
+    ("companies update", "{company}\nBench company {run} renamed\n"),
+    (
+        "customers update",
+        "{customer}\nBench customer {run}\nBench company {run}b\n{sales_rep}\n",
+    ),
+    ("contracts update", "{contract}\n6000\n1000\n{sales_rep}\ny\n"),
+    (
+        "events update",
+        (
+            "{event}\nBench event {run}\n2025-06-02\n2025-06-04\n120\nLyon\nbench\n"
+            "{contract}\n{support_rep}\ny\n"
+        ),
+    ),
+    ("users revoke {user}", ""),
+    ("events delete {event}", ""),
+    ("contracts delete {contract}", ""),
+    ("customers delete {customer}", ""),
+    ("companies delete {company}", ""),
+    ("users delete {user}", ""),
+    ("customers import {customers_csv}", ""),
+    ("users import {users_csv} --workers 2", ""),
+    ("dashboard check", ""),
+    ("dashboard rebuild", ""),
+    ("reindex", ""),
+    ("export {workdir}/snap-{run}", ""),
+    ("restore {workdir}/snap-{run} --replace", ""),
+    ("shell", "whoami\ncustomers list --limit 100\nexit\n"),
+    ("daemon start --detach", ""),
+    ("daemon status", ""),
+    ("daemon stop", ""),
+    ("logout", ""),
+)
+# Commands not benchmarked, and why.
+SKIPPED = {"error": "raises on purpose, to test the error reporting."}
+
+
+# Prints the path of every command of the CLI, e.g. "customers list". It runs
+# in its own process: on Linux a child reports the peak RSS of its parent when
+# larger than its own, so this process must not import the application.
+LIST_COMMANDS = """
+import click
+from epic_events.cli import COMMANDS, load_command
+
+for name in COMMANDS:
+    command = load_command(name)
+    if isinstance(command, click.Group):
+        for subcommand in command.commands:
+            print(name, subcommand)
+    else:
+        print(name)
+"""
+
+
+def check_coverage():
+    leaves = set(
+        subprocess.run(
+            [sys.executable, "-c", LIST_COMMANDS],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.splitlines()
+    )
+    covered = set(SKIPPED)
+    for command_line, _ in SCENARIOS:
+        words = command_line.split()
+        covered.add(" ".join(words[:2]) if " ".join(words[:2]) in leaves else words[0])
+    for command in sorted(leaves - covered):
+        print(f"warning: `{command}` is not benchmarked", file=sys.stderr)
+
+
+def schema_digest():
+    """Hash of the files the generated databases depend on."""
+    digest = hashlib.sha1()
+    paths = sorted(
+        glob(os.path.join(ROOT, "epic_events", "models", "*.py"))
+        + glob(os.path.join(ROOT, "epic_events", "migrations", "*.py"))
+        + [os.path.join(ROOT, "scripts", "generate_data.py")]
+    )
+    for path in paths:
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:10]
+
+
+def template(size):
+    path = os.path.join(args.workdir, f"{size}-{args.seed}-{schema_digest()}.sqlite")
+    if not os.path.exists(path):
+        print(f"generating {size} customers", file=sys.stderr)
+        subprocess.run(
+            [
+                sys.executable,
+                os.path.join(ROOT, "scripts", "generate_data.py"),
+                *("--db", f"{path}.tmp", "--rows", str(size)),
+                *("--seed", str(args.seed), "--password", PASSWORD, "--force"),
+            ],
+            check=True,
+            stdout=sys.stderr,
+        )
+        os.replace(f"{path}.tmp", path)
+    return path
+
+
+def run_ids(db, run):
+    """
+    Values of the placeholders of SCENARIOS for one run, writing its import files.
+    """
+    ids = {"run": run, "workdir": args.workdir}
+    # export refuses to overwrite the snapshot of a previous benchmark.
+    shutil.rmtree(os.path.join(args.workdir, f"snap-{run}"), ignore_errors=True)
+    with sqlite3.connect(db) as connection:
+        for table in ("user", "company", "customer", "contract", "event"):
+            ids[table] = connection.execute(
+                f'SELECT coalesce(max(id), 0) + 1 FROM "{table}"'
+            ).fetchone()[0]
+        for table in ("sales_rep", "support_rep"):
+            ids[table] = connection.execute(f"SELECT min(id) FROM {table}").fetchone()[
+                0
+            ]
+    connection.close()
+
+    ids["customers_csv"] = os.path.join(args.workdir, f"customers-{run}.csv")
+    with open(ids["customers_csv"], "w") as file:
+        file.write("name,company,sales_rep_id\n")
+        file.writelines(
+            f"Imported {run}-{i},Import company {i % 20},{ids['sales_rep']}\n"
+            for i in range(1000)
+        )
+    ids["users_csv"] = os.path.join(args.workdir, f"users-{run}.csv")
+    with open(ids["users_csv"], "w") as file:
+        file.write("username,password,email,user_type\n")
+        file.writelines(
+            f"import{run}-{i},{PASSWORD},import{run}-{i}@ee.com,support_rep\n"
+            for i in range(20)
+        )
+    return ids
+
+
+def run(argv, answers, env):
+    """
+    Run a command in a new process.
+
+    Returns:
+        tuple[float, int, float, int, str]: The wall time in ms, the number of
+        statements, the peak RSS in MB, the exit code and the error output.
+    """
+    sink = os.path.join(args.workdir, "telemetry.jsonl")
+    if os.path.exists(sink):
+        os.remove(sink)
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "epic_events", *argv],
+        env={**env, "TELEMETRY_SINK": sink},
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        process.stdin.write(answers.encode())
+        process.stdin.close()
+    except BrokenPipeError:
+        pass
+    errors = process.stderr.read().decode()
+    _, status, usage = os.wait4(process.pid, 0)
+    wall_ms = (time.perf_counter() - start) * 1000
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    statements = 0
+    if os.path.exists(sink):
+        with open(sink) as file:
+            statements = sum(json.loads(line)["op"] == "db.query" for line in file)
+    # ru_maxrss is in bytes on macOS, in kilobytes elsewhere.
+    peak_rss_mb = usage.ru_maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+    return wall_ms, statements, peak_rss_mb, process.returncode, errors
+
+
+def bench(size):
+    db = os.path.join(args.workdir, "bench.sqlite")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db + suffix):
+            os.remove(db + suffix)
+    shutil.copyfile(template(size), db)
+
+    env = {
+        **os.environ,
+        "DB_PATH": f"sqlite:///{db}",
+        "SECRET_KEY": os.environ.get("SECRET_KEY") or "bench",
+        "SOCKET_PATH": os.path.join(args.workdir, "storage.sock"),
+        "DAEMON_SOCKET": "",
+        "SENTRY_DSN": "",
+    }
+    daemon_env = {**env, "DAEMON_SOCKET": os.path.join(args.workdir, "daemon.sock")}
+    measures = {command_line: [] for command_line, _ in SCENARIOS}
+    for run_number in range(1, args.runs + 1):
+        ids = run_ids(db, run_number)
+        for command_line, answers in SCENARIOS:
+            argv = shlex.split(command_line.format(**ids))
+            measure = run(
+                argv,
+                answers.format(**ids),
+                daemon_env if argv[0] == "daemon" else env,
+            )
+            if measure[3]:
+                error = measure[4].strip().splitlines()[-1:] or [""]
+                print(
+                    f"warning: `{' '.join(argv)}` exited with {measure[3]}: {error[0]}",
+                    file=sys.stderr,
+                )
+            measures[command_line].append(measure)
+
+    return {
+        command_line: {
+            "wall_ms": round(statistics.median(m[0] for m in runs), 1),
+            "statements": max(m[1] for m in runs),
+            "peak_rss_mb": round(max(m[2] for m in runs), 1),
+            "failed_runs": sum(1 for m in runs if m[3]),
+        }
+        for command_line, runs in measures.items()
+    }
+
+
+def git(*git_args):
+    result = subprocess.run(
+        ["git", *git_args], cwd=ROOT, capture_output=True, text=True, check=False
+    )
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def print_results(size, results, baseline):
+    width = max(len(command_line) for command_line in results) + 2
+    header = f"{'command':<{width}}{'ms':>10}{'stmts':>8}{'MB':>8}"
+    if baseline:
+        header += f"{'ms x':>8}{'stmts +':>9}"
+    print(f"\n{size} customers\n{header}")
+    for command_line, result in results.items():
+        line = (
+            f"{command_line:<{width}}{result['wall_ms']:>10.1f}"
+            f"{result['statements']:>8}{result['peak_rss_mb']:>8.1f}"
+        )
+        old = baseline.get(command_line)
+        if old:
+            line += (
+                f"{result['wall_ms'] / old['wall_ms']:>8.2f}"
+                f"{result['statements'] - old['statements']:>+9}"
+            )
+        print(line)
+
+
+os.makedirs(args.workdir, exist_ok=True)
+check_coverage()
+baselines = {}
+if args.compare:
+    with open(args.compare) as file:
+        baselines = json.load(file)["results"]
+
+report = {
+    "commit": git("rev-parse", "HEAD"),
+    "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    "date": datetime.now().isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "runs": args.runs,
+    "seed": args.seed,
+    "results": {},
+}
+for size in args.sizes:
+    report["results"][str(size)] = bench(size)
+    print_results(size, report["results"][str(size)], baselines.get(str(size), {}))
+
+with open(args.output, "w") as file:
+    json.dump(report, file, indent=2)
+print(f"\nreport written to {args.output}")
@@ -0,0 +1,88 @@
+"""
+Latency of CLI commands run cold and through the command daemon.
+
+Starts a daemon on a temporary socket, then runs each command sequentially and
+from concurrent clients, with and without it. Commands run against the
+database and token storage of the environment: log in first.
+
+    python scripts/bench_daemon.py [--runs 10] [--clients 8]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+COMMANDS = (
+    ["whoami"],
+    ["customers", "list", "--limit", "20", "--format", "csv"],
+    ["contracts", "list", "--limit", "20"],
+)
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+parser.add_argument("--runs", type=int, default=10)
+parser.add_argument("--clients", type=int, default=8)
+args = parser.parse_args()
+
+socket_path = os.path.join(tempfile.mkdtemp(prefix="bench_daemon_"), "daemon.sock")
+cold_env = {**os.environ, "DAEMON_SOCKET": ""}
+daemon_env = {**os.environ, "DAEMON_SOCKET": socket_path}
+
+
+def run(argv, env):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-m", "epic_events", *argv],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=False,
+    )
+    if result.returncode:
+        sys.exit(f"`{' '.join(argv)}` failed: {result.stderr.decode().strip()}")
+    return (time.perf_counter() - start) * 1000
+
+
+def sequential(argv, env):
+    return statistics.median(run(argv, env) for _ in range(args.runs))
+
+
+def concurrent(argv, env):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.clients) as pool:
+        list(pool.map(lambda _: run(argv, env), range(args.clients)))
+    return (time.perf_counter() - start) * 1000
+
+
+subprocess.run(
+    [sys.executable, "-m", "epic_events", "daemon", "start", "--detach"],
+    env=daemon_env,
+    check=True,
+    stdout=subprocess.DEVNULL,
+)
+try:
+    print(
+        f"median of {args.runs} sequential runs, "
+        f"and wall time of {args.clients} concurrent clients (ms)\n"
+    )
+    print(f"{'command':<45}{'cold':>10}{'daemon':>10}{'cold x':>10}{'daemon x':>10}")
+    for argv in COMMANDS:
+        print(
+            f"{' '.join(argv):<45}"
+            f"{sequential(argv, cold_env):>10.1f}"
+            f"{sequential(argv, daemon_env):>10.1f}"
+            f"{concurrent(argv, cold_env):>10.1f}"
+            f"{concurrent(argv, daemon_env):>10.1f}"
+        )
+finally:
+    subprocess.run(
+        [sys.executable, "-m", "epic_events", "daemon", "stop"],
+        env=daemon_env,
+        stdout=subprocess.DEVNULL,
+        check=False,
+    )
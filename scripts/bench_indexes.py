@@ -0,0 +1,183 @@
+"""
+Query plans and timings of the hot queries, before and after the migrations.
+
+Builds a throwaway SQLite database with synthetic data and without the
+migration indexes, runs the queries, applies the migrations and runs them
+again.
+
+    python scripts/bench_indexes.py [--db /tmp/bench_indexes.sqlite] [--rows 100000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+parser.add_argument("--db", default="/tmp/bench_indexes.sqlite")
+parser.add_argument("--rows", type=int, default=100_000)
+parser.add_argument("--runs", type=int, default=5)
+args = parser.parse_args()
+
+if os.path.exists(args.db):
+    os.remove(args.db)
+DB_URL = f"sqlite:///{args.db}"
+# epic_events.models opens its engine from DB_PATH when imported.
+os.environ["DB_PATH"] = DB_URL
+
+from epic_events.migrations import schema_version, upgrade
+from epic_events.models import Base
+from epic_events.models.companies import Company
+from epic_events.models.contracts import Contract
+from epic_events.models.customers import Customer
+from epic_events.models.events import Event
+from epic_events.models.users import SalesRep, SupportRep, User
+
+QUERIES = {
+    "customers of a sales rep": "SELECT * FROM customer WHERE sales_rep_id = :rep",
+    "customers of a company": "SELECT * FROM customer WHERE company_id = :company",
+    "contracts of a sales rep": "SELECT * FROM contract WHERE sales_rep_id = :rep",
+    "unsigned contracts": "SELECT count(*) FROM contract WHERE signed = 0",
+    "events of a support rep": "SELECT * FROM event WHERE support_rep_id = :support",
+    "events in a week": "SELECT * FROM event WHERE start_date BETWEEN :start AND :end",
+    "recently updated customers": "SELECT * FROM customer WHERE time_updated > :since",
+}
+PARAMETERS = {
+    "rep": 42,
+    "company": 7,
+    "support": 1042,
+    "start": datetime(2024, 6, 3),
+    "end": datetime(2024, 6, 10),
+    "since": datetime(2024, 12, 1),
+}
+
+
+def seed(connection, rows):
+    rng = random.Random(12)
+    sales_reps = range(1, 201)
+    support_reps = range(1001, 1051)
+    companies = max(1, rows // 10)
+    start = datetime(2023, 1, 1)
+
+    connection.execute(
+        insert(User),
+        [
+            {
+                "id": user_id,
+                "username": f"user{user_id}",
+                "email": f"user{user_id}@ee.com",
+                "password": "-",
+                "user_type": user_type,
+            }
+            for user_ids, user_type in (
+                (sales_reps, "sales_rep"),
+                (support_reps, "support_rep"),
+            )
+            for user_id in user_ids
+        ],
+    )
+    connection.execute(
+        insert(SalesRep.__table__), [{"id": user_id} for user_id in sales_reps]
+    )
+    connection.execute(
+        insert(SupportRep.__table__), [{"id": user_id} for user_id in support_reps]
+    )
+    connection.execute(
+        insert(Company),
+        [{"id": i, "name": f"Company {i}"} for i in range(1, companies + 1)],
+    )
+    connection.execute(
+        insert(Customer),
+        [
+            {
+                "id": i,
+                "name": f"Customer {i}",
+                "company_id": rng.randint(1, companies),
+                "sales_rep_id": rng.choice(sales_reps),
+                "time_updated": (
+                    start + timedelta(days=rng.randint(0, 730))
+                    if rng.random() < 0.1
+                    else None
+                ),
+            }
+            for i in range(1, rows + 1)
+        ],
+    )
+    connection.execute(
+        insert(Contract),
+        [
+            {
+                "id": i,
+                "customer_id": i,
+                "sales_rep_id": rng.choice(sales_reps),
+                "value": 1000,
+                "amount_due": 0 if signed else 1000,
+                "signed": signed,
+            }
+            for i in range(1, rows + 1)
+            for signed in (rng.random() < 0.8,)
+        ],
+    )
+    connection.execute(
+        insert(Event),
+        [
+            {
+                "id": i,
+                "name": f"Event {i}",
+                "contract_id": i,
+                "support_rep_id": rng.choice(support_reps),
+                "start_date": start + timedelta(hours=rng.randint(0, 24 * 730)),
+            }
+            for i in range(1, rows // 2 + 1)
+        ],
+    )
+
+
+def measure(connection):
+    results = {}
+    for name, sql in QUERIES.items():
+        statement = text(sql)
+        plan = connection.execute(
+            text(f"EXPLAIN QUERY PLAN {sql}"), PARAMETERS
+        ).fetchall()
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            connection.execute(statement, PARAMETERS).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = (
+            " / ".join(row[-1] for row in plan),
+            statistics.median(timings),
+        )
+    return results
+
+
+engine = create_engine(DB_URL)
+Base.metadata.create_all(engine)
+with engine.begin() as connection:
+    # Emulate a database created before the migrations.
+    indexes = connection.scalars(
+        text("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'")
+    ).all()
+    for name in indexes:
+        connection.execute(text(f'DROP INDEX "{name}"'))
+    schema_version.drop(connection, checkfirst=True)
+    seed(connection, args.rows)
+
+with engine.connect() as connection:
+    before = measure(connection)
+upgrade(engine)
+with engine.connect() as connection:
+    after = measure(connection)
+
+print(f"{args.rows} customers/contracts, {args.rows // 2} events\n")
+for name in QUERIES:
+    plan_before, ms_before = before[name]
+    plan_after, ms_after = after[name]
+    print(f"{name}: {ms_before:.2f} ms -> {ms_after:.2f} ms")
+    print(f"    before: {plan_before}")
+    print(f"    after:  {plan_after}")
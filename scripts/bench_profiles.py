@@ -0,0 +1,162 @@
+"""
+List and import throughput of each engine profile.
+
+Every profile runs against its own copy of a synthetic SQLite database created
+with stock settings (rollback journal), alongside a "stock" baseline using a
+plain `sqlalchemy.create_engine`.
+
+    python scripts/bench_profiles.py [--rows 100000] [--batch-size 1000]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+import sqlalchemy
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+parser.add_argument("--rows", type=int, default=100_000)
+parser.add_argument("--batch-size", type=int, default=1000)
+parser.add_argument("--runs", type=int, default=3)
+args = parser.parse_args()
+
+workdir = tempfile.mkdtemp(prefix="bench_profiles_")
+template = os.path.join(workdir, "template.sqlite")
+# The settings read DB_PATH on first use, by get_engine: point it at the
+# template, should any code reach the application engine.
+os.environ["DB_PATH"] = f"sqlite:///{template}"
+
+from epic_events.models import ENGINE_PROFILES, Base, create_engine
+from epic_events.models.companies import Company
+from epic_events.models.customers import Customer
+from epic_events.models.queries import (
+    customers_query,
+    customers_rows,
+    paginate,
+    stream_rows,
+)
+from epic_events.models.users import SalesRep, User
+
+SALES_REPS = range(1, 51)
+COMPANIES = range(1, 1001)
+
+
+def customer_rows(rng, count):
+    return [
+        {
+            "name": f"Customer {rng.random()}",
+            "company_id": rng.choice(COMPANIES),
+            "sales_rep_id": rng.choice(SALES_REPS),
+        }
+        for _ in range(count)
+    ]
+
+
+def seed(engine, rows):
+    rng = random.Random(12)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(User),
+            [
+                {
+                    "id": user_id,
+                    "username": f"user{user_id}",
+                    "email": f"user{user_id}@ee.com",
+                    "password": "-",
+                    "user_type": "sales_rep",
+                }
+                for user_id in SALES_REPS
+            ],
+        )
+        connection.execute(
+            insert(SalesRep.__table__), [{"id": user_id} for user_id in SALES_REPS]
+        )
+        connection.execute(
+            insert(Company), [{"id": i, "name": f"Company {i}"} for i in COMPANIES]
+        )
+        connection.execute(insert(Customer), customer_rows(rng, rows))
+
+
+def bench_list(session):
+    """ORM objects, page by page, as `customers list` does."""
+    return sum(len(page) for page in paginate(customers_query(session), Customer.id))
+
+
+def bench_export(session):
+    """Column rows off the cursor, as `customers list --format ndjson` does."""
+    return sum(1 for _ in stream_rows(customers_rows(session), Customer.id))
+
+
+def bench_import(session):
+    """One multi-row insert and one commit per batch, as `customers import` does."""
+    rng = random.Random(34)
+    for _ in range(args.rows // args.batch_size):
+        session.execute(insert(Customer), customer_rows(rng, args.batch_size))
+        session.commit()
+    return args.rows // args.batch_size * args.batch_size
+
+
+def measure(engine, scenario):
+    session = sessionmaker(bind=engine)()
+    start = time.perf_counter()
+    count = scenario(session)
+    rate = count / (time.perf_counter() - start)
+    session.close()
+    return rate
+
+
+stock = sqlalchemy.create_engine(f"sqlite:///{template}")
+Base.metadata.create_all(stock)
+seed(stock, args.rows)
+stock.dispose()
+
+makers = {"stock": sqlalchemy.create_engine}
+makers.update(
+    {
+        name: lambda url, name=name: create_engine(url, profile=name)
+        for name in ENGINE_PROFILES
+    }
+)
+readonly = {name for name, profile in ENGINE_PROFILES.items() if profile.readonly}
+scenarios = {"list": bench_list, "export": bench_export, "import": bench_import}
+
+engines = {}
+for name, make_engine in makers.items():
+    path = os.path.join(workdir, f"{name}.sqlite")
+    shutil.copyfile(template, path)
+    engines[name] = make_engine(f"sqlite:///{path}")
+
+# Runs are interleaved across profiles so that drift in the machine's load
+# does not favour the profiles measured first. Imports come last, so that every
+# profile reads the same rows.
+rates = {(name, scenario): [] for name in engines for scenario in scenarios}
+for scenario_name, scenario in scenarios.items():
+    for _ in range(args.runs):
+        for name, engine in engines.items():
+            if scenario_name == "import" and name in readonly:
+                continue
+            rates[name, scenario_name].append(measure(engine, scenario))
+
+print(f"{args.rows} customers, imports in batches of {args.batch_size} (rows/s)\n")
+print(f"{'profile':<12}" + "".join(f"{name:>12}" for name in scenarios))
+for name, engine in engines.items():
+    engine.dispose()
+    print(
+        f"{name:<12}"
+        + "".join(
+            (
+                f"{statistics.median(rates[name, scenario]):>12.0f}"
+                if rates[name, scenario]
+                else f"{'-':>12}"
+            )
+            for scenario in scenarios
+        )
+    )
+
+shutil.rmtree(workdir)
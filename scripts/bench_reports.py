@@ -0,0 +1,176 @@
+"""
+Time of the reports computed in SQL, against the same totals summed in Python.
+
+Builds throwaway SQLite databases with synthetic contracts and events, of
+growing sizes but with the same number of sales reps, companies and support
+reps, and times each report both ways: the SQL report only returns one row per
+group, the Python version loads every ORM object it sums.
+
+    python scripts/bench_reports.py [--db /tmp/bench_reports.sqlite] [--rows 10000 100000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, joinedload
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+parser.add_argument("--db", default="/tmp/bench_reports.sqlite")
+parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+parser.add_argument("--runs", type=int, default=3)
+args = parser.parse_args()
+
+from epic_events.migrations import upgrade
+from epic_events.models import Base, reports
+from epic_events.models.companies import Company
+from epic_events.models.contracts import Contract
+from epic_events.models.customers import Customer
+from epic_events.models.events import Event
+from epic_events.models.users import SalesRep, SupportRep, User
+
+SALES_REPS = range(1, 51)
+SUPPORT_REPS = range(1001, 1021)
+COMPANIES = 200
+
+
+def seed(connection, rows):
+    rng = random.Random(18)
+    start = datetime(2024, 1, 1)
+    connection.execute(
+        insert(User),
+        [
+            {
+                "id": user_id,
+                "username": f"user{user_id}",
+                "email": f"user{user_id}@ee.com",
+                "password": "-",
+                "user_type": user_type,
+            }
+            for user_ids, user_type in (
+                (SALES_REPS, "sales_rep"),
+                (SUPPORT_REPS, "support_rep"),
+            )
+            for user_id in user_ids
+        ],
+    )
+    connection.execute(
+        insert(SalesRep.__table__), [{"id": user_id} for user_id in SALES_REPS]
+    )
+    connection.execute(
+        insert(SupportRep.__table__), [{"id": user_id} for user_id in SUPPORT_REPS]
+    )
+    connection.execute(
+        insert(Company),
+        [{"id": i, "name": f"Company {i}"} for i in range(1, COMPANIES + 1)],
+    )
+    connection.execute(
+        insert(Customer),
+        [
+            {
+                "id": i,
+                "name": f"Customer {i}",
+                "company_id": rng.randint(1, COMPANIES),
+                "sales_rep_id": rng.choice(SALES_REPS),
+            }
+            for i in range(1, rows + 1)
+        ],
+    )
+    connection.execute(
+        insert(Contract),
+        [
+            {
+                "id": i,
+                "customer_id": i,
+                "sales_rep_id": rng.choice(SALES_REPS),
+                "value": value,
+                "amount_due": rng.choice((0, value // 2, value)),
+                "signed": rng.random() < 0.7,
+            }
+            for i in range(1, rows + 1)
+            for value in (rng.randint(1, 100) * 100,)
+        ],
+    )
+    connection.execute(
+        insert(Event),
+        [
+            {
+                "id": i,
+                "name": f"Event {i}",
+                "contract_id": i,
+                "support_rep_id": rng.choice(SUPPORT_REPS),
+                "start_date": start + timedelta(hours=rng.randint(0, 24 * 365)),
+                "attendees": rng.randint(10, 500),
+            }
+            for i in range(1, rows // 2 + 1)
+        ],
+    )
+
+
+def revenue_in_python(conn):
+    revenue = defaultdict(int)
+    for contract in conn.query(Contract).options(joinedload(Contract.sales_rep)):
+        if contract.signed:
+            revenue[contract.sales_rep.username] += contract.value
+    return sorted(revenue.items(), key=lambda item: -item[1])
+
+
+def outstanding_in_python(conn):
+    balance = defaultdict(int)
+    contracts = conn.query(Contract).options(
+        joinedload(Contract.customer).joinedload(Customer.company)
+    )
+    for contract in contracts:
+        if contract.signed and contract.amount_due > 0:
+            balance[contract.customer.company.name] += contract.amount_due
+    return sorted(balance.items(), key=lambda item: -item[1])
+
+
+def events_in_python(conn):
+    events = Counter()
+    for event in conn.query(Event).options(joinedload(Event.support_rep)):
+        events[event.support_rep.username, event.start_date.strftime("%Y-%m")] += 1
+    return sorted(events.items())
+
+
+REPORTS = {
+    "revenue": (reports.revenue_by_sales_rep, revenue_in_python),
+    "outstanding": (reports.outstanding_by_company, outstanding_in_python),
+    "events": (reports.events_by_support_rep, events_in_python),
+}
+
+
+def median_ms(engine, report):
+    timings = []
+    for _ in range(args.runs):
+        with Session(engine) as conn:
+            start = time.perf_counter()
+            result = report(conn)
+            rows = len(result.all() if hasattr(result, "all") else result)
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), rows
+
+
+for rows in args.rows:
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    engine = create_engine(f"sqlite:///{args.db}")
+    Base.metadata.create_all(engine)
+    upgrade(engine)
+    with engine.begin() as connection:
+        seed(connection, rows)
+
+    print(f"{rows} contracts, {rows // 2} events")
+    for name, (in_sql, in_python) in REPORTS.items():
+        sql_ms, groups = median_ms(engine, in_sql)
+        python_ms, _ = median_ms(engine, in_python)
+        print(
+            f"    {name}: {groups} rows, SQL {sql_ms:.1f} ms, "
+            f"Python {python_ms:.1f} ms ({python_ms / sql_ms:.0f}x)"
+        )
+    engine.dispose()
@@ -0,0 +1,106 @@
+"""
+Latency of the full-text search, against the LIKE scan it replaces.
+
+Builds a throwaway SQLite database with synthetic events, with notes of a few
+random words each, a few of them rare, and times searches through the FTS5
+index (ranked, 20 best hits) and through `LIKE '%word%'` conditions on the same
+columns, which must scan every event to find all the matches.
+
+    python scripts/bench_search.py [--db /tmp/bench_search.sqlite] [--rows 200000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+from sqlalchemy import and_, create_engine, insert, or_
+from sqlalchemy.orm import Session
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+parser.add_argument("--db", default="/tmp/bench_search.sqlite")
+parser.add_argument("--rows", type=int, default=200_000)
+parser.add_argument("--runs", type=int, default=5)
+args = parser.parse_args()
+
+from epic_events.migrations import upgrade
+from epic_events.models import Base
+from epic_events.models.contracts import Contract
+from epic_events.models.events import Event
+from epic_events.models.search import search
+
+CITIES = ("Lyon", "Paris", "Marseille", "Lille", "Nantes", "Bordeaux", "Nice")
+WORDS = (
+    "catering buffet cocktail stage sound lighting parking shuttle vegan "
+    "rooftop garden terrace projector wifi security cloakroom photographer "
+    "band dj dinner lunch brunch seminar wedding gala badge signage"
+).split()
+RARE_WORDS = ("helicopter", "fireworks", "harpist", "sommelier")
+SEARCHES = ("lyon catering", "rooftop vegan", "helicopter", "harpist nice", "sommel")
+
+
+def seed(connection, rows):
+    rng = random.Random(21)
+    connection.execute(
+        insert(Contract),
+        [{"id": i, "value": 1000, "amount_due": 0} for i in range(1, rows + 1)],
+    )
+    connection.execute(
+        insert(Event),
+        [
+            {
+                "id": i,
+                "name": f"Event {i}",
+                "contract_id": i,
+                "location": rng.choice(CITIES),
+                "notes": " ".join(
+                    rng.sample(WORDS, rng.randint(3, 12))
+                    + ([rng.choice(RARE_WORDS)] if rng.random() < 0.001 else [])
+                ),
+            }
+            for i in range(1, rows + 1)
+        ],
+    )
+
+
+def like_search(conn, terms):
+    columns = (Event.name, Event.location, Event.notes)
+    return (
+        conn.query(Event.id, Event.name)
+        .filter(
+            and_(
+                *(
+                    or_(*(column.ilike(f"%{word}%") for column in columns))
+                    for word in terms.split()
+                )
+            )
+        )
+        .all()
+    )
+
+
+def median_ms(engine, run, terms):
+    timings = []
+    for _ in range(args.runs):
+        with Session(engine) as conn:
+            start = time.perf_counter()
+            hits = len(run(conn, terms))
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), hits
+
+
+if os.path.exists(args.db):
+    os.remove(args.db)
+engine = create_engine(f"sqlite:///{args.db}")
+Base.metadata.create_all(engine)
+upgrade(engine)
+with engine.begin() as connection:
+    start = time.perf_counter()
+    seed(connection, args.rows)
+    print(f"{args.rows} events indexed in {time.perf_counter() - start:.1f} s\n")
+
+for terms in SEARCHES:
+    fts_ms, _ = median_ms(engine, search, terms)
+    like_ms, matches = median_ms(engine, like_search, terms)
+    print(f"{terms!r}: {matches} matches, FTS5 {fts_ms:.2f} ms, LIKE {like_ms:.1f} ms")
@@ -0,0 +1,113 @@
+"""
+Cold start benchmark for the epic_events CLI.
+
+Runs trivial commands under `python -X importtime` and exits with status 1
+when one of them imports a module that must stay lazy, or when its median
+import time goes over its budget, or the one given.
+
+    python scripts/bench_startup.py [--runs 5] [--budget-ms 300]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Trivial commands, with the lazy modules each of them still needs and their
+# import time budget in ms.
+TRIVIAL_COMMANDS = (
+    (["--help"], (), 300),
+    # Verifies the token claims, without the database. The settings holding
+    # the secret key cost about 120 ms of pydantic.
+    (["whoami"], ("jwt", "pydantic", "dotenv", "epic_events.auth"), 450),
+)
+
+# Modules that no trivial command is allowed to import.
+LAZY_MODULES = (
+    "sqlalchemy",
+    "passlib",
+    "jwt",
+    "psutil",
+    "sentry_sdk",
+    "pydantic",
+    "dotenv",
+    "epic_events.models",
+    "epic_events.auth",
+)
+
+
+def run_importtime(argv):
+    """
+    Run the CLI once under -X importtime.
+
+    Args:
+        argv (list[str]): The CLI arguments.
+
+    Returns:
+        tuple[float, float, set[str]]: Wall time (ms), summed self import time
+        (ms) and the names of all imported modules.
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "epic_events", *argv],
+        capture_output=True,
+        text=True,
+        # Measure the CLI itself, not a running command daemon.
+        env={**os.environ, "DAEMON_SOCKET": ""},
+        check=False,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        if not self_us.strip().isdigit():
+            continue
+        total_us += int(self_us)
+        modules.add(name.strip())
+    return wall_ms, total_us / 1000, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    failed = False
+    for argv, allowed, budget_ms in TRIVIAL_COMMANDS:
+        budget_ms = args.budget_ms or budget_ms
+        samples = [run_importtime(argv) for _ in range(args.runs)]
+        wall_ms = statistics.median(sample[0] for sample in samples)
+        import_ms = statistics.median(sample[1] for sample in samples)
+        leaked = [
+            lazy
+            for lazy in LAZY_MODULES
+            if lazy not in allowed
+            and any(
+                module == lazy or module.startswith(f"{lazy}.")
+                for module in samples[0][2]
+            )
+        ]
+
+        status = "ok"
+        if leaked or import_ms > budget_ms:
+            status = "FAIL"
+            failed = True
+        print(
+            f"{status:4} epic_events {' '.join(argv):20} "
+            f"wall {wall_ms:7.1f} ms  imports {import_ms:7.1f} ms"
+        )
+        if leaked:
+            print(f"     eagerly imported: {', '.join(leaked)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Dashboard reads from the summary tables, against the same totals recomputed.
+
+Builds throwaway SQLite databases of growing sizes, with the same number of
+sales reps and support reps, times the inserts with and without the summary
+triggers, then each dashboard read both from its summary table and from the
+source tables.
+
+    python scripts/bench_summaries.py [--db /tmp/bench_summaries.sqlite] [--rows 10000 100000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, text
+from sqlalchemy.orm import Session
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+parser.add_argument("--db", default="/tmp/bench_summaries.sqlite")
+parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+parser.add_argument("--runs", type=int, default=5)
+args = parser.parse_args()
+
+from epic_events.migrations import upgrade
+from epic_events.models import Base, summaries
+from epic_events.models.contracts import Contract
+from epic_events.models.customers import Customer
+from epic_events.models.events import Event
+from epic_events.models.users import SalesRep, SupportRep, User
+
+SALES_REPS = range(1, 51)
+SUPPORT_REPS = range(1001, 1021)
+TODAY = date(2024, 7, 1)
+
+
+def seed(connection, rows):
+    rng = random.Random(19)
+    start = datetime(2024, 1, 1)
+    connection.execute(
+        insert(User),
+        [
+            {
+                "id": user_id,
+                "username": f"user{user_id}",
+                "email": f"user{user_id}@ee.com",
+                "password": "-",
+                "user_type": user_type,
+            }
+            for user_ids, user_type in (
+                (SALES_REPS, "sales_rep"),
+                (SUPPORT_REPS, "support_rep"),
+            )
+            for user_id in user_ids
+        ],
+    )
+    connection.execute(
+        insert(SalesRep.__table__), [{"id": user_id} for user_id in SALES_REPS]
+    )
+    connection.execute(
+        insert(SupportRep.__table__), [{"id": user_id} for user_id in SUPPORT_REPS]
+    )
+    connection.execute(
+        insert(Customer),
+        [
+            {"id": i, "name": f"Customer {i}", "sales_rep_id": rng.choice(SALES_REPS)}
+            for i in range(1, rows + 1)
+        ],
+    )
+    connection.execute(
+        insert(Contract),
+        [
+            {
+                "id": i,
+                "customer_id": i,
+                "sales_rep_id": rng.choice(SALES_REPS),
+                "value": 1000,
+                "amount_due": rng.choice((0, 500, 1000)),
+                "signed": rng.random() < 0.7,
+            }
+            for i in range(1, rows + 1)
+        ],
+    )
+    connection.execute(
+        insert(Event),
+        [
+            {
+                "id": i,
+                "name": f"Event {i}",
+                "contract_id": i,
+                "support_rep_id": rng.choice(SUPPORT_REPS),
+                "start_date": day,
+                "end_date": day + timedelta(days=rng.randint(0, 3)),
+            }
+            for i in range(1, rows + 1)
+            for day in (start + timedelta(hours=rng.randint(0, 24 * 365)),)
+        ],
+    )
+
+
+def sales_reps_recomputed(conn):
+    return conn.execute(summaries.sales_rep_balance_rows(conn))
+
+
+def customers_recomputed(conn):
+    balance = func.sum(Contract.amount_due)
+    return (
+        conn.query(Contract.customer_id, balance)
+        .filter(Contract.signed.is_(True))
+        .group_by(Contract.customer_id)
+        .having(balance > 0)
+        .order_by(balance.desc())
+        .limit(20)
+    )
+
+
+def open_events_recomputed(conn):
+    return (
+        conn.query(Event.support_rep_id, func.count(Event.id))
+        .filter(Event.end_date >= datetime.combine(TODAY, datetime.min.time()))
+        .group_by(Event.support_rep_id)
+    )
+
+
+DASHBOARDS = {
+    "sales reps": (summaries.sales_rep_balances, sales_reps_recomputed),
+    "top 20 customers": (
+        lambda conn: summaries.customer_balances(conn).limit(20),
+        customers_recomputed,
+    ),
+    "open events": (
+        lambda conn: summaries.open_events(conn, TODAY),
+        open_events_recomputed,
+    ),
+}
+
+
+def median_ms(engine, read):
+    timings = []
+    for _ in range(args.runs):
+        with Session(engine) as conn:
+            start = time.perf_counter()
+            rows = len(read(conn).all())
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), rows
+
+
+def build(rows, triggers):
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    engine = create_engine(f"sqlite:///{args.db}")
+    Base.metadata.create_all(engine)
+    upgrade(engine)
+    with engine.begin() as connection:
+        if not triggers:
+            names = connection.scalars(
+                text("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            ).all()
+            for name in names:
+                connection.execute(text(f"DROP TRIGGER {name}"))
+        start = time.perf_counter()
+        seed(connection, rows)
+    return engine, time.perf_counter() - start
+
+
+for rows in args.rows:
+    engine, plain = build(rows, triggers=False)
+    engine.dispose()
+    engine, triggered = build(rows, triggers=True)
+    print(f"{rows} customers, contracts and events")
+    print(f"    inserts: {plain:.2f} s without triggers, {triggered:.2f} s with")
+    for name, (from_summary, recomputed) in DASHBOARDS.items():
+        summary_ms, groups = median_ms(engine, from_summary)
+        recomputed_ms, _ = median_ms(engine, recomputed)
+        print(
+            f"    {name}: {groups} rows, summary {summary_ms:.2f} ms, "
+            f"recomputed {recomputed_ms:.1f} ms"
+        )
+    engine.dispose()
@@ -0,0 +1,101 @@
+"""
+Token storage servers under concurrent clients: bubble against the bundled
+Python server (epic_events.auth.server).
+
+Each server is spawned on a temporary socket, then --clients processes send
+--requests GET requests each, over a persistent protocol v2 connection and
+with a legacy connection per request.
+
+    python scripts/bench_token_server.py [--bubble ~/bin/bubble] [--clients 8] [--requests 2000]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from epic_events.auth.storage import TokenStorage
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+parser.add_argument("--bubble", default=os.getenv("BIN_PATH"))
+parser.add_argument("--clients", type=int, default=8)
+parser.add_argument("--requests", type=int, default=2000)
+args = parser.parse_args()
+
+TOKEN = "t" * 400
+
+
+def v2_client(socket_path):
+    storage = TokenStorage(socket_path=socket_path)
+    timings = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        storage.request_token()
+        timings.append(time.perf_counter() - start)
+    storage.close()
+    return timings
+
+
+def legacy_client(socket_path):
+    timings = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+        sock.sendall(b"get_token")
+        sock.recv(1024)
+        sock.close()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def spawn(command, socket_path):
+    process = subprocess.Popen(
+        command,
+        env={**os.environ, "SOCKET_PATH": socket_path},
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while not os.path.exists(socket_path):
+        if time.monotonic() > deadline:
+            process.kill()
+            sys.exit(f"{command[0]} did not start")
+        time.sleep(0.01)
+    return process
+
+
+servers = {"python": [sys.executable, "-m", "epic_events.auth.server"]}
+if args.bubble:
+    servers["bubble"] = [os.path.expanduser(args.bubble)]
+else:
+    print("BIN_PATH is not set: only the Python server is measured.\n")
+
+workdir = tempfile.mkdtemp(prefix="bench_token_server_")
+print(
+    f"{args.clients} clients x {args.requests} GET requests\n\n"
+    f"{'server':<10}{'protocol':<10}{'requests/s':>12}{'p50 µs':>10}{'p99 µs':>10}"
+)
+for name, command in servers.items():
+    socket_path = os.path.join(workdir, f"{name}.sock")
+    process = spawn(command, socket_path)
+    try:
+        TokenStorage(socket_path=socket_path).send_token(TOKEN)
+        for protocol, client in (("v2", v2_client), ("legacy", legacy_client)):
+            start = time.perf_counter()
+            with ProcessPoolExecutor(args.clients) as pool:
+                results = list(pool.map(client, [socket_path] * args.clients))
+            elapsed = time.perf_counter() - start
+            timings = [timing * 1e6 for result in results for timing in result]
+            percentiles = statistics.quantiles(timings, n=100)
+            print(
+                f"{name:<10}{protocol:<10}{len(timings) / elapsed:>12.0f}"
+                f"{percentiles[49]:>10.1f}{percentiles[98]:>10.1f}"
+            )
+    finally:
+        process.terminate()
+        process.wait()
@@ -0,0 +1,76 @@
+"""
+Round-trip latency of the token storage, legacy protocol against protocol v2.
+
+Spawns a storage (BIN_PATH) on a temporary socket, stores a token and fetches
+it with: a new connection and a plain string per request (legacy), the
+persistent framed connection, and pipelines of --batch requests.
+
+    python scripts/bench_token_storage.py [--requests 2000] [--batch 50] [--token-size 400]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import tempfile
+import time
+
+from epic_events.auth.storage import OP_GET, TokenStorage
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+parser.add_argument("--requests", type=int, default=2000)
+parser.add_argument("--batch", type=int, default=50)
+parser.add_argument("--token-size", type=int, default=400)
+args = parser.parse_args()
+
+socket_path = os.path.join(tempfile.mkdtemp(prefix="bench_storage_"), "bubble.sock")
+# The storage reads its socket path from the environment.
+os.environ["SOCKET_PATH"] = socket_path
+storage = TokenStorage(socket_path=socket_path)
+token = "t" * args.token_size
+
+
+def legacy_get():
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(socket_path)
+    sock.sendall(b"get_token")
+    response = sock.recv(1024)
+    sock.close()
+    return response
+
+
+def v2_get():
+    return storage.request_token()
+
+
+def v2_pipelined_get():
+    return storage.pipeline([(OP_GET, b"")] * args.batch)
+
+
+def latency_us(request, requests_per_call=1):
+    timings = []
+    for _ in range(args.requests // requests_per_call):
+        start = time.perf_counter()
+        request()
+        timings.append((time.perf_counter() - start) / requests_per_call * 1e6)
+    return statistics.median(timings), statistics.quantiles(timings, n=100)[98]
+
+
+try:
+    storage.send_token(token)
+    assert storage.request_token() == token
+    legacy_token = legacy_get().decode("utf-8")
+    print(
+        f"{args.requests} requests, {args.token_size} byte token "
+        f"(legacy returned {len(legacy_token)} bytes of it)\n"
+    )
+    print(f"{'protocol':<28}{'median µs':>12}{'p99 µs':>12}")
+    for name, request, per_call in (
+        ("legacy, connection/request", legacy_get, 1),
+        ("v2, persistent", v2_get, 1),
+        (f"v2, pipelines of {args.batch}", v2_pipelined_get, args.batch),
+    ):
+        median, p99 = latency_us(request, per_call)
+        print(f"{name:<28}{median:>12.1f}{p99:>12.1f}")
+finally:
+    storage.terminate()
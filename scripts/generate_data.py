@@ -0,0 +1,254 @@
+"""
+Deterministic synthetic database at production volumes.
+
+Creates a new SQLite database with `--rows` customers and the users,
+companies, contracts and events around them. The same --rows and --seed always
+give the same rows:
+
+- one manager per 20 000 customers, one sales rep per 400 and one support rep
+  per 1 000 (at least two of each), and an `admin`, all with --password;
+- one company per 8 customers, a few large accounts holding most of them;
+- 2% of the customers without sales rep, the others shared unevenly between
+  the reps;
+- a contract for 90% of the customers, with log-normal values, 75% signed and
+  most of those paid;
+- an event for 80% of the signed contracts, over 2024-2026, lasting one to
+  four days, 10% without support rep.
+
+Rows are inserted with multi-row INSERTs before the migrations run, so that
+the summary tables and the search index are populated in bulk.
+
+    python scripts/generate_data.py --db /tmp/epic_events.sqlite [--rows 100000] [--seed 23]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+parser.add_argument("--db", required=True, help="Path of the SQLite file to create.")
+parser.add_argument("--rows", type=int, default=100_000, help="Number of customers.")
+parser.add_argument("--seed", type=int, default=23)
+parser.add_argument("--password", default="password")
+parser.add_argument("--batch-size", type=int, default=10_000)
+parser.add_argument(
+    "--force", action="store_true", help="Overwrite an existing database."
+)
+args = parser.parse_args()
+
+from sqlalchemy import insert
+
+from epic_events.migrations import upgrade
+from epic_events.models import Base, create_engine
+from epic_events.models.companies import Company
+from epic_events.models.contracts import Contract
+from epic_events.models.customers import Customer
+from epic_events.models.events import Event
+from epic_events.models.users import USER_CLASSES, User, UserType, hash_password
+
+PREFIXES = (
+    "Alpha Beta Blue Bright Cedar Delta Green Iron Lumen Nova North Oak Orion "
+    "Pacific Prime Red Silver Solar Summit Vertex"
+).split()
+SUFFIXES = (
+    "Consulting Events Foods Group Industries Labs Logistics Media Partners "
+    "Retail Systems Studio Technologies Ventures"
+).split()
+FIRST_NAMES = (
+    "Alice Bruno Camille Chloe David Emma Hugo Ines Jules Lea Louis Lucas "
+    "Manon Nathan Sarah Theo"
+).split()
+LAST_NAMES = (
+    "Bernard Bonnet Dubois Durand Fournier Girard Lambert Laurent Leroy Martin "
+    "Moreau Petit Richard Robert Roux Simon"
+).split()
+# City -> weight, the largest cities hosting most events.
+CITIES = {
+    "Paris": 30,
+    "Lyon": 15,
+    "Marseille": 12,
+    "Lille": 8,
+    "Bordeaux": 8,
+    "Toulouse": 8,
+    "Nantes": 6,
+    "Nice": 5,
+    "Strasbourg": 4,
+    "Rennes": 4,
+}
+EVENT_KINDS = "Conference Gala Seminar Wedding Launch Workshop Party Retreat".split()
+NOTES = (
+    "catering buffet cocktail stage sound lighting parking shuttle vegan "
+    "rooftop garden terrace projector wifi security cloakroom photographer "
+    "band dj dinner lunch brunch badge signage interpreter accessibility"
+).split()
+FIRST_DAY = datetime(2024, 1, 1)
+DAYS = 3 * 365
+
+
+def skewed(rng, count):
+    """Pick an index in range(count), the first ones much more often."""
+    return int(count * rng.random() ** 3)
+
+
+def users(rows):
+    """
+    Yields:
+        tuple[UserType, str]: The type and username of each user, admin first.
+    """
+    yield UserType.ADMIN, "admin"
+    for user_type, prefix, per in (
+        (UserType.MANAGER, "manager", 20_000),
+        (UserType.SALES_REP, "sales", 400),
+        (UserType.SUPPORT_REP, "support", 1_000),
+    ):
+        for i in range(1, max(2, rows // per) + 1):
+            yield user_type, f"{prefix}{i}"
+
+
+def company_rows(rng, count):
+    for i in range(1, count + 1):
+        yield {
+            "id": i,
+            "name": f"{rng.choice(PREFIXES)} {rng.choice(SUFFIXES)} {i}",
+        }
+
+
+def customer_rows(rng, rows, companies, sales_reps):
+    rep_weights = list(itertools.accumulate(rng.paretovariate(2) for _ in sales_reps))
+    for i in range(1, rows + 1):
+        assigned = rng.random() >= 0.02
+        yield {
+            "id": i,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+            "company_id": skewed(rng, companies) + 1,
+            "sales_rep_id": (
+                rng.choices(sales_reps, cum_weights=rep_weights)[0]
+                if assigned
+                else None
+            ),
+        }
+
+
+def contract_rows(rng, rows, sales_reps, signed_ids):
+    contract_id = 0
+    for customer_id in range(1, rows + 1):
+        if rng.random() >= 0.9:
+            continue
+        contract_id += 1
+        value = round(min(rng.lognormvariate(9, 0.8), 500_000), 2)
+        signed = rng.random() < 0.75
+        if signed:
+            signed_ids.append(contract_id)
+            amount_due = 0 if rng.random() < 0.6 else round(value * rng.random(), 2)
+        else:
+            amount_due = value
+        yield {
+            "id": contract_id,
+            "customer_id": customer_id,
+            "sales_rep_id": rng.choice(sales_reps),
+            "value": value,
+            "amount_due": amount_due,
+            "signed": signed,
+        }
+
+
+def event_rows(rng, signed_ids, support_reps):
+    cities, city_weights = list(CITIES), list(itertools.accumulate(CITIES.values()))
+    event_id = 0
+    for contract_id in signed_ids:
+        if rng.random() >= 0.8:
+            continue
+        event_id += 1
+        start_date = FIRST_DAY + timedelta(days=rng.randrange(DAYS))
+        yield {
+            "id": event_id,
+            "name": f"{rng.choice(EVENT_KINDS)} {event_id}",
+            "contract_id": contract_id,
+            "support_rep_id": (
+                rng.choice(support_reps) if rng.random() >= 0.1 else None
+            ),
+            "start_date": start_date,
+            "end_date": start_date + timedelta(days=rng.choice((0, 0, 1, 1, 2, 3))),
+            "location": rng.choices(cities, cum_weights=city_weights)[0],
+            "attendees": int(rng.lognormvariate(4, 1)) + 5,
+            "notes": " ".join(rng.sample(NOTES, rng.randint(2, 8))),
+        }
+
+
+def insert_rows(connection, table, rows):
+    """
+    Insert rows with one multi-row INSERT per batch.
+
+    Returns:
+        int: The number of rows inserted.
+    """
+    count = 0
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, args.batch_size)):
+        connection.execute(insert(table), batch)
+        count += len(batch)
+    return count
+
+
+if os.path.exists(args.db):
+    if not args.force:
+        parser.error(f"{args.db} exists, use --force to overwrite it.")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+
+start = time.perf_counter()
+rng = random.Random(args.seed)
+engine = create_engine(f"sqlite:///{args.db}", profile="batch")
+Base.metadata.create_all(engine)
+
+# Every user shares one hash: bcrypt is slow on purpose.
+password_hash = hash_password(args.password)
+user_ids = {user_type: [] for user_type in UserType}
+user_rows = []
+for user_id, (user_type, username) in enumerate(users(args.rows), start=1):
+    user_ids[user_type].append(user_id)
+    user_rows.append(
+        {
+            "id": user_id,
+            "username": username,
+            "email": f"{username}@ee.com",
+            "password": password_hash,
+            "user_type": user_type.value,
+        }
+    )
+sales_reps = user_ids[UserType.SALES_REP]
+support_reps = user_ids[UserType.SUPPORT_REP]
+companies = max(1, args.rows // 8)
+signed_ids = []
+
+counts = {}
+with engine.begin() as connection:
+    counts["users"] = insert_rows(connection, User, user_rows)
+    for user_type, ids in user_ids.items():
+        insert_rows(
+            connection, USER_CLASSES[user_type].__table__, ({"id": i} for i in ids)
+        )
+    counts["companies"] = insert_rows(connection, Company, company_rows(rng, companies))
+    counts["customers"] = insert_rows(
+        connection, Customer, customer_rows(rng, args.rows, companies, sales_reps)
+    )
+    counts["contracts"] = insert_rows(
+        connection, Contract, contract_rows(rng, args.rows, sales_reps, signed_ids)
+    )
+    counts["events"] = insert_rows(
+        connection, Event, event_rows(rng, signed_ids, support_reps)
+    )
+inserted = time.perf_counter()
+
+upgrade(engine)
+engine.dispose()
+
+print(", ".join(f"{count} {table}" for table, count in counts.items()))
+print(
+    f"inserted in {inserted - start:.1f} s, "
+    f"migrated in {time.perf_counter() - inserted:.1f} s: {args.db}"
+)
@@ -0,0 +1,9 @@
+from epic_events.migrations import upgrade
+from epic_events.models import get_engine
+
+applied = upgrade(get_engine())
+if applied:
+    for version in applied:
+        print(f"Applied {version}")
+else:
+    print("Database is up to date")
@@ -0,0 +1,133 @@
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+from typer.testing import CliRunner
+
+import epic_events.models
+from epic_events import sql_report
+from epic_events.auth import utils
+from epic_events.cli import app
+from epic_events.migrations import upgrade
+from epic_events.models import Base, session
+from epic_events.models.companies import Company
+from epic_events.models.contracts import Contract
+from epic_events.models.customers import Customer
+from epic_events.models.events import Event
+from epic_events.models.users import Admin, SalesRep, SupportRep
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """
+    An empty in-memory database, created like `just setup-db` does, and used by
+    the application session.
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    upgrade(engine)
+    sql_report.instrument_engine(engine)
+    monkeypatch.setattr(epic_events.models, "get_engine", lambda: engine)
+    session.remove()
+    yield engine
+    session.remove()
+    engine.dispose()
+
+
+@pytest.fixture
+def statements(engine):
+    """The SQL statements run on the database, in order."""
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        statements.append(statement)
+
+    return statements
+
+
+@pytest.fixture
+def admin(engine):
+    """Log in as an admin, with claims valid for an hour."""
+    with session() as db:
+        user = Admin(username="admin", email="admin@ee.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    now = int(time.time())
+    utils.reset_current_user()
+    utils._current_claims.set(
+        utils.Claims(user_id, "admin", "admin", 0, now, now + 3600)
+    )
+    yield user_id
+    utils.reset_current_user()
+
+
+def seed_rows(count: int, first: int = 0) -> None:
+    """
+    Add `count` customers, each with a company, a signed contract and an
+    event, shared between three new sales reps and three new support reps.
+    Rows are numbered from `first`, so that seeding again adds to them.
+    """
+    with session() as db:
+        sales_reps = [
+            SalesRep(username=f"sales{i}", email=f"sales{i}@ee.com", password_hash="x")
+            for i in range(first, first + 3)
+        ]
+        support_reps = [
+            SupportRep(
+                username=f"support{i}", email=f"support{i}@ee.com", password_hash="x"
+            )
+            for i in range(first, first + 3)
+        ]
+        db.add_all(sales_reps + support_reps)
+        start = datetime(2026, 1, 1)
+        for i in range(first, first + count):
+            company = Company(name=f"Company {i}")
+            customer = Customer(
+                name=f"Customer {i}",
+                company=company,
+                sales_rep=sales_reps[i % 3],
+            )
+            contract = Contract(
+                customer=customer,
+                sales_rep=sales_reps[i % 3],
+                value=Decimal("1000.00"),
+                amount_due=Decimal("0.00"),
+                signed=True,
+            )
+            db.add(
+                Event(
+                    name=f"Event {i}",
+                    contract=contract,
+                    support_rep=support_reps[i % 3],
+                    start_date=start + timedelta(days=i),
+                    end_date=start + timedelta(days=i + 1),
+                    location="Paris",
+                )
+            )
+        db.commit()
+
+
+@pytest.fixture
+def seed(engine):
+    """Add customers and the rows around them, see seed_rows."""
+    return seed_rows
+
+
+@pytest.fixture
+def run():
+    """Run a CLI command in this process, and return its result."""
+    runner = CliRunner()
+
+    def run(*args: str):
+        return runner.invoke(app, list(args), catch_exceptions=False)
+
+    return run
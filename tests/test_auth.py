@@ -0,0 +1,62 @@
+import time
+
+import pytest
+import typer
+import typer.main
+from sqlalchemy import update
+
+from epic_events.apps.shell import run_command
+from epic_events.auth import utils
+from epic_events.cli import app
+from epic_events.models import session
+from epic_events.models.users import User
+
+
+def revoke(engine, user_id: int) -> None:
+    """Revoke the sessions of a user from another connection, as `logout --all`."""
+    with engine.begin() as connection:
+        connection.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(token_version=User.token_version + 1)
+        )
+
+
+def test_cached_claims_expire(admin):
+    claims = utils.get_current_claims()
+    utils._current_claims.set(
+        utils.Claims(
+            claims.user_id,
+            claims.username,
+            claims.user_type,
+            claims.token_version,
+            claims.issued_at,
+            int(time.time()) - 1,
+        )
+    )
+
+    with pytest.raises(typer.Exit):
+        utils.get_current_claims()
+    assert utils._current_claims.get() is None
+
+
+def test_cached_user_does_not_bypass_revocation(engine, admin):
+    utils.get_current_user()
+    utils.allow_users(utils.ADMINS, check_revoked=True)
+
+    revoke(engine, admin)
+
+    with pytest.raises(typer.Exit):
+        utils.allow_users(utils.ADMINS, check_revoked=True)
+
+
+def test_shell_commands_see_a_revocation(engine, admin, seed, capsys):
+    seed(1)
+    root = typer.main.get_command(app)
+    session().expire_on_commit = False
+    utils.get_current_user()
+
+    revoke(engine, admin)
+
+    assert run_command(root, ["customers", "delete", "1"]) == 1
+    assert "revoked" in capsys.readouterr().out
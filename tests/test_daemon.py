@@ -0,0 +1,58 @@
+import contextvars
+from pathlib import Path
+
+import pytest
+import typer
+import typer.main
+
+from epic_events.daemon import _client_cwd, resolve_client_paths
+
+
+@pytest.fixture
+def command():
+    app = typer.Typer()
+    received = []
+
+    @app.command()
+    def copy(
+        source: Path = typer.Argument(..., exists=True, dir_okay=False),
+        target: Path = typer.Option(Path("out"), "--target"),
+    ):
+        received.extend((source, target))
+
+    command = typer.main.get_command(app)
+    resolve_client_paths(command)
+    return command, received
+
+
+def run_from(cwd, command, args: list[str]) -> None:
+    def run():
+        _client_cwd.set(str(cwd))
+        command.main(args, standalone_mode=False)
+
+    contextvars.Context().run(run)
+
+
+def test_relative_paths_are_resolved_against_the_client_cwd(tmp_path, command):
+    command, received = command
+    (tmp_path / "in.csv").write_text("")
+
+    run_from(tmp_path, command, ["in.csv", "--target", "snapshot"])
+
+    assert received == [tmp_path / "in.csv", tmp_path / "snapshot"]
+
+
+def test_absolute_paths_are_kept(tmp_path, command):
+    command, received = command
+    (tmp_path / "in.csv").write_text("")
+
+    run_from("/elsewhere", command, [str(tmp_path / "in.csv")])
+
+    assert received[0] == tmp_path / "in.csv"
+
+
+def test_existence_is_checked_in_the_client_cwd(tmp_path, command):
+    command, _ = command
+
+    with pytest.raises(Exception, match="does not exist"):
+        run_from(tmp_path, command, ["in.csv"])
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+import epic_events.apps.customers
+from epic_events.models import session
+from epic_events.models.customers import Customer
+from epic_events.models.imports import load_progress
+from epic_events.models.users import SalesRep
+
+
+@pytest.fixture
+def customers_csv(tmp_path, admin, seed):
+    seed(0)
+    (sales_rep_id,) = session.query(SalesRep.id).first()
+    session.remove()
+    path = tmp_path / "customers.csv"
+    lines = ["name,company,sales_rep_id"]
+    lines += [f"Customer {i},Company {i % 4},{sales_rep_id}" for i in range(25)]
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def fail_on_batch(monkeypatch, number: int):
+    """
+    Make the import crash on the given batch, counting from 1.
+
+    Returns:
+        A callable undoing it.
+    """
+    calls = []
+    get_or_create_companies = epic_events.apps.customers.get_or_create_companies
+
+    def failing(conn, names):
+        calls.append(names)
+        if len(calls) == number:
+            raise RuntimeError("crash")
+        return get_or_create_companies(conn, names)
+
+    monkeypatch.setattr(epic_events.apps.customers, "get_or_create_companies", failing)
+    return lambda: monkeypatch.setattr(
+        epic_events.apps.customers, "get_or_create_companies", get_or_create_companies
+    )
+
+
+def test_import_resumes_without_duplicates(run, customers_csv, monkeypatch):
+    repair = fail_on_batch(monkeypatch, 3)
+    with pytest.raises(RuntimeError):
+        run("customers", "import", str(customers_csv), "--batch-size", "10")
+    session.remove()
+    assert session.query(Customer).count() == 20
+    assert load_progress(session, customers_csv)["records"] == 20
+
+    repair()
+    result = run("customers", "import", str(customers_csv), "--batch-size", "10")
+
+    assert result.exit_code == 0, result.output
+    assert "Resuming after 20 records." in result.output
+    session.remove()
+    assert session.query(Customer).count() == 25
+    assert load_progress(session, customers_csv) is None
+
+
+def test_import_does_not_resume_on_a_changed_file(run, customers_csv, monkeypatch):
+    repair = fail_on_batch(monkeypatch, 2)
+    with pytest.raises(RuntimeError):
+        run("customers", "import", str(customers_csv), "--batch-size", "10")
+    repair()
+    with open(customers_csv, "a") as file:
+        file.write("Late customer,Company 0,2\n")
+    os.utime(customers_csv, ns=(0, 0))
+
+    result = run("customers", "import", str(customers_csv), "--batch-size", "10")
+
+    assert result.exit_code == 1
+    assert "changed since its import stopped" in result.output
+    session.remove()
+    assert session.query(Customer).count() == 10
+
+    result = run(
+        "customers", "import", str(customers_csv), "--batch-size", "10", "--restart"
+    )
+    assert result.exit_code == 0, result.output
+    session.remove()
+    assert session.query(Customer).count() == 36
@@ -0,0 +1,45 @@
+import pytest
+
+from epic_events.models import session
+
+LIST_COMMANDS = ("users", "companies", "customers", "contracts", "events")
+
+
+def count_statements(run, statements, *args: str) -> int:
+    session.remove()
+    statements.clear()
+    result = run(*args)
+    assert result.exit_code == 0, result.output
+    return len(statements)
+
+
+@pytest.mark.parametrize("command", LIST_COMMANDS)
+def test_list_statements_do_not_grow_with_rows(run, statements, admin, seed, command):
+    seed(10)
+    small = count_statements(run, statements, command, "list")
+    seed(190, first=10)
+    large = count_statements(run, statements, command, "list")
+
+    # A single page, plus the customers of all the companies at once.
+    assert small == large == (2 if command == "companies" else 1)
+
+
+@pytest.mark.parametrize(
+    "command, statements_count",
+    [
+        # 7 users: the admin and the reps, in one page.
+        ("users", 1),
+        # 75 rows in pages of 30, 30 and 15, with their companies' customers.
+        ("companies", 6),
+        ("customers", 3),
+        ("contracts", 3),
+        ("events", 3),
+    ],
+)
+def test_list_statements_grow_with_pages_only(
+    run, statements, admin, seed, command, statements_count
+):
+    seed(75)
+    count = count_statements(run, statements, command, "list", "--page-size", "30")
+
+    assert count == statements_count
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from epic_events.models import session
+from epic_events.models.events import Event
+from epic_events.models.schedule import find_conflicts, longest_event, schedule_query
+from epic_events.models.users import SupportRep
+
+DAY = datetime(2026, 3, 1)
+
+
+@pytest.fixture
+def support_rep_id(engine, seed):
+    seed(3)
+    (support_rep_id,) = session.query(SupportRep.id).first()
+    return support_rep_id
+
+
+def book(support_rep_id: int, event_id: int, start, end) -> Event:
+    """Move a seeded event to a support rep and dates."""
+    event = session.get(Event, event_id)
+    event.support_rep_id = support_rep_id
+    event.start_date, event.end_date = start, end
+    session.commit()
+    return event
+
+
+def test_longest_event_is_rounded_up_to_whole_days(support_rep_id):
+    book(support_rep_id, 1, DAY, DAY + timedelta(days=90, hours=1))
+
+    assert longest_event(session, support_rep_id) == timedelta(days=91)
+
+
+def test_schedule_finds_the_longest_events_started_before(support_rep_id):
+    longest = book(support_rep_id, 1, DAY - timedelta(days=400), DAY)
+    book(support_rep_id, 2, DAY - timedelta(days=400), DAY - timedelta(days=1))
+
+    events = schedule_query(session, support_rep_id, DAY, DAY).all()
+
+    assert [event.id for event in events] == [longest.id]
+
+
+def test_schedule_scans_a_bounded_range_of_the_index(support_rep_id):
+    book(support_rep_id, 1, DAY, DAY + timedelta(days=2))
+    query = schedule_query(session, support_rep_id, DAY, DAY)
+    statement = query.statement.compile(
+        session.get_bind(), compile_kwargs={"literal_binds": True}
+    )
+    plan = session.execute(text(f"EXPLAIN QUERY PLAN {statement}")).all()
+
+    (detail,) = [row[-1] for row in plan if "event" in row[-1]]
+    assert "ix_event_support_rep_schedule" in detail
+    assert "start_date>? AND start_date<?" in detail
+
+
+def test_conflicts_since_a_day_include_the_events_still_running(support_rep_id):
+    first = book(support_rep_id, 1, DAY - timedelta(days=100), DAY)
+    second = book(support_rep_id, 2, DAY, DAY + timedelta(days=1))
+
+    conflicts = list(find_conflicts(session, DAY))
+
+    assert [(c.first, c.second) for c in conflicts] == [(first.id, second.id)]
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import func, select
+
+from epic_events.models import snapshots
+from epic_events.models.customers import Customer
+from epic_events.models.events import Event
+
+
+def count(engine, model) -> int:
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_failed_replace_leaves_the_database_unchanged(
+    engine, seed, tmp_path, monkeypatch
+):
+    seed(5)
+    directory = str(tmp_path / "snapshot")
+    snapshots.export_snapshot(engine, directory)
+    seed(5, first=5)
+    read_rows = snapshots.read_rows
+
+    def failing_read_rows(directory, entry, table):
+        if table.name == Event.__tablename__:
+            raise RuntimeError("interrupted")
+        return read_rows(directory, entry, table)
+
+    monkeypatch.setattr(snapshots, "read_rows", failing_read_rows)
+
+    with pytest.raises(RuntimeError):
+        snapshots.restore_snapshot(
+            engine, directory, replace=True, batch_size=1, transaction_size=1
+        )
+
+    assert count(engine, Customer) == 10
+    assert count(engine, Event) == 10
+
+
+def test_replace_restores_the_snapshot(engine, seed, tmp_path):
+    seed(5)
+    directory = str(tmp_path / "snapshot")
+    snapshots.export_snapshot(engine, directory)
+    seed(5, first=5)
+
+    counts = snapshots.restore_snapshot(
+        engine, directory, replace=True, transaction_size=1
+    )
+
+    assert counts[Customer.__tablename__] == 5
+    assert count(engine, Customer) == 5
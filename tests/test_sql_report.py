@@ -0,0 +1,28 @@
+from epic_events import sql_report
+from epic_events.models import session
+from epic_events.models.customers import Customer
+
+
+def test_paginated_list_is_not_flagged(run, admin, seed):
+    seed(40)
+
+    for command in ("companies", "customers", "contracts", "events"):
+        with sql_report.recording() as report:
+            result = run(command, "list", "--page-size", "2")
+
+        assert result.exit_code == 0, result.output
+        assert max(stats.count for stats in report.shapes.values()) >= 20
+        assert report.n_plus_one() == []
+
+
+def test_lazy_load_loop_is_flagged(engine, seed):
+    seed(20)
+    session.expire_all()
+
+    with sql_report.recording() as report:
+        names = [customer.company.name for customer in session.query(Customer)]
+
+    assert len(names) == 20
+    ((shape, stats),) = report.n_plus_one()
+    assert stats.count == 20
+    assert "FROM company" in shape
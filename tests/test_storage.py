@@ -0,0 +1,49 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from epic_events.auth.server import TokenServer, socket_answers
+from epic_events.auth.storage import TokenStorage
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / "storage.sock")
+
+
+def test_server_does_not_replace_a_live_socket(socket_path):
+    first = TokenServer(socket_path, 60)
+    first.start_in_thread()
+
+    with pytest.raises(RuntimeError, match="already listens"):
+        asyncio.run(TokenServer(socket_path, 60).serve())
+
+    assert socket_answers(socket_path)
+    first.stop()
+
+
+def test_commands_starting_at_once_spawn_one_storage(socket_path, monkeypatch):
+    servers = []
+
+    def start(storage):
+        # Slow enough for the other command to find no storage either.
+        time.sleep(0.1)
+        server = TokenServer(storage.socket_path, 60)
+        server.start_in_thread()
+        servers.append(server)
+
+    monkeypatch.setattr(TokenStorage, "start", start)
+    storages = [TokenStorage(socket_path=socket_path) for _ in range(2)]
+    threads = [
+        threading.Thread(target=lambda storage=storage: storage.connect().close())
+        for storage in storages
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(servers) == 1
+    servers[0].stop()
@@ -0,0 +1,21 @@
+from epic_events.models import summaries
+
+
+def test_dashboard_is_maintained_on_sqlite(run, admin, seed):
+    seed(5)
+
+    result = run("dashboard", "sales-reps")
+
+    assert result.exit_code == 0, result.output
+    assert "Warning" not in result.output
+    assert run("dashboard", "check").exit_code == 0
+
+
+def test_dashboard_warns_without_triggers(run, admin, seed, monkeypatch):
+    seed(5)
+    monkeypatch.setattr(summaries, "MAINTAINED_DIALECTS", frozenset())
+
+    result = run("dashboard", "sales-reps")
+
+    assert result.exit_code == 0, result.output
+    assert "not maintained on sqlite" in result.output
@@ -0,0 +1,33 @@
+import io
+
+import pytest
+import sqlalchemy
+from sqlalchemy.exc import OperationalError
+
+from epic_events import telemetry
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    sink = io.StringIO()
+    monkeypatch.setitem(telemetry._state, "initialised", True)
+    monkeypatch.setitem(telemetry._state, "sink", sink)
+    return sink
+
+
+def test_failed_connection_raises_its_own_error(sink, tmp_path):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path}/missing/x.sqlite")
+    telemetry.instrument_engine(engine)
+
+    with pytest.raises(OperationalError):
+        engine.connect()
+
+
+def test_failed_statement_closes_its_span(sink):
+    engine = sqlalchemy.create_engine("sqlite://")
+    telemetry.instrument_engine(engine)
+
+    with engine.connect() as connection, pytest.raises(OperationalError):
+        connection.exec_driver_sql("SELECT * FROM missing")
+
+    assert "db.query" in sink.getvalue()